@@ -3,36 +3,49 @@ Home Page for BrokeTechBro Streamlit App
 
 This module renders the homepage UI with:
 - Logo and favicon
-- Knowledge Base browser
+- Knowledge Base browser and search
 - Footer navigation
 - Floating chat icon
 
 Author: Ikechukwu Chilaka
 """
 
+# Cold-start profiling (STARTUP_PROFILE=1); runs before the page's own imports
+from utils import startup
+startup.page_start("home")
+
 import streamlit as st
-from PIL import Image
 from pathlib import Path
-import json
+from utils.assets import cache_stats, image_src, page_icon
+from utils.kb import get_kb_index
+from utils import metrics
+from utils.session_reaper import end_flagged_chat
 
 # === Page Configuration ===
-favicon_path = "assets/icons/favicon.png"
-favicon = Image.open(favicon_path) if Path(favicon_path).is_file() else "🤖"
-
 st.set_page_config(
     page_title="BrokeTechBro",
-    page_icon=favicon,
+    page_icon=page_icon(),
     layout="centered"
 )
 
+# Optional /metrics endpoint and JSON snapshots (METRICS_PORT / METRICS_SNAPSHOT_PATH); once per process
+metrics.start_exporters()
+metrics.register_collector("asset_cache", cache_stats)
+
+# End a chat the idle-session reaper flagged while the visitor was away from the Chat page
+end_flagged_chat()
+
 # === Hero Section ===
 logo_path = "assets/icons/logo.png"
 if Path(logo_path).is_file():
-    st.image(logo_path, width=250)
+    st.image(image_src(logo_path, 250), width=250)
 else:
     st.markdown(":robot:")
 
 
+KB_SEARCH_LIMIT = 8
+
+
 def initialize_session_state():
     """Initialize session state with default values."""
     defaults = {
@@ -44,25 +57,42 @@ def initialize_session_state():
 
 
 def render_kb():
-    """Render knowledge base with category buttons and expandable entries."""
-    with open("assets/docs/kb.json", "r") as f:
-        kb = json.load(f)
+    """Render knowledge base with a search box, category buttons and expandable entries."""
+    kb = get_kb_index()
+
+    query = st.text_input("🔎 Search", placeholder="Search services, FAQs and more", key="kb_query")
+    if query.strip():
+        render_kb_search(kb, query)
+        return
 
-    cols = st.columns(len(kb["knowledge_base"]))
-    for idx, section in enumerate(kb["knowledge_base"]):
+    cols = st.columns(len(kb.categories))
+    for idx, category in enumerate(kb.categories):
         with cols[idx]:
-            if st.button(section["category"]):
-                st.session_state.selected_category = section["category"]
+            if st.button(category):
+                st.session_state.selected_category = category
 
     selected = st.session_state.selected_category
-    section_data = next((s for s in kb["knowledge_base"] if s["category"] == selected), None)
-    if section_data:
+    entries = kb.entries(selected)
+    if entries:
         st.markdown(f"##### {selected}")
-        for entry in section_data["entries"]:
+        for entry in entries:
             with st.expander(entry["title"]):
                 st.markdown(entry["description"])
 
 
+def render_kb_search(kb, query):
+    """Render KB entries from all categories ranked against the search query."""
+    results = kb.search(query, limit=KB_SEARCH_LIMIT)
+    if not results:
+        st.info("No matching entries. Try different words, or ask in the chat 💬")
+        return
+
+    st.markdown(f"##### Results for “{query.strip()}”")
+    for score, category, entry in results:
+        with st.expander(f"{entry['title']} · {category}"):
+            st.markdown(entry["description"])
+
+
 def footer():
     """Render footer with navigation links and blog reference."""
     st.divider()
@@ -131,3 +161,4 @@ def home():
 
 if __name__ == "__main__":
     home()
+    startup.page_end("home")
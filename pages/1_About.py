@@ -1,23 +1,30 @@
+# Cold-start profiling (STARTUP_PROFILE=1); runs before the page's own imports
+from utils import startup
+startup.page_start("about")
+
 import streamlit as st
-from PIL import Image
 import os
 from pathlib import Path
-import time
+from utils.assets import image_src, image_url, page_icon
+from utils.session_reaper import end_flagged_chat
 
 # === Page Configuration ===
-favicon_path = "assets/icons/favicon.png"
-favicon = Image.open(favicon_path) if Path(favicon_path).is_file() else "🤖"
-
 st.set_page_config(
     page_title="BrokeTechBro",
-    page_icon=favicon,
+    page_icon=page_icon(),
     layout="centered"
 )
 
+# End a chat the idle-session reaper flagged while the visitor was away from the Chat page
+end_flagged_chat()
+
 # === Constants ===
 EVENT_PHOTO_DIR = "assets/photos/event_photo"
 IMAGE_WIDTH = 350
 SLIDESHOW_INTERVAL = 3  # seconds
+SLIDESHOW_HEIGHT = 260  # px
+# "client": browser-side CSS rotation (no server work once rendered); "fragment": timed st.fragment
+SLIDESHOW_MODE = os.getenv("SLIDESHOW_MODE", "client").strip().lower()
 
 # === Render About Text ===
 def render_about():
@@ -37,20 +44,93 @@ def render_about():
 
 
 # === Load Image Paths ===
-def load_event_images():
+@st.cache_data
+def list_event_images(photo_dir, dir_mtime):
+    """Sorted event image paths; cached per directory mtime so reruns skip os.listdir."""
     valid_extensions = [".jpg", ".jpeg", ".png", ".webp"]
-    all_files = os.listdir(EVENT_PHOTO_DIR)
+    all_files = os.listdir(photo_dir)
     valid_images = [f for f in sorted(all_files) if Path(f).suffix.lower() in valid_extensions]
-    return [os.path.join(EVENT_PHOTO_DIR, img) for img in valid_images]
+    return [os.path.join(photo_dir, img) for img in valid_images]
+
+
+def load_event_images():
+    return list_event_images(EVENT_PHOTO_DIR, os.path.getmtime(EVENT_PHOTO_DIR))
 
 
 # === Display Slideshow in Two Columns ===
+@st.cache_data
+def build_slideshow_html(img_paths, interval, height):
+    """
+    Build a self-running two-column slideshow in HTML/CSS.
+
+    Every (pre-sized) image is referenced once, by its static URL (or inlined
+    when static serving is off), and the browser cycles through them with
+    staggered CSS animations, so after the first render the server does no
+    work at all. Column two shows the image after column one, as before.
+    """
+    total = len(img_paths)
+    cycle = total * interval
+    slot = 100 / total
+    fade = min(slot / 4, 100 * 0.5 / cycle)  # ~0.5s crossfade
+
+    # Each image is referenced once, as a CSS class both columns reuse
+    image_rules = "".join(
+        f".event-slide-{i} {{ background-image: url('{image_url(path, IMAGE_WIDTH)}'); }}"
+        for i, path in enumerate(img_paths)
+    )
+    columns = []
+    for column in range(2):
+        slides = []
+        for i in range(total):
+            visible_slot = (i - column) % total
+            delay = ((total - visible_slot) % total) * interval
+            slides.append(f"<div class='event-slide event-slide-{i}' style='animation-delay:-{delay}s'></div>")
+        columns.append(f"<div class='event-slides'>{''.join(slides)}</div>")
+
+    return f"""
+        <style>
+            .event-slideshow {{ display: flex; gap: 1rem; }}
+            .event-slides {{ position: relative; flex: 1; height: {height}px; }}
+            .event-slide {{
+                position: absolute; inset: 0; opacity: 0;
+                background: center / contain no-repeat;
+                animation: event-slide {cycle}s linear infinite;
+            }}
+            {image_rules}
+            @keyframes event-slide {{
+                0% {{ opacity: 0; }}
+                {fade:.3f}% {{ opacity: 1; }}
+                {slot:.3f}% {{ opacity: 1; }}
+                {slot + fade:.3f}% {{ opacity: 0; }}
+                100% {{ opacity: 0; }}
+            }}
+        </style>
+        <div class='event-slideshow' role='img' aria-label='Event photos'>{''.join(columns)}</div>
+    """
+
+
 def render_event_slideshow(img_paths):
     total = len(img_paths)
     if total == 0:
         st.warning("No event images found.")
         return
 
+    if SLIDESHOW_MODE == "fragment":
+        render_event_slideshow_fragment(img_paths)
+    else:
+        html = build_slideshow_html(tuple(img_paths), SLIDESHOW_INTERVAL, SLIDESHOW_HEIGHT)
+        st.markdown(html, unsafe_allow_html=True)
+
+
+@st.fragment(run_every=SLIDESHOW_INTERVAL)
+def render_event_slideshow_fragment(img_paths):
+    """
+    Server-driven alternative: only this fragment reruns on the timer, never the page,
+    and no thread sleeps between slides. Each visitor still costs a fragment run every
+    SLIDESHOW_INTERVAL seconds, so "client" mode is the default.
+    """
+    total = len(img_paths)
+
     # Initialize index
     if "slideshow_index" not in st.session_state:
         st.session_state.slideshow_index = 0
@@ -60,14 +140,12 @@ def render_event_slideshow(img_paths):
 
     col1, col2 = st.columns(2)
     with col1:
-        st.image(Image.open(img_paths[idx1]), width=IMAGE_WIDTH)
+        st.image(image_src(img_paths[idx1], IMAGE_WIDTH), width=IMAGE_WIDTH)
     with col2:
-        st.image(Image.open(img_paths[idx2]), width=IMAGE_WIDTH)
+        st.image(image_src(img_paths[idx2], IMAGE_WIDTH), width=IMAGE_WIDTH)
 
-    # Cycle index and rerun
-    time.sleep(SLIDESHOW_INTERVAL)
+    # Advance for the next timed run
     st.session_state.slideshow_index = (st.session_state.slideshow_index + 1) % total
-    st.rerun()
 
 
 # === Run Page ===
@@ -78,3 +156,4 @@ def about():
 
 if __name__ == "__main__":
     about()
+    startup.page_end("about")
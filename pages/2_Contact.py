@@ -1,14 +1,17 @@
+# Cold-start profiling (STARTUP_PROFILE=1); runs before the page's own imports
+from utils import startup
+startup.page_start("contact")
+
 import streamlit as st
-from PIL import Image
 from pathlib import Path
+from utils.assets import image_src, page_icon
+from utils.session_reaper import end_flagged_chat
 
 # === Page Config ===
 def set_page_config():
-    favicon_path = "assets/icons/favicon.png"
-    favicon = Image.open(favicon_path) if Path(favicon_path).is_file() else "🤖"
     st.set_page_config(
         page_title="BrokeTechBro",
-        page_icon=favicon,
+        page_icon=page_icon(),
         layout="centered"
     )
 
@@ -21,8 +24,8 @@ def render_contact_section():
     with col1:
         profile_path = "assets/photos/about_photo/photo_working.jpeg"
         if Path(profile_path).is_file():
-            profile_img = Image.open(profile_path)
-            st.image(profile_img, width=250, caption="Ikechukwu Chilaka")
+            # Pass the file path so the optimized bytes are served as-is (no re-encode)
+            st.image(image_src(profile_path, 250), width=250, caption="Ikechukwu Chilaka")
 
     # Right: Contact Details
     with col2:
@@ -36,7 +39,9 @@ def render_contact_section():
 # === Main Entry ===
 def contact():
     set_page_config()
+    end_flagged_chat()  # a chat the idle-session reaper flagged while the visitor was here
     render_contact_section()
 
 if __name__ == "__main__":
     contact()
+    startup.page_end("contact")
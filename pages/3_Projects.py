@@ -1,19 +1,21 @@
+# Cold-start profiling (STARTUP_PROFILE=1); runs before the page's own imports
+from utils import startup
+startup.page_start("projects")
+
 import streamlit as st
 import json
-from PIL import Image
 from pathlib import Path
+from utils.assets import image_src, page_icon
+from utils.session_reaper import end_flagged_chat
 
 # === Page Setup ===
 def configure_page():
     """
     Set the Streamlit page configuration including favicon and layout.
     """
-    favicon_path = "assets/icons/favicon.png"
-    favicon = Image.open(favicon_path) if Path(favicon_path).is_file() else "🤖"
-
     st.set_page_config(
         page_title="BrokeTechBro",
-        page_icon=favicon,
+        page_icon=page_icon(),
         layout="centered"
     )
 
@@ -49,8 +51,7 @@ def render_projects(projects):
 
             # Left Column: Project Image
             if project.get("img") and Path(project["img"]).is_file():
-                img = Image.open(project["img"])
-                col1.image(img, width=200)
+                col1.image(image_src(project["img"], 200), width=200)
             else:
                 col1.markdown("📷 *No image*")
 
@@ -67,8 +68,10 @@ def render_projects(projects):
 # === Main Execution ===
 def main():
     configure_page()
+    end_flagged_chat()  # a chat the idle-session reaper flagged while the visitor was here
     projects = load_projects()
     render_projects(projects)
 
 if __name__ == "__main__":
     main()
+    startup.page_end("projects")
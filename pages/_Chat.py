@@ -1,40 +1,52 @@
-from PIL import Image
-from pathlib import Path
-from openai import OpenAI
+# Cold-start profiling (STARTUP_PROFILE=1); runs before the page's own imports
+from utils import startup
+startup.page_start("chat")
+
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from pymongo.errors import PyMongoError
+from bson import ObjectId
 from datetime import datetime, timedelta
+from utils.polling import RunPoller, TIMEOUT_STATUS
+from utils.thread_pool import AssistantThreadPool
+from utils.persistence import pending_update, mark_persisted, persisted_count
+from utils.transcript import ChatMessage, fetch_messages, message_count, trim_transcript
+from utils.mongo_writer import MongoWriteBehind, merge_updates
+from utils.session_reaper import IDLE_ENDED_KEY, LAST_ACTIVITY_KEY, SessionReaper, set_idle_handler
+from utils.circuit_breaker import CircuitBreaker
+from utils.write_spool import WriteSpool
+from utils.assets import cache_stats, image_url, page_icon
+from utils.kb import KB_PATH, get_kb_index
+from utils.answer_cache import AnswerCache
+from utils.completions import CompletionsBackend, to_plain_text
+from utils.context import ConversationSummarizer, window_start
+from utils.openai_scheduler import OpenAIScheduler, SchedulerBusy, TokenBucket
+from utils.chat_render import format_message_html, render_transcript
+from utils import metrics
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+import functools
+import html
 import os
-import base64
 import logging
-import time
 import re
+import time
 
 # === Page Config ===
-favicon_path = "assets/icons/favicon.png"
-favicon = Image.open(favicon_path) if Path(favicon_path).is_file() else "🤖"
-
 st.set_page_config(
     page_title="BrokeTechBro",
-    page_icon=favicon,
+    page_icon=page_icon(),
     layout="centered"
 )
 
-
-def load_image(image_path):
-    try:
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-    except Exception as e:
-        logging.error(f"Error loading image {image_path}: {e}")
-        return ""
+# Optional /metrics endpoint and JSON snapshots (METRICS_PORT / METRICS_SNAPSHOT_PATH); once per process
+metrics.start_exporters()
+metrics.register_collector("asset_cache", cache_stats)
 
 # === Load Assets ===
-logo_path = "assets/icons/logo.png"
-logo = load_image(logo_path)
+# Header logo (shown 100px wide): its static URL, or a data URI cached per process when static serving is off
+logo = image_url("assets/icons/logo.png", 100)
     
 # Load environment variables
 load_dotenv()
@@ -55,18 +67,67 @@ if not OPENAI_API_KEY:
     st.stop()
 
 model = "gpt-4o"
+EMBEDDING_MODEL = "text-embedding-3-small"
 ASSISTANT_ID = os.getenv("ASSISTANT_ID")
 
-if not ASSISTANT_ID:
+# "assistants": OpenAI Assistants threads and runs; "completions": one Chat Completions call per turn
+# with the history kept in session state and KB grounding done locally
+CHAT_BACKEND = os.getenv("CHAT_BACKEND", "assistants").strip().lower()
+CHAT_MODEL = os.getenv("CHAT_MODEL", model)
+
+if CHAT_BACKEND not in ("assistants", "completions"):
+    st.error(f"❌ Unknown CHAT_BACKEND '{CHAT_BACKEND}' (expected 'assistants' or 'completions').")
+    st.stop()
+
+if CHAT_BACKEND == "assistants" and not ASSISTANT_ID:
     st.error("❌ ASSISTANT_ID not set in .env file. Send an email to chilaka.ig@gmail.com to contact the developer.")
     st.stop()
 
+# Admission control, request rate limit and retries for every OpenAI call in this process
+@st.cache_resource
+def get_openai_scheduler():
+    """
+    Builds the process-wide OpenAI scheduler.
+    Concurrent reply turns, requests per second (with burst), the admission timeout (seconds) and the
+    per-turn retry count and budget (seconds) can be tuned through environment variables.
+    """
+    scheduler = OpenAIScheduler(
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+        requests_per_second=float(os.getenv("OPENAI_REQUESTS_PER_SECOND", "10")),
+        burst=int(os.getenv("OPENAI_BURST", "20")),
+        queue_timeout=float(os.getenv("OPENAI_QUEUE_TIMEOUT", "20")),
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
+        retry_budget=float(os.getenv("OPENAI_RETRY_BUDGET", "30")),
+    )
+    metrics.register_collector("openai_scheduler", scheduler.stats)
+    return scheduler
+
+scheduler = get_openai_scheduler()
+
 # Create open client, save to cache to avoid recreating the client everytime
 @st.cache_resource
 def get_openai_client():
     """
-    Initializes and returns an OpenAI client using the API key from environment variables."""
-    return OpenAI(api_key=OPENAI_API_KEY)
+    Initializes and returns an OpenAI client using the API key from environment variables.
+    Retries are left to the scheduler; the connection pool (OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE)
+    and request timeout (OPENAI_TIMEOUT, seconds) can be tuned through environment variables.
+
+    The SDK takes about a second to import, so the client is only built on first use (or by the
+    background warm-up at the end of the page's first run), not before the page renders.
+    """
+    def build():
+        from openai import OpenAI
+
+        return OpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=0,
+            timeout=float(os.getenv("OPENAI_TIMEOUT", "60")),
+            http_client=scheduler.http_client(
+                max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+                max_keepalive=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+            ),
+        )
+    return startup.lazy(build)
 
 client = get_openai_client()
 
@@ -80,12 +141,256 @@ def get_mongo_collection():
                         
         else:       
             mongo_uri = f"mongodb+srv://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}/{DB_NAME}?retryWrites=true&w=majority"
-            mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=10000)  # 10s timeout
+            mongo_client = MongoClient(
+                mongo_uri,
+                serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))  # 10s default
+            )
 
             return mongo_client[DB_NAME][COLLECTION]
 
 collection = get_mongo_collection()
 
+# Background writer shared by all sessions; page reruns never wait on MongoDB
+@st.cache_resource
+def get_mongo_writer():
+    """
+    Builds the process-wide write-behind queue for the chat collection.
+    Queue size, flush interval (seconds) and batch size can be tuned through environment variables.
+
+    Writes go through a circuit breaker (MONGO_BREAKER_FAILURES consecutive failures open it for
+    MONGO_BREAKER_RESET seconds); while MongoDB is unreachable updates are spooled to the SQLite
+    file at MONGO_SPOOL_PATH (empty disables the spool) and replayed in order once it is back.
+    """
+    if collection is None:
+        return None
+    breaker = CircuitBreaker(
+        "mongo",
+        failure_threshold=int(os.getenv("MONGO_BREAKER_FAILURES", "3")),
+        reset_timeout=float(os.getenv("MONGO_BREAKER_RESET", "30")),
+    )
+    spool = None
+    spool_path = os.getenv("MONGO_SPOOL_PATH", ".spool/mongo_writes.sqlite3")
+    if spool_path:
+        try:
+            spool = WriteSpool(spool_path)
+            if len(spool):
+                logging.info(f"[get_mongo_writer] {len(spool)} spooled updates will be replayed from {spool_path}")
+        except Exception:
+            logging.exception(f"[get_mongo_writer] Could not open write spool at {spool_path}; buffering in memory")
+    writer = MongoWriteBehind(
+        collection,
+        max_queue=int(os.getenv("MONGO_WRITE_QUEUE_SIZE", "1000")),
+        flush_interval=float(os.getenv("MONGO_FLUSH_INTERVAL", "0.5")),
+        batch_size=int(os.getenv("MONGO_WRITE_BATCH_SIZE", "100")),
+        breaker=breaker,
+        spool=spool,
+    )
+    metrics.register_collector("mongo_writer", writer.stats)
+    metrics.register_collector("mongo_breaker", breaker.stats)
+    return writer
+
+mongo_writer = get_mongo_writer()
+
+# Shared run poller; its counters cover every session in this process
+@st.cache_resource
+def get_run_poller():
+    """
+    Builds the process-wide RunPoller used when replies are not streamed.
+    Backoff bounds and the deadline (seconds) can be tuned through environment variables.
+    """
+    poller = RunPoller(
+        client,
+        initial_interval=float(os.getenv("RUN_POLL_INITIAL_INTERVAL", "0.25")),
+        max_interval=float(os.getenv("RUN_POLL_MAX_INTERVAL", "2.0")),
+        deadline=float(os.getenv("RUN_POLL_DEADLINE", "60")),
+        call=scheduler.call,
+    )
+    metrics.register_collector("run_poller", poller.stats)
+    return poller
+
+run_poller = get_run_poller()
+
+def create_assistant_thread():
+    """Create an empty assistant thread and return its id."""
+    with metrics.span("openai.thread_create"):
+        return scheduler.call(client.beta.threads.create).id
+
+# Pre-created assistant threads, handed out when a session sends its first message
+@st.cache_resource
+def get_thread_pool():
+    """
+    Builds the process-wide pool of ready assistant threads (THREAD_POOL_SIZE=0 disables pre-creation).
+    No threads are pre-created for the completions backend, which does not use them.
+    """
+    pool = AssistantThreadPool(
+        create_assistant_thread,
+        size=int(os.getenv("THREAD_POOL_SIZE", "3")) if CHAT_BACKEND == "assistants" else 0,
+    )
+    metrics.register_collector("thread_pool", pool.stats)
+    return pool
+
+thread_pool = get_thread_pool()
+
+# Answers to opening questions, shared by all sessions
+@st.cache_resource
+def get_answer_cache():
+    """
+    Builds the process-wide answer cache (TTL seconds, entry and byte caps from environment variables).
+    Setting ANSWER_CACHE_SIMILARITY (e.g. 0.93) also matches near-duplicate questions via OpenAI embeddings.
+    """
+    similarity = os.getenv("ANSWER_CACHE_SIMILARITY")
+    embed = None
+    if similarity:
+        def embed(text):
+            with metrics.span("openai.embedding_create"):
+                return scheduler.call(client.embeddings.create, model=EMBEDDING_MODEL, input=text).data[0].embedding
+    cache = AnswerCache(
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500")),
+        max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(2 * 1024 * 1024))),
+        embed=embed,
+        similarity=float(similarity or 0.93),
+    )
+    metrics.register_collector("answer_cache", cache.stats)
+    return cache
+
+answer_cache = get_answer_cache()
+
+@st.cache_resource
+def get_completions_backend():
+    """
+    Builds the process-wide Chat Completions backend (model from CHAT_MODEL, KB entries per prompt from CHAT_KB_ENTRIES).
+    """
+    backend = CompletionsBackend(
+        client,
+        model=CHAT_MODEL,
+        kb_entries=int(os.getenv("CHAT_KB_ENTRIES", "3")),
+        max_tokens=int(os.getenv("CHAT_MAX_TOKENS", "600")),
+        call=scheduler.call,
+    )
+    metrics.register_collector("completions", backend.stats)
+    return backend
+
+completions_backend = get_completions_backend()
+
+@st.cache_resource
+def get_summarizer():
+    """
+    Builds the process-wide rolling-summary worker for bounded-context mode (model from SUMMARY_MODEL).
+    """
+    summarizer = ConversationSummarizer(client, model=os.getenv("SUMMARY_MODEL", "gpt-4o-mini"), call=scheduler.call)
+    metrics.register_collector("summarizer", summarizer.stats)
+    return summarizer
+
+summarizer = get_summarizer()
+
+# A chat with no activity for this long ends (SESSION_IDLE_TIMEOUT seconds)
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "900"))
+
+def is_live_chat(state):
+    """True for a session with an ongoing chat (state: st.session_state or a SessionStateView)."""
+    return bool(state.get("chat_active")) and not state.get(IDLE_ENDED_KEY) and message_count(state) > 0
+
+def reap_idle_session(state):
+    """
+    Flag a chat the session reaper found idle. The reaper then reruns the session, and that run
+    (end_idle_chat, on whichever page the visitor is) ends the chat; nothing else is changed from
+    the reaper thread.
+
+    Parameters:
+        state: SessionStateView of the idle session.
+    """
+    state[IDLE_ENDED_KEY] = True
+
+def end_idle_chat():
+    """
+    End this session's chat if the reaper flagged it as idle: queue its unsaved changes and the end of
+    the chat for MongoDB, then drop the transcript from memory. Registered with set_idle_handler, so it
+    also runs on the other pages. Must run before last_activity is updated; a visitor who became active
+    again after the flag was set keeps chatting. If the write queue is full the flag stays set and the
+    reaper's next scan tries again.
+
+    Returns:
+        bool: True if the chat was ended by this call.
+    """
+    if not st.session_state.get(IDLE_ENDED_KEY):
+        return False
+    last_activity = st.session_state.get(LAST_ACTIVITY_KEY, 0)
+    if not st.session_state.get("chat_active") or time.time() - last_activity < SESSION_IDLE_TIMEOUT:
+        st.session_state[IDLE_ENDED_KEY] = False
+        return False
+
+    if st.session_state.mongo_id and mongo_writer is not None:
+        update, snapshot = pending_update(st.session_state)
+        ended = {"$set": {"ended_at": datetime.now(), "end_reason": "idle", "updated_at": datetime.now()}}
+        if not mongo_writer.submit(st.session_state.mongo_id, merge_updates(update or {}, ended), upsert=True):
+            logging.warning("[end_idle_chat] Write queue full; the reaper will retry")
+            return False
+        mark_persisted(st.session_state, snapshot)
+    st.session_state.chat_active = False
+    st.session_state[IDLE_ENDED_KEY] = False
+    total = message_count(st.session_state)
+    st.session_state.messages_offset = total
+    st.session_state.rendered_offset = total
+    for key, empty in (("messages", []), ("earlier_messages", []), ("rendered_messages", []),
+                       ("summary_job", None), ("last_usage", None), ("message_bucket", None)):
+        st.session_state[key] = empty
+    logging.info(f"[end_idle_chat] Ended chat {st.session_state.mongo_id} after "
+                 f"{time.time() - last_activity:.0f}s idle")
+    return True
+
+set_idle_handler(end_idle_chat)
+
+@st.cache_resource
+def get_session_reaper():
+    """
+    Builds the process-wide idle-session reaper (scan every SESSION_REAP_INTERVAL seconds; 0 disables it).
+    """
+    interval = float(os.getenv("SESSION_REAP_INTERVAL", "60"))
+    if interval <= 0:
+        return None
+    reaper = SessionReaper(reap_idle_session, is_live_chat, idle_timeout=SESSION_IDLE_TIMEOUT, interval=interval)
+    metrics.register_collector("session_reaper", reaper.stats)
+    return reaper
+
+session_reaper = get_session_reaper()
+
+# Stream replies token-by-token into the chat bubble (set STREAM_REPLIES=false to fall back to polling)
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "true").strip().lower() in ("1", "true", "yes")
+
+# Bounded-context mode: send only the last CONTEXT_TURNS turns plus a rolling summary of earlier ones (0 sends everything)
+CONTEXT_TURNS = int(os.getenv("CONTEXT_TURNS", "0"))
+# Turns folded into the summary per update; older turns stay verbatim until a batch is complete
+CONTEXT_SUMMARY_BATCH = max(1, int(os.getenv("CONTEXT_SUMMARY_BATCH", "2")))
+# Optional prompt token cap for assistant runs (max_prompt_tokens)
+CONTEXT_MAX_PROMPT_TOKENS = os.getenv("CONTEXT_MAX_PROMPT_TOKENS")
+
+# Questions matching a KB entry with at least this confidence (0-1) are answered locally; >1 disables
+KB_ANSWER_THRESHOLD = float(os.getenv("KB_ANSWER_THRESHOLD", "0.8"))
+
+# Replies shown when the assistant cannot answer; never cached
+REPLY_TIMEOUT = "brokeTechBro is taking too long to respond - please try again"
+REPLY_FAILED = "brokeTechBro couldn’t generate a response — please try again"
+REPLY_EMPTY = "No response from brokeTechBro at this time."
+REPLY_ERROR = "Oops, something went wrong. Check your network and try again at a later time"
+REPLY_BUSY = "brokeTechBro is busy right now - please try again in a moment"
+REPLY_RATE_LIMITED = "You're sending messages faster than brokeTechBro can keep up - please wait a moment and try again"
+FALLBACK_REPLIES = {REPLY_TIMEOUT, REPLY_FAILED, REPLY_EMPTY, REPLY_ERROR, REPLY_BUSY, REPLY_RATE_LIMITED}
+
+# In-memory transcript window: older messages stay in MongoDB and are loaded a page at a time on request
+CHAT_WINDOW_MESSAGES = int(os.getenv("CHAT_WINDOW_MESSAGES", "40"))
+CHAT_HISTORY_PAGE = int(os.getenv("CHAT_HISTORY_PAGE", "20"))
+
+# Per-session message rate limit: SESSION_MAX_MESSAGES per SESSION_RATE_WINDOW seconds (0 disables)
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+SESSION_RATE_WINDOW = float(os.getenv("SESSION_RATE_WINDOW", "60"))
+
+# Knowledge files the assistant answers from; cached answers are invalidated when they change
+PROJECTS_PATH = "assets/docs/projects.json"
+
+# Page size when fetching a run's messages; a run normally produces a single message
+MESSAGE_FETCH_LIMIT = 5
+
 # Assistant should be instructed to use this words in closing a conversation. 
 BOT_END_KEYWORDS = [
     "have a great day",  "goodbye"
@@ -94,7 +399,9 @@ BOT_END_KEYWORDS = [
 # === Session Initialization ===
 def initialize_session_state():
     defaults = {
-        "messages": [],
+        "messages": [],  # recent messages only (ChatMessage records, see CHAT_WINDOW_MESSAGES)
+        "messages_offset": 0,  # index of messages[0] in the whole conversation
+        "earlier_messages": [],  # older messages loaded from MongoDB by "Show earlier messages"
         "chat_active": True,
         "cdn_injected": False,
         "thread_id": None,
@@ -107,6 +414,13 @@ def initialize_session_state():
         "appointment_email": "",
         "preferred_time": None,
         "chat_with_ai": True,  # Default to AI chat mode
+        "context_summary": "",  # rolling summary of turns before the context window
+        "summary_upto": 0,  # the first summary_upto messages of the conversation are covered by context_summary
+        "summary_job": None,  # (future, upto) of a summary update in progress
+        "last_usage": None,  # token usage of the latest model reply
+        "unposted_turns": [],  # KB / cached turns not yet on the assistant thread (see record_local_turn)
+        "message_bucket": TokenBucket(SESSION_MAX_MESSAGES / SESSION_RATE_WINDOW, SESSION_MAX_MESSAGES)
+                          if SESSION_MAX_MESSAGES > 0 else None,  # per-session message rate limit
         }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -116,6 +430,46 @@ def initialize_session_state():
 def click_close_chat():
     st.session_state.chat_active = False
 
+
+# === Fragment Helpers ===
+def rerun_fragment():
+    """
+    Rerun only the fragment this is called from.
+
+    A fragment that is executing as part of a full app run cannot be rerun on its
+    own, so in that case the whole app is rerun instead.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def log_run_time(scope):
+    """
+    Decorator that logs (and records as the "run.<scope>" span) the server time of every
+    run of the wrapped page section, whether part of a full app run or a fragment rerun.
+
+    Parameters:
+        scope (str): Name used as the log prefix.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Also reached when the section ends with st.rerun()
+                elapsed = time.perf_counter() - start
+                metrics.observe(f"run.{scope}", elapsed)
+                logging.info(f"[{scope}] Ran in {elapsed * 1000:.1f} ms")
+        return wrapper
+    return decorator
+
+
+@st.fragment
+@log_run_time("book_appointment_form")
 def book_appointment_form():
     """
     Show an inline form to collect user's phone and email.
@@ -137,8 +491,8 @@ def book_appointment_form():
             if close_button:
                 st.session_state.request_appointment = False
                 st.toast("❌ Appointment cancelled")
-                
-                return
+                # Only the form's fragment reruns, which removes the form
+                rerun_fragment()
 
             if submit_button:
                 phone = st.session_state.get("input_phone", "").strip()
@@ -167,81 +521,42 @@ def book_appointment_form():
                 st.toast("✅ Appointment info saved")
                 st.session_state.request_appointment = False
                 click_close_chat() #sets chat active to false
-                # Force main() to run manually after appointment booking
+                # Full app rerun: main() swaps the chat for the closing dashboard
                 st.rerun()
 
 
 # === Chat Renderer === 
 def render_chat():
-
-    st.markdown("""
-        <style>
-            .chat-container {
-                display: flex;
-                flex-direction: column;
-                gap: 10px;
-                padding-top: 70px; /* Push chat below logo */
-            }
-            .bot-bubble {
-                align-self: flex-start;
-                background-color: #DE7E5D;
-                color: #000;
-                padding: 15px;
-                border-radius: 15px 15px 15px 0px;
-                max-width: 70%;
-                font-size: 16px;
-                margin-right: auto;
-                margin-left: 0;
-            }
-            .user-bubble {
-                align-self: flex-end;
-                background-color: #6E2FD6;  
-                color: white;
-                padding: 10px 15px;
-                border-radius: 15px 15px 0px 15px;
-                max-width: 70%;
-                font-size: 16px;
-                margin-left: auto;
-                margin-right: 0;
-            }
-            .bot-name {
-                font-weight: bold;
-                font-size: 12px;
-                margin-bottom: 4px;
-                margin-left: 5px;
-                color: #DE7E5D;
-            }
-                     
-        </style>
-        <div class="chat-container">
-    """, unsafe_allow_html=True)
-
-
-
-    for idx, msg in enumerate(st.session_state.messages):
-        if msg["role"] == "user":
-            st.markdown(f"<div class='user-bubble'>{msg['content']}</div>", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<div class='bot-name'>Broke Tech Bro</div><div class='bot-bubble'>{msg['content']}</div>", unsafe_allow_html=True)
-
-    st.markdown("</div>", unsafe_allow_html=True)
-
-
-        # Show end chat after every user+assistant exchange
-    if len(st.session_state.messages) >= 2 and st.session_state.messages[-1]["role"] == "assistant":
+    # Older messages are not kept in memory; offer to load them from MongoDB a page at a time
+    if st.session_state.messages_offset > len(st.session_state.earlier_messages):
+        if st.button("⬆️ Show earlier messages", key="earlier_button"):
+            load_earlier_messages()
+
+    # Single markdown element; only new/changed messages are converted to HTML
+    with metrics.span("render.chat"):
+        render_transcript(st.session_state.messages, st.session_state,
+                          st.session_state.messages_offset, st.session_state.earlier_messages)
+
+    # Show end chat after every user+assistant exchange
+    total_messages = message_count(st.session_state)
+    last_role = st.session_state.messages[-1]["role"] if st.session_state.messages else None
+    if total_messages >= 2 and last_role == "assistant":
         col1, col2, col3 = st.columns([6, 2, 2])
 
 
         with col3:
-            st.button("⛔ End", key="end_button", on_click=click_close_chat)
+            if st.button("⛔ End", key="end_button"):
+                click_close_chat()
+                # Ending the chat changes the whole page, not just the chat fragment
+                st.rerun()
         
 
     # Show book appointment button if conversation is long enough
-    if len(st.session_state.messages) >= 10 and st.session_state.messages[-1]["role"] == "assistant":
+    if total_messages >= 10 and last_role == "assistant":
         with col1:
             if st.button("📅 Book", key="appointment_button"):
+                # The form is rendered further down in this same run, so no rerun is needed
                 st.session_state.request_appointment = True
-                st.rerun()
 
     # Always show appointment form if toggled
     if st.session_state.get("request_appointment"):
@@ -250,88 +565,505 @@ def render_chat():
 
 
 
+def load_earlier_messages():
+    """
+    Prepend the previous CHAT_HISTORY_PAGE messages of this conversation (read from MongoDB) to the
+    ones shown above the window. They are display-only and dropped again when the window next moves.
+    """
+    end = st.session_state.messages_offset - len(st.session_state.earlier_messages)
+    start = max(0, end - CHAT_HISTORY_PAGE)
+    if mongo_writer is None or mongo_writer.breaker.state == "open":
+        st.warning("Earlier messages are not available right now.")
+        return
+    try:
+        # Make sure everything this session queued has reached the database
+        mongo_writer.flush()
+        with metrics.span("mongo.history_page"):
+            earlier = fetch_messages(collection, st.session_state.mongo_id, start, end - start)
+    except PyMongoError:
+        st.warning("Earlier messages are not available right now.")
+        logging.exception("[load_earlier_messages] MongoDB Error")
+        return
+    if len(earlier) != end - start:
+        logging.warning(f"[load_earlier_messages] Expected {end - start} messages, got {len(earlier)}")
+        return
+    st.session_state.earlier_messages[:0] = earlier
+
+
+def transcript_floor():
+    """
+    Index (in the whole conversation) of the oldest message that must stay in memory: messages not yet
+    handed to MongoDB, and those still needed as model context (not yet folded into the summary in
+    bounded-context mode; all of them for the completions backend without it).
+    """
+    floor = persisted_count(st.session_state)
+    if CONTEXT_TURNS > 0:
+        floor = min(floor, st.session_state.summary_upto)
+    elif CHAT_BACKEND == "completions":
+        floor = 0
+    return floor
+
+
 # === Bot Response Logic ===
-def generate_bot_reply(user_input):
+def clean_reply(raw_reply):
     """
-    Send user input to the OpenAI Assistant and return its response.
+    Clean out LLM formatting artifacts (file citations), escape the text as HTML and turn markdown links
+    into styled HTML anchors.
 
     Parameters:
-        user_input (str): The message from the user.
+        raw_reply (str): Raw assistant text, complete or partially streamed.
 
     Returns:
-        str: Assistant's response or an appropriate error/help message.
+        str: Reply ready to be placed inside a chat bubble.
     """
-    try:
-        # Step 1: Create a new thread if one does not already exist in session
-        if st.session_state.thread_id is None:
-            thread = client.beta.threads.create()
-            st.session_state.thread_id = thread.id
-        else:
-            # Retrieve the existing thread using the session's thread_id
-            thread = client.beta.threads.retrieve(st.session_state.thread_id)
+    cleaned_reply = html.escape(re.sub(r'【.*?】', '', raw_reply).strip())
+    cleaned_reply = re.sub(r'\[([^\]]+)\]\((https?://[^)]+)\)',
+                           r'<a href="\2" target="_blank" style="color:#6A0DAD; text-decoration:underline;">\1</a>',
+                           cleaned_reply)
+    return cleaned_reply
+
+
+def with_admission(func):
+    """
+    Decorator for the reply backends: run the turn in one of the scheduler's slots (with its retry budget),
+    answering REPLY_BUSY when no slot frees up in time or OpenAI keeps rate limiting the turn.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            with scheduler.admit():
+                return func(*args, **kwargs)
+        except SchedulerBusy as e:
+            logging.warning(f"[{func.__name__}] {e}")
+            return REPLY_BUSY
+    return wrapper
+
+
+def ensure_thread_id():
+    """
+    Return the session's assistant thread id, taking one from the thread pool on first use.
+    Threads are only assigned once a message is sent, so page views without a chat cost nothing.
+    """
+    if st.session_state.thread_id is None:
+        st.session_state.thread_id = thread_pool.acquire()
+    return st.session_state.thread_id
+
+
+# Turns answered locally that are kept for the next run; older ones would fall outside any useful context
+LOCAL_TURNS_KEPT = 10
+
 
-        # Step 2: Add the user's message to the assistant thread
-        client.beta.threads.messages.create(
-            thread_id=thread.id,
+def record_local_turn(user_input, reply):
+    """
+    Remember a turn answered without the assistant (knowledge base or answer cache) so the next run
+    can add it to the session's assistant thread first. Nothing is sent now: the visitor gets the
+    answer at no extra cost.
+
+    Parameters:
+        user_input (str): The visitor's question.
+        reply (str): The bubble HTML shown as the answer.
+    """
+    if CHAT_BACKEND != "assistants":
+        return  # the completions backend builds its context from the session transcript
+    turns = st.session_state.unposted_turns
+    turns.append({"role": "user", "content": user_input})
+    turns.append({"role": "assistant", "content": to_plain_text(reply)})
+    del turns[:-2 * LOCAL_TURNS_KEPT]
+
+
+def post_user_message(thread_id, user_input):
+    """
+    Add the user's message to the assistant thread, behind any turns recorded by record_local_turn.
+
+    Without recorded turns the message is created on its own. With them, they and the message go in
+    with the run as ``additional_messages`` (one request instead of one per message); the caller clears
+    ``st.session_state.unposted_turns`` once the run has started.
+
+    Returns:
+        dict: extra keyword arguments for runs.create / runs.stream.
+    """
+    turns = st.session_state.unposted_turns
+    if turns:
+        return {"additional_messages": turns + [{"role": "user", "content": user_input}]}
+    with metrics.span("openai.message_create"):
+        scheduler.call(
+            client.beta.threads.messages.create,
+            thread_id=thread_id,
             role="user",
             content=user_input
         )
+    return {}
 
-        # Step 3: Start the assistant run with thread and assistant ID
-        run = client.beta.threads.runs.create(
-            thread_id=thread.id,
-            assistant_id=ASSISTANT_ID,
-            metadata={
-                "assistant_name": "BROKETECHBRO",
-                "assistant_id": ASSISTANT_ID
-            }
+
+def assistant_run_options():
+    """
+    Keyword arguments for runs.create / runs.stream.
+
+    In bounded-context mode the run only reads the last turns of the thread (truncation_strategy)
+    and gets the rolling summary of earlier turns as additional instructions.
+    """
+    options = {
+        "metadata": {
+            "assistant_name": "BROKETECHBRO",
+            "assistant_id": ASSISTANT_ID
+        }
+    }
+    if CONTEXT_TURNS > 0:
+        options["truncation_strategy"] = {
+            "type": "last_messages",
+            "last_messages": 2 * (CONTEXT_TURNS + CONTEXT_SUMMARY_BATCH)
+        }
+        if st.session_state.context_summary:
+            options["additional_instructions"] = f"Summary of the earlier conversation:\n{st.session_state.context_summary}"
+    if CONTEXT_MAX_PROMPT_TOKENS:
+        options["max_prompt_tokens"] = int(CONTEXT_MAX_PROMPT_TOKENS)
+    return options
+
+
+def context_messages():
+    """
+    Messages sent with a Chat Completions request: the whole transcript, or in bounded-context
+    mode the ones not yet covered by the summary (at most CONTEXT_TURNS + CONTEXT_SUMMARY_BATCH turns).
+    """
+    messages = st.session_state.messages
+    if CONTEXT_TURNS <= 0:
+        return messages
+    summarized = st.session_state.summary_upto - st.session_state.messages_offset
+    start = max(summarized, window_start(messages, CONTEXT_TURNS + CONTEXT_SUMMARY_BATCH))
+    return messages[start:]
+
+
+def apply_context_summary():
+    """
+    Adopt the result of a finished background summary update, if any.
+    """
+    job = st.session_state.summary_job
+    if job is None or not job[0].done():
+        return
+    future, upto = job
+    st.session_state.summary_job = None
+    try:
+        summary, usage = future.result()
+    except Exception:
+        logging.exception("[apply_context_summary] Summary update failed; earlier turns stay in the window")
+        return
+    st.session_state.context_summary = summary
+    st.session_state.summary_upto = upto
+    prompt_tokens, completion_tokens = record_usage("summary", usage)
+    logging.info(f"[apply_context_summary] Summary now covers {upto} messages "
+                 f"(prompt_tokens={prompt_tokens}, completion_tokens={completion_tokens})")
+
+
+def schedule_context_summary():
+    """
+    In bounded-context mode, start folding turns that left the window into the summary
+    once CONTEXT_SUMMARY_BATCH of them have accumulated (one update in flight per session).
+    """
+    if CONTEXT_TURNS <= 0 or st.session_state.summary_job is not None:
+        return
+    messages = st.session_state.messages
+    offset = st.session_state.messages_offset
+    start = window_start(messages, CONTEXT_TURNS)
+    pending = messages[st.session_state.summary_upto - offset:start]
+    if sum(1 for msg in pending if msg["role"] == "user") < CONTEXT_SUMMARY_BATCH:
+        return
+    st.session_state.summary_job = (summarizer.submit(st.session_state.context_summary, pending), offset + start)
+
+
+def record_usage(use, usage):
+    """
+    Add a request's token usage to the tokens_total counters.
+
+    Parameters:
+        use (str): "reply" or "summary".
+        usage: Usage object from the API (prompt_tokens / completion_tokens) or None.
+
+    Returns:
+        tuple: (prompt tokens, completion tokens), or (None, None) when usage is unknown.
+    """
+    if usage is None:
+        return None, None
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    metrics.inc("tokens_total", prompt_tokens or 0, backend=CHAT_BACKEND, use=use, kind="prompt")
+    metrics.inc("tokens_total", completion_tokens or 0, backend=CHAT_BACKEND, use=use, kind="completion")
+    return prompt_tokens, completion_tokens
+
+
+def fetch_run_reply(thread_id, run_id):
+    """
+    Fetch the assistant text produced by a single run.
+
+    Filters the thread on run_id (newest first, small page) so the request and payload
+    stay the same size however long the conversation gets.
+
+    Parameters:
+        thread_id (str): Assistant thread identifier.
+        run_id (str): Run whose output is wanted.
+
+    Returns:
+        str: Raw reply text (multiple run messages joined in order), or "" if none.
+    """
+    with metrics.span("openai.message_list"):
+        page = scheduler.call(
+            client.beta.threads.messages.list,
+            thread_id=thread_id,
+            run_id=run_id,
+            order="desc",
+            limit=MESSAGE_FETCH_LIMIT
         )
+    assistant_messages = [m for m in page.data if m.role == "assistant"]
+    if not assistant_messages:
+        return ""
+
+    return "\n\n".join(
+        part.text.value
+        for m in reversed(assistant_messages)
+        for part in m.content
+        if part.type == "text"
+    )
 
-        # Step 4: Wait for assistant to complete response or timeout after 10 seconds
-        timeout = 10  # seconds
-        start_time = time.time()
 
-        while True:
-            run_status = client.beta.threads.runs.retrieve(
-                thread_id=thread.id, run_id=run.id
-            )
+@with_admission
+def generate_assistant_reply(user_input):
+    """
+    Send user input to the OpenAI Assistant and return its response.
+
+    Parameters:
+        user_input (str): The message from the user.
 
-            if run_status.status == "completed":
-                break
-            elif run_status.status == "failed":
-                return ("brokeTechBro couldn’t generate a response — please try again")
-            elif time.time() - start_time > timeout:
-                return ("brokeTechBro is taking too long to respond - please try again")
+    Returns:
+        str: Assistant's raw response (see clean_reply) or one of the FALLBACK_REPLIES.
+    """
+    try:
+        # Step 1: Take a thread from the pool if this session does not have one yet
+        thread_id = ensure_thread_id()
 
-            # pause the execution of the loop for n seconds during each iteration of the polling loop that checks the assistant's response status.
-                time.sleep(0.5)
+        # Step 2: Add the user's message to the assistant thread (or send it with the run)
+        message_options = post_user_message(thread_id, user_input)
 
-        # Step 5: Retrieve and return the assistant's most recent message
-        messages = client.beta.threads.messages.list(thread_id=thread.id)
-        assistant_messages = [m for m in messages.data if m.role == "assistant"]
-        assistant_messages.sort(key=lambda m: m.created_at, reverse=True)
+        # Step 3: Start the assistant run with thread and assistant ID
+        with metrics.span("openai.run_create"):
+            run = scheduler.call(
+                client.beta.threads.runs.create,
+                thread_id=thread_id,
+                assistant_id=ASSISTANT_ID,
+                **assistant_run_options(),
+                **message_options
+            )
+        st.session_state.unposted_turns = []
 
-        if assistant_messages:
-            raw_reply = assistant_messages[0].content[0].text.value
+        # Step 4: Wait for the run to finish, backing off between polls
+        result = run_poller.wait(thread_id, run.id)
 
-            # Clean out LLM formatting artifacts and return clean message
-            cleaned_reply = re.sub(r'【.*?】', '', raw_reply).strip()
-            cleaned_reply = re.sub(r'\[([^\]]+)\]\((https?://[^)]+)\)',
-                                   r'<a href="\2" target="_blank" style="color:#6A0DAD; text-decoration:underline;">\1</a>',
-                                   cleaned_reply)
-            return cleaned_reply
+        if result.status == TIMEOUT_STATUS:
+            return REPLY_TIMEOUT
+        elif result.status not in ("completed", "incomplete"):
+            # failed, cancelled, expired or requires_action (this assistant has no tools to run)
+            logging.warning(f"[generate_assistant_reply] Run {run.id} ended with status {result.status}")
+            return REPLY_FAILED
 
-        return "No response from brokeTechBro at this time."
+        st.session_state.last_usage = getattr(result.run, "usage", None)
 
+        # Step 5: Retrieve only the message(s) this run produced
+        raw_reply = fetch_run_reply(thread_id, run.id)
+        if raw_reply:
+            return raw_reply
+
+        return REPLY_EMPTY
+
+    except SchedulerBusy:
+        raise
     except Exception as e:
         st.error("Error communicating with brokeTechBro.")
         logging.exception("Assistant API error")
-        return "Oops, something went wrong. Check your network and try again at a later time"
+        return REPLY_ERROR
+
+
+@with_admission
+def stream_assistant_reply(user_input, placeholder):
+    """
+    Send user input to the OpenAI Assistant and stream its response into the chat.
+
+    Uses the Assistants run event stream, so partial text is rendered in the bot
+    bubble as it arrives and long answers are no longer cut off by a fixed timeout.
+
+    Parameters:
+        user_input (str): The message from the user.
+        placeholder: st.empty() slot the partial bot bubble is written into.
+
+    Returns:
+        str: Assistant's raw response (see clean_reply) or one of the FALLBACK_REPLIES.
+    """
+    try:
+        # Step 1: Take a thread from the pool if this session does not have one yet
+        thread_id = ensure_thread_id()
+
+        # Step 2: Add the user's message to the assistant thread (or send it with the run)
+        message_options = post_user_message(thread_id, user_input)
+
+        # Step 3: Start the run and render text deltas as they arrive
+        raw_reply = ""
+        stream_start = time.perf_counter()
+
+        def run_stream():
+            nonlocal raw_reply
+            with metrics.span("openai.run_stream"), client.beta.threads.runs.stream(
+                thread_id=thread_id,
+                assistant_id=ASSISTANT_ID,
+                **assistant_run_options(),
+                **message_options
+            ) as stream:
+                for delta in stream.text_deltas:
+                    if not raw_reply:
+                        metrics.observe("openai.run_stream_first_token", time.perf_counter() - stream_start)
+                    raw_reply += delta
+                    placeholder.markdown(format_message_html("assistant", clean_reply(raw_reply)), unsafe_allow_html=True)
+                return stream.get_final_run()
+
+        # Retry only while nothing has been shown; a partly streamed reply is not started over
+        run = scheduler.call(run_stream, retry_if=lambda: not raw_reply)
+        st.session_state.unposted_turns = []
+
+        st.session_state.last_usage = getattr(run, "usage", None)
+
+        if run.status == "incomplete":
+            # Cut off (e.g. by max_prompt_tokens / max_completion_tokens); keep what was streamed, as the polled path does
+            details = getattr(run, "incomplete_details", None)
+            logging.warning(f"[stream_assistant_reply] Run {run.id} is incomplete "
+                            f"({getattr(details, 'reason', None)}); keeping the streamed text")
+        elif run.status != "completed":
+            logging.warning(f"[stream_assistant_reply] Run {run.id} ended with status {run.status}")
+            return REPLY_FAILED
+
+        if raw_reply.strip():
+            return raw_reply
+
+        return REPLY_EMPTY
+
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        st.error("Error communicating with brokeTechBro.")
+        logging.exception("Assistant API streaming error")
+        return REPLY_ERROR
+
+
+def completion_result(raw_reply, finish_reason, caller):
+    """
+    Map a Chat Completions result onto the reply contract shared with the Assistants backend.
+
+    A reply cut off at CHAT_MAX_TOKENS ("length") is still shown, like an "incomplete" run.
+    """
+    if finish_reason not in ("stop", "length", None):
+        logging.warning(f"[{caller}] Completion finished with reason {finish_reason}")
+        return REPLY_FAILED
+    if raw_reply.strip():
+        return raw_reply
+    return REPLY_EMPTY
+
+
+@with_admission
+def generate_completion_reply(user_input):
+    """
+    Get the reply to user input with a single Chat Completions call.
+
+    The conversation so far is taken from st.session_state.messages, which already ends with user_input
+    (see context_messages for bounded-context mode).
+
+    Parameters:
+        user_input (str): The message from the user.
+
+    Returns:
+        str: Raw response (see clean_reply) or one of the FALLBACK_REPLIES.
+    """
+    try:
+        raw_reply, finish_reason, usage = completions_backend.generate(
+            context_messages(), summary=st.session_state.context_summary
+        )
+        st.session_state.last_usage = usage
+        return completion_result(raw_reply, finish_reason, "generate_completion_reply")
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        st.error("Error communicating with brokeTechBro.")
+        logging.exception("Chat Completions API error")
+        return REPLY_ERROR
+
+
+@with_admission
+def stream_completion_reply(user_input, placeholder):
+    """
+    Stream the reply to user input from a single Chat Completions call into the chat.
+
+    Parameters:
+        user_input (str): The message from the user.
+        placeholder: st.empty() slot the partial bot bubble is written into.
+
+    Returns:
+        str: Raw response (see clean_reply) or one of the FALLBACK_REPLIES.
+    """
+    try:
+        raw_reply, finish_reason, usage = completions_backend.stream(
+            context_messages(),
+            lambda text: placeholder.markdown(format_message_html("assistant", clean_reply(text)), unsafe_allow_html=True),
+            summary=st.session_state.context_summary
+        )
+        st.session_state.last_usage = usage
+        return completion_result(raw_reply, finish_reason, "stream_completion_reply")
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        st.error("Error communicating with brokeTechBro.")
+        logging.exception("Chat Completions API streaming error")
+        return REPLY_ERROR
+
+
+# Both backends take the same arguments and return raw text or one of the FALLBACK_REPLIES
+REPLY_BACKENDS = {
+    "assistants": (generate_assistant_reply, stream_assistant_reply),
+    "completions": (generate_completion_reply, stream_completion_reply),
+}
+generate_bot_reply, stream_bot_reply = REPLY_BACKENDS[CHAT_BACKEND]
+
+
+def answer_cache_version():
+    """
+    Version tag for cached answers: they are dropped when the backend (assistant or model) or the KB files change.
+    """
+    mtimes = [os.path.getmtime(path) if os.path.exists(path) else 0 for path in (KB_PATH, PROJECTS_PATH)]
+    answerer = ASSISTANT_ID if CHAT_BACKEND == "assistants" else f"{CHAT_BACKEND}/{CHAT_MODEL}"
+    return f"{answerer}:{mtimes[0]}:{mtimes[1]}"
+
+
+def answer_from_kb(user_input):
+    """
+    Answer directly from the knowledge base when the question clearly matches an entry.
+
+    Parameters:
+        user_input (str): The message from the user.
+
+    Returns:
+        tuple: (reply HTML, confidence score) when the best match clears KB_ANSWER_THRESHOLD, else (None, score or None).
+        The reply is bubble-ready (entry text escaped), so it does not go through clean_reply.
+    """
+    try:
+        match = get_kb_index().best_match(user_input)
+    except Exception:
+        logging.exception("[answer_from_kb] KB lookup failed")
+        return None, None
+
+    if match is None:
+        return None, None
+    score, category, entry = match
+    if score < KB_ANSWER_THRESHOLD:
+        return None, score
+    return f"<b>{html.escape(entry['title'])}</b><br>{html.escape(entry['description'])}", score
 
 
 def is_user_engaged() -> bool:
-    # Check messages → is there any non-empty message?
-    messages_engaged = any(
+    # Check messages → is there any non-empty message? (earlier ones were only dropped once saved)
+    messages_engaged = st.session_state.get("messages_offset", 0) > 0 or any(
         msg.get("content", "").strip()
         for msg in st.session_state.get("messages", [])
     )
@@ -354,14 +1086,15 @@ def should_end_session(assistant_msg) -> bool:
         bool: True if session should end, False otherwise.
     """
     try:
-        # Check time since last message
-        if st.session_state.messages and "timestamp" in st.session_state.messages[-1]:
-            elapsed = datetime.now() - st.session_state.messages[-1]["timestamp"]
+        # Check how long the chat sat idle before this turn (its user message is messages[-2])
+        messages = st.session_state.messages
+        if len(messages) >= 3:
+            elapsed = messages[-2]["created_at"] - messages[-3]["created_at"]
         else:
-            elapsed = timedelta(0)  # fallback if no messages or no timestamp
-            logging.info("No timestamp found on last message. Defaulting elapsed to 0.")
+            elapsed = timedelta(0)  # first turn: nothing to be idle since
 
-        if elapsed > timedelta(minutes=15):
+        if elapsed > timedelta(seconds=SESSION_IDLE_TIMEOUT):
+            logging.info(f"[should_end_session] Chat was idle for {elapsed}; ending it")
             return True
 
         # Check if assistant content contains any end keywords
@@ -379,7 +1112,10 @@ def handle_user_input():
     Handles user input from the Streamlit chat UI.
 
     - Captures user input and appends it to the session messages.
-    - Sends the input to the assistant and appends the assistant's response.
+    - Answers from the knowledge base when confident, then from the answer cache (first question
+      only), otherwise sends the input to the assistant; appends the cleaned response with its
+      source, KB score and latency. Sessions over the per-session message rate limit get
+      REPLY_RATE_LIMITED instead.
     - Checks if the assistant's response should end the session.
     - Triggers a rerun to reflect new state (if session is still active).
     """
@@ -390,48 +1126,100 @@ def handle_user_input():
             user_input = st.chat_input("Talk to me...", key="chat_input")
             if user_input:
                 # Append user message
-                st.session_state.messages.append({
-                    "role": "user",
-                    "content": user_input,
-                    "created_at": datetime.now().isoformat()
-                })
+                st.session_state.messages.append(ChatMessage("user", user_input))
                 # close the appointment if open
                 st.session_state.request_appointment = False
 
-                with st.spinner("brokeTechBro is typing..."):
-                    bot_reply = generate_bot_reply(user_input)
+                # Pick up a finished summary update so this turn's request uses it
+                apply_context_summary()
+                st.session_state.last_usage = None
 
-                # Append bot reply
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": bot_reply,
-                    "created_at": datetime.now().isoformat()
-                })
+                reply_start = time.perf_counter()
+                # Opening questions are context-free, so their answers can be shared between sessions
+                first_turn = (st.session_state.messages_offset == 0
+                              and sum(1 for msg in st.session_state.messages if msg["role"] == "user") == 1)
 
-                # End session if triggered by bot logic
+                bucket = st.session_state.message_bucket
+                if bucket is not None and not bucket.try_acquire():
+                    raw_reply, kb_score, source = REPLY_RATE_LIMITED, None, "rate_limited"
+                    logging.warning(f"[handle_user_input] Session over {SESSION_MAX_MESSAGES} messages "
+                                    f"per {SESSION_RATE_WINDOW:g}s")
+                else:
+                    # Answer straight from the knowledge base when confident, skipping the OpenAI round trip
+                    raw_reply, kb_score = answer_from_kb(user_input)
+                    source = "kb"
+                if raw_reply is None and first_turn:
+                    cache_version = answer_cache_version()
+                    raw_reply = answer_cache.get(user_input, cache_version)
+                    source = "cache"
+                if raw_reply is None:
+                    source = "assistant"
+                    if STREAM_REPLIES:
+                        # Show the new user bubble now; the transcript was rendered before this input arrived
+                        st.markdown(format_message_html("user", user_input), unsafe_allow_html=True)
+                        raw_reply = stream_bot_reply(user_input, st.empty())
+                    else:
+                        with st.spinner("brokeTechBro is typing..."):
+                            raw_reply = generate_bot_reply(user_input)
+                reply_seconds = time.perf_counter() - reply_start
+                latency_ms = round(reply_seconds * 1000, 1)
+                metrics.observe(f"reply.{source}", reply_seconds)
+                metrics.inc("replies_total", source=source, fallback=raw_reply in FALLBACK_REPLIES)
+                prompt_tokens, completion_tokens = record_usage("reply", st.session_state.last_usage)
+                logging.info(f"[handle_user_input] Reply from {source} in {latency_ms} ms (kb_score={kb_score}, "
+                             f"prompt_tokens={prompt_tokens}, completion_tokens={completion_tokens})")
+
+                if source == "assistant" and first_turn and raw_reply not in FALLBACK_REPLIES:
+                    answer_cache.put(user_input, cache_version, raw_reply, latency=latency_ms / 1000)
+                    logging.info(f"[handle_user_input] Answer cache: {answer_cache.stats()}")
+                # KB answers are already bubble HTML; model text (fresh or cached) is cleaned and escaped
+                bot_reply = raw_reply if source == "kb" else clean_reply(raw_reply)
+                if source in ("kb", "cache"):
+                    record_local_turn(user_input, bot_reply)
+
+                # Append bot reply, recording where it came from so KB deflection can be measured
+                st.session_state.messages.append(ChatMessage(
+                    "assistant",
+                    bot_reply,
+                    source=source,
+                    kb_score=round(kb_score, 3) if kb_score is not None else None,
+                    latency_ms=latency_ms,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens
+                ))
+                schedule_context_summary()
+
+                # End session if triggered by bot logic (full rerun to show the closing dashboard)
                 if should_end_session(st.session_state.messages[-1]):
                     st.session_state.chat_active = False
                     st.rerun()
                 else:
-                    st.rerun()
+                    rerun_fragment()
 
 def create_mongo_id() -> bool:
     """
     Creates a new chat document in MongoDB if mongo_id does not exist in session.
 
+    The _id is generated locally and the insert is queued as an upsert on the
+    write-behind writer, so the rerun does not wait for the database.
+
     Returns:
-        bool: True if a new document was created, False if mongo_id already exists.
+        bool: True if a new document was queued, False if mongo_id already exists.
     """
     try:
         if not st.session_state.get("mongo_id"):
             # First insert
+            mongo_id = ObjectId()
             chat_data = {
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
+                "$setOnInsert": {"created_at": datetime.now()},
+                "$set": {"updated_at": datetime.now()}
             }
-            result = collection.insert_one(chat_data)
-            st.session_state.mongo_id = result.inserted_id
-            logging.info(f"[create_mongo_id] Created new chat record with _id: {st.session_state.mongo_id}")
+            with metrics.span("mongo.enqueue_insert"):
+                queued = mongo_writer.submit(mongo_id, chat_data, upsert=True)
+            if not queued:
+                return False
+            st.session_state.mongo_id = mongo_id
+            logging.info(f"[create_mongo_id] Queued new chat record with _id: {st.session_state.mongo_id}")
             return True
         else:
             # mongo_id already exists — no action needed
@@ -445,46 +1233,40 @@ def create_mongo_id() -> bool:
 
 def update_chat_history() -> bool:
     """
-    Updates the current chat session state in MongoDB.
+    Saves what changed in the current chat session since the last save to MongoDB.
     
     Chat data includes:
         - thread_id: OpenAI assistant thread identifier
         - chat_start_time: Timestamp of chat initiation
-        - messages: Full user-assistant message log
+        - messages: User-assistant message log (new messages are appended with $push)
         - appointment_phone, appointment_email: Captured appointment contact data
         - rating: User-provided session rating
-        - updated_at: Save timestamp
+        - context_summary, summary_upto: Rolling summary of earlier turns (bounded-context mode)
+        - updated_at: Save timestamp (only bumped when something changed)
 
-    If this is the first update, inserts a new document and stores the generated _id in st.session_state.mongo_id.
-    If the session already has mongo_id, updates the existing document with the latest session state.
+    Requires st.session_state.mongo_id (see create_mongo_id). When nothing changed since
+    the last save, no write is issued; otherwise the update is handed to the write-behind
+    writer, which coalesces and flushes it in the background.
 
     Returns:
-        bool: True if update was successful, False otherwise.
+        bool: True if the document is up to date or the update was queued, False otherwise.
     """
     try:
         if st.session_state.get("mongo_id"):
-            chat_data = {
-                "thread_id": st.session_state.get("thread_id"),
-                "chat_start_time": st.session_state.get("chat_start_time"),
-                "messages": st.session_state.get("messages", []),
-                "appointment_phone": st.session_state.get("appointment_phone"),
-                "appointment_email": st.session_state.get("appointment_email"),
-                "preferred_time": st.session_state.get("preferred_time"),
-                "rating": st.session_state.get("rating"),
-                "updated_at": datetime.now()
-            }
-
-            result = collection.update_one(
-                {"_id": st.session_state.mongo_id},
-                {"$set": chat_data}
-            )
+            update, snapshot = pending_update(st.session_state)
+            if update is None:
+                return True
 
-            if result.modified_count == 1:
-                logging.info(f"[update_chat_history] Successfully updated chat record _id: {st.session_state.mongo_id}")
+            # Upsert so the update is safe whichever order it is flushed in relative to create_mongo_id
+            with metrics.span("mongo.enqueue_update"):
+                queued = mongo_writer.submit(st.session_state.mongo_id, update, upsert=True)
+            if queued:
+                mark_persisted(st.session_state, snapshot)
+                logging.info(f"[update_chat_history] Queued update for chat record _id: {st.session_state.mongo_id}")
                 return True
             else:
  #               st.warning("⚠️ Chat history not saved.")
-                logging.warning(f"[update_chat_history] No document modified for _id: {st.session_state.mongo_id}")
+                logging.warning(f"[update_chat_history] Write queue full, update deferred for _id: {st.session_state.mongo_id}")
                 return False
         else:
    #         st.warning("⚠️ No mongo_id available — skipping update.")
@@ -498,12 +1280,34 @@ def update_chat_history() -> bool:
 
 
 
+def save_chat():
+    """
+    Create the chat document once the user has engaged, then queue any unsaved changes.
+    Called once per full run (main) and once per chat fragment run.
+
+    Saved messages beyond the last CHAT_WINDOW_MESSAGES then leave memory (see transcript_floor).
+    """
+    if is_user_engaged():
+        create_mongo_id()
+        # will update if mongo_id exists already
+        update_chat_history()
+        dropped = trim_transcript(st.session_state, CHAT_WINDOW_MESSAGES, transcript_floor())
+        if dropped:
+            logging.info(f"[save_chat] {dropped} saved messages left the in-memory window "
+                         f"(offset {st.session_state.messages_offset})")
+
+
 # ===== Render Rating UI (Likert Scale) =====
-def render_rating_ui(collection):
+@st.fragment
+@log_run_time("render_rating_ui")
+def render_rating_ui():
     """
     Render a Likert scale-based rating UI and save the result to MongoDB.
+    Runs as a fragment, so opening the scale or picking a rating only reruns this widget.
     """
     if not st.session_state.rating:
+        st.toast("Please rate me")
+        st.success("Please rate this chat 🙏🙏🙏")
         col1, col2 = st.columns([9, 1])
 
         with col1:
@@ -535,13 +1339,10 @@ def render_rating_ui(collection):
                     st.success(f"Thank you for rating us: {likert_options[selected]}")
 
                     if st.session_state.mongo_id:
-                        collection.update_one(
-                            {"_id": st.session_state.mongo_id},
-                            {"$set": {"rating": selected}},
-                            upsert=True
-                        )
+                        # rating is a tracked session field, so only it (and updated_at) is written
+                        update_chat_history()
                         st.session_state.show_rating = False
-                        st.rerun()
+                        rerun_fragment()
                     else:
                         st.write("No active conversation")
                         st.session_state.show_rating = False
@@ -554,10 +1355,7 @@ def show_closing_dashboard():
     Displays a closing dashboard with helpful video guides, support links,
     and social media handles after the chat session ends.
     """
-    render_rating_ui(collection) #show rate button
-    if st.session_state.rating == None:
-        st.toast("Please rate me")
-        st.success("Please rate this chat 🙏🙏🙏")
+    render_rating_ui() #show rate button and the rating prompt
 
     # Declare image URLs and destination links
     tiles = [
@@ -625,20 +1423,46 @@ def show_closing_dashboard():
     """, unsafe_allow_html=True)
 
 
+# === Chat Area (fragment) ===
+@st.fragment
+@log_run_time("render_chat_area")
+def render_chat_area():
+    """
+    Render the transcript, action buttons, appointment form and chat input.
+
+    Runs as a fragment: sending a message or clicking Book reruns only this part of
+    the page (no logo/CSS re-injection or full-page engagement check). Ending the
+    chat triggers a full app rerun so the closing dashboard replaces it.
+    """
+    # The chat was ended outside this fragment (idle reaper): show the closing dashboard instead
+    if end_idle_chat() or not st.session_state.chat_active:
+        st.rerun()
+
+    try:
+        if not st.session_state.get(IDLE_ENDED_KEY):  # still flagged (write queue full): not activity
+            st.session_state.last_activity = time.time()
+        render_chat()
+        handle_user_input()
+        #  save updated chat history AFTER possible new input!
+        save_chat()
+    except Exception as e:
+        st.error("Oops, something went wrong loading the chat, contact chilaka.ig@gmail.com")
+        st.exception(e)
+        logging.exception("[render_chat_area] Chat fragment error")
+
+
 # === Main App ===
+@log_run_time("main")
 def main():
     try:
         #Ensure state variables are existing or initialised if not existing
         initialize_session_state()
+        end_idle_chat()
+        if not st.session_state.get(IDLE_ENDED_KEY):  # still flagged (write queue full): not activity
+            st.session_state.last_activity = time.time()  # read by the session reaper
 
-        # Check engagement
-        has_engaged  = is_user_engaged()
-
-        #create a mongo id if not created
-        if has_engaged:
-            create_mongo_id()
-            #will update if mongo_id exists already
-            update_chat_history()
+        # Create the chat record if needed and save changes made since the last run
+        save_chat()
 
 
         # If session is over, show only dashboard and exit
@@ -650,15 +1474,6 @@ def main():
                 logging.exception("Dashboard load error")
             return  #  prevent rest of app from rendering
 
-        #  Create thread if needed
-        if st.session_state.thread_id is None:
-            try:
-                thread = client.beta.threads.create()
-                st.session_state.thread_id = thread.id
-            except Exception as thread_error:
-                st.error(f"❌ OpenAI cannot prepare thread for this conversation: {thread_error}")
-                return
-
         # ✅ Header logo
         if logo:
             st.markdown(f"""
@@ -675,14 +1490,11 @@ def main():
                     }}
                 </style>
                 <a href="https://thebroketechbro.streamlit.app" target="_blank">
-                    <img class='logo' src='data:image/png;base64,{logo}' alt="Logo">
+                    <img class='logo' src='{logo}' alt="Logo">
                 </a>
             """, unsafe_allow_html=True)
 
-        render_chat()
-        handle_user_input()
-        #  save updated chat history AFTER possible new input!
-        update_chat_history()
+        render_chat_area()
 
 
     except Exception as e:
@@ -692,4 +1504,8 @@ def main():
 
 main()
 
+# The page is on screen; build the OpenAI client in the background so the first message does not wait for it
+startup.warm_up(client)  # then freezes the startup heap (utils/startup.py)
+startup.page_end("chat")
+
 
@@ -0,0 +1 @@
+"""Developer tooling for the BrokeTechBro app (fake services, benchmarks)."""
@@ -0,0 +1,206 @@
+"""
+Measure server CPU and threads held by idle About-page visitors.
+
+Starts a real ``streamlit run`` server for the About page, connects N
+websocket clients that load the page and then sit idle, and samples the
+server process over a fixed window:
+
+- cpu_seconds / cpu_percent: server CPU time consumed during the idle window
+- threads: OS threads in the server process at the end of the window
+- messages / mbytes: ForwardMsgs and bytes pushed to the idle clients
+
+Modes:
+- before:   About page from a git ref (default: the repository's root commit),
+            i.e. the sleep-and-rerun slideshow
+- client:   current page, browser-side CSS slideshow (default)
+- fragment: current page, st.fragment(run_every=...) slideshow
+
+Linux only (reads /proc). Usage:
+    python -m scripts.bench_about_idle --visitors 100 --duration 30 [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ABOUT_PAGE = "pages/1_About.py"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+
+
+def process_threads(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    return 0
+
+
+def start_server(script, port, env):
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", script,
+        "--server.headless", "true", "--server.port", str(port),
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ]
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"streamlit server for {script} did not start")
+
+
+async def auto_rerun(ws, page_script_hash, fragment_id, interval, stop):
+    """Emulate the browser timer behind st.fragment(run_every=...)."""
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = page_script_hash
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.is_auto_rerun = True
+        await ws.send(msg.SerializeToString())
+
+
+async def idle_visitor(port, stop, counters):
+    """Load the page like a browser tab would, then sit idle (honouring fragment timers)."""
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        await ws.send(msg.SerializeToString())
+        page_script_hash = ""
+        timers = {}
+        try:
+            while not stop.is_set():
+                try:
+                    data = await asyncio.wait_for(ws.recv(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                forward = ForwardMsg()
+                forward.ParseFromString(data)
+                kind = forward.WhichOneof("type")
+                if kind == "new_session":
+                    page_script_hash = forward.new_session.page_script_hash
+                elif kind == "auto_rerun" and forward.auto_rerun.fragment_id not in timers:
+                    timers[forward.auto_rerun.fragment_id] = asyncio.create_task(auto_rerun(
+                        ws, page_script_hash, forward.auto_rerun.fragment_id, forward.auto_rerun.interval, stop))
+                if counters["measuring"]:
+                    counters["messages"] += 1
+                    counters["bytes"] += len(data)
+        finally:
+            for timer in timers.values():
+                timer.cancel()
+
+
+async def measure(port, pid, visitors, warmup, duration):
+    stop = asyncio.Event()
+    counters = {"measuring": False, "messages": 0, "bytes": 0}
+    tasks = [asyncio.create_task(idle_visitor(port, stop, counters)) for _ in range(visitors)]
+    await asyncio.sleep(warmup)  # every visitor has loaded the page by now
+
+    counters["measuring"] = True
+    cpu_start, wall_start = process_cpu_seconds(pid), time.monotonic()
+    await asyncio.sleep(duration)
+    cpu = process_cpu_seconds(pid) - cpu_start
+    wall = time.monotonic() - wall_start
+    threads = process_threads(pid)
+    counters["measuring"] = False
+
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "cpu_seconds": round(cpu, 2),
+        "cpu_percent": round(100 * cpu / wall, 1),
+        "threads": threads,
+        "messages": counters["messages"],
+        "mbytes": round(counters["bytes"] / 1e6, 2),
+    }
+
+
+def run_mode(mode, script, visitors, warmup, duration):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, SLIDESHOW_MODE="fragment" if mode == "fragment" else "client")
+    port = free_port()
+    proc = start_server(script, port, env)
+    try:
+        idle_threads = process_threads(proc.pid)
+        result = asyncio.run(measure(port, proc.pid, visitors, warmup, duration))
+        return dict(mode=mode, visitors=visitors, idle_server_threads=idle_threads, **result)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def root_commit():
+    out = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=REPO_ROOT,
+                         capture_output=True, text=True, check=True)
+    return out.stdout.split()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--visitors", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30, help="idle measurement window (s)")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds for all visitors to load the page")
+    parser.add_argument("--baseline-ref", help="git ref of the 'before' About page (default: root commit)")
+    parser.add_argument("--modes", nargs="+", default=["before", "client", "fragment"])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory(dir=REPO_ROOT, prefix=".bench_") as tmp:
+        for mode in args.modes:
+            script = ABOUT_PAGE
+            if mode == "before":
+                ref = args.baseline_ref or root_commit()
+                source = subprocess.run(["git", "show", f"{ref}:{ABOUT_PAGE}"], cwd=REPO_ROOT,
+                                        capture_output=True, text=True, check=True).stdout
+                script = os.path.join(tmp, "about_before.py")
+                with open(script, "w") as f:
+                    f.write(source)
+            print(f"measuring {mode} with {args.visitors} idle visitors...", flush=True)
+            rows.append(run_mode(mode, script, args.visitors, args.warmup, args.duration))
+
+    columns = list(rows[0])
+    print(" ".join(f"{c:>19}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>19}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
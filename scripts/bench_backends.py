@@ -0,0 +1,147 @@
+"""
+Per-turn reply latency of the two chat backends.
+
+Starts a real ``streamlit run`` server for the Chat page once per backend and
+reply mode (MongoDB replaced by scripts/fake_mongo.py, OpenAI pointed at
+scripts/fake_openai.py with a per-request network delay) and sends a series of
+questions over the websocket, each one unique so neither the KB shortcut nor
+the answer cache can answer it:
+
+- assistants:   message create, run create + polls (or run stream), message list
+- completions:  one Chat Completions request carrying the history and local KB grounding
+
+For every configuration it reports the p50/p95 time from sending a message
+until the page has finished rendering the reply, the OpenAI requests made per
+turn, and prompt/completion tokens per turn as counted by the fake (summary
+updates included). ``--context-turns`` also runs each backend in bounded-context
+mode (CONTEXT_TURNS) to compare long conversations against the full history.
+
+Linux only. Usage:
+    python -m scripts.bench_backends --turns 10 --request-latency 0.1 --run-latency 0.5 [--json results.json]
+    python -m scripts.bench_backends --turns 30 --context-turns 0 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import time
+
+import websockets
+
+from scripts.bench_about_idle import REPO_ROOT, free_port
+from scripts.bench_chat_interactions import CHAT_PAGE, ChatSession, start_server
+from scripts.fake_openai import start_in_background
+
+QUESTION = "what's the weather like in lagos"
+CONFIGS = [
+    ("assistants", "true"),
+    ("assistants", "false"),
+    ("completions", "true"),
+    ("completions", "false"),
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_session(port, pid, openai_state, label, turns):
+    """One conversation of ``turns`` unique questions; returns [(wall ms, OpenAI requests), ...]."""
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        session = ChatSession(ws, pid)
+        await session.load()
+        samples = []
+        for turn in range(turns):
+            requests_before = openai_state.request_count
+            sample = await session.interact("Talk to me...", chat_input_value=f"{QUESTION} ({label} turn {turn})")
+            samples.append((sample["wall_ms"], openai_state.request_count - requests_before))
+        return samples
+
+
+def run_config(backend, stream, context_turns, args, openai_server, openai_url):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, OPENAI_API_KEY="bench", ASSISTANT_ID="asst_bench",
+               OPENAI_BASE_URL=openai_url, MONGODB_USERNAME="bench", MONGODB_PASSWORD="bench",
+               MONGODB_HOST="localhost", DB_NAME="bench", COLLECTION="chats",
+               CHAT_BACKEND=backend, STREAM_REPLIES=stream, CONTEXT_TURNS=str(context_turns),
+               KB_ANSWER_THRESHOLD="2",  # every question goes to the backend
+               SESSION_MAX_MESSAGES="0",  # long conversations are sent back to back
+               RUN_POLL_INITIAL_INTERVAL="0.1")
+    port = free_port()
+    proc = start_server(CHAT_PAGE, port, env)
+    try:
+        state = openai_server.state
+        asyncio.run(run_session(port, proc.pid, state, "warmup", 2))
+        samples = []
+        tokens_before = (state.prompt_tokens, state.completion_tokens)
+        for session in range(args.sessions):
+            samples += asyncio.run(run_session(port, proc.pid, state, f"s{session}", args.turns))
+        time.sleep(1.0)  # let background summary updates finish so their tokens are counted
+        prompt_tokens = state.prompt_tokens - tokens_before[0]
+        completion_tokens = state.completion_tokens - tokens_before[1]
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    wall = [ms for ms, _ in samples]
+    return {
+        "backend": backend,
+        "streamed": stream == "true",
+        "context_turns": context_turns,
+        "turns": len(samples),
+        "p50_ms": round(statistics.median(wall), 1),
+        "p95_ms": round(percentile(wall, 95), 1),
+        "requests_per_turn": round(statistics.mean(n for _, n in samples), 2),
+        "prompt_tokens_per_turn": round(prompt_tokens / len(samples), 1),
+        "completion_tokens_per_turn": round(completion_tokens / len(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10, help="messages per conversation")
+    parser.add_argument("--sessions", type=int, default=3, help="conversations per configuration")
+    parser.add_argument("--request-latency", type=float, default=0.1, help="fake network round trip per request (s)")
+    parser.add_argument("--run-latency", type=float, default=0.5, help="fake model time before the reply starts (s)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="fake delay between streamed tokens (s)")
+    parser.add_argument("--context-turns", type=int, nargs="+", default=[0],
+                        help="CONTEXT_TURNS values to run (0 sends the full history)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    openai_server, openai_url = start_in_background(run_latency=args.run_latency, token_delay=args.token_delay,
+                                                    request_latency=args.request_latency)
+    rows = []
+    try:
+        for context_turns in args.context_turns:
+            for backend, stream in CONFIGS:
+                print(f"measuring {backend} (streamed={stream}, context_turns={context_turns})...", flush=True)
+                rows.append(run_config(backend, stream, context_turns, args, openai_server, openai_url))
+    finally:
+        openai_server.shutdown()
+
+    baseline = {(row["streamed"], row["context_turns"]): row["p50_ms"] for row in rows if row["backend"] == "assistants"}
+    print(f"{'backend':<13}{'streamed':>9}{'context':>8}{'turns':>7}{'p50 ms':>9}{'p95 ms':>9}{'requests/turn':>15}"
+          f"{'prompt tok/turn':>17}{'compl tok/turn':>16}{'p50 vs assistants':>19}")
+    for row in rows:
+        base = baseline[(row["streamed"], row["context_turns"])]
+        change = (row["p50_ms"] - base) / base * 100
+        print(f"{row['backend']:<13}{str(row['streamed']):>9}{row['context_turns'] or 'all':>8}{row['turns']:>7}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['requests_per_turn']:>15}"
+              f"{row['prompt_tokens_per_turn']:>17}{row['completion_tokens_per_turn']:>16}{change:>+18.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
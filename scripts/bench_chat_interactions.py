@@ -0,0 +1,238 @@
+"""
+Measure per-interaction server cost on the Chat page.
+
+Starts a real ``streamlit run`` server for the Chat page (MongoDB replaced by
+scripts/fake_mongo.py, OpenAI pointed at scripts/fake_openai.py), then drives a
+browser-like websocket session through a scripted conversation:
+
+    send (assistant) -> send (kb) x4 -> book -> submit (empty form) -> close form
+    -> end -> rate -> pick rating
+
+For every interaction it records, from the widget event being sent until the
+last script run it triggered has finished:
+
+- wall_ms:    round trip on localhost (~ server time)
+- cpu_ms:     server process CPU time (Linux, /proc)
+- messages / kbytes: ForwardMsgs and bytes the server pushed back
+
+Modes:
+- before:   Chat page from a git ref (default: the commit before the chat was
+            split into fragments), every interaction reruns the whole page
+- current:  the page in the working tree
+
+Linux only. Usage:
+    python -m scripts.bench_chat_interactions --sessions 5 [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from scripts.bench_about_idle import REPO_ROOT, free_port, process_cpu_seconds
+from scripts.fake_openai import start_in_background
+
+CHAT_PAGE = "pages/_Chat.py"
+KB_QUESTION = "Do you build dashboards?"
+ASSISTANT_QUESTION = "what's the weather like"
+RATING = "4 - Satisfied"
+
+# Runs the server in-process with MongoClient swapped for the mongomock-backed fake
+SERVER_BOOTSTRAP = """
+import sys
+import pymongo
+from scripts.fake_mongo import FakeMongoClient
+pymongo.MongoClient = FakeMongoClient
+from streamlit.web.cli import main
+sys.argv = ["streamlit", "run"] + sys.argv[1:]
+main()
+"""
+
+
+def start_server(script, port, env):
+    cmd = [
+        sys.executable, "-c", SERVER_BOOTSTRAP, script,
+        "--server.headless", "true", "--server.port", str(port),
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ]
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"streamlit server for {script} did not start")
+
+
+class ChatSession:
+    """A websocket client that tracks widgets like the browser and sends widget events."""
+
+    def __init__(self, ws, pid):
+        self.ws = ws
+        self.pid = pid
+        self.page_script_hash = ""
+        self.widgets = {}  # label -> (element type, widget id, fragment id)
+
+    async def _run(self, msg):
+        cpu_start, start = process_cpu_seconds(self.pid), time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        messages = size = 0
+        while True:
+            data = await asyncio.wait_for(self.ws.recv(), 60)
+            messages += 1
+            size += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = forward.new_session.page_script_hash
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                widget = getattr(element, element_type)
+                label = getattr(widget, "label", "") or getattr(widget, "placeholder", "")
+                if getattr(widget, "id", "") and label:
+                    self.widgets[label] = (element_type, widget.id, forward.delta.fragment_id)
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        return {
+            "wall_ms": (time.perf_counter() - start) * 1000,
+            "cpu_ms": (process_cpu_seconds(self.pid) - cpu_start) * 1000,
+            "messages": messages,
+            "kbytes": size / 1000,
+        }
+
+    async def load(self):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        return await self._run(msg)
+
+    async def interact(self, label, values=None, **value):
+        """
+        Send one widget event, e.g. interact("⛔ End", trigger_value=True).
+
+        ``values`` adds the current state of other widgets sent with it, e.g. form fields:
+        {"Phone Number:": {"string_value": "+2348000000000"}}.
+        """
+        element_type, widget_id, fragment_id = self.widgets[label]
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.fragment_id = fragment_id
+        for state_label, state_value in [(label, value)] + list((values or {}).items()):
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = self.widgets[state_label][1]
+            for field, field_value in state_value.items():
+                if field == "chat_input_value":
+                    state.chat_input_value.data = field_value
+                else:
+                    setattr(state, field, field_value)
+        return await self._run(msg)
+
+
+async def run_session(port, pid):
+    """Drive one conversation; returns [(interaction, sample), ...]."""
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        session = ChatSession(ws, pid)
+        samples = [("load", await session.load())]
+        samples.append(("send (assistant)", await session.interact("Talk to me...", chat_input_value=ASSISTANT_QUESTION)))
+        for _ in range(4):
+            samples.append(("send (kb)", await session.interact("Talk to me...", chat_input_value=KB_QUESTION)))
+        samples.append(("book", await session.interact("📅 Book", trigger_value=True)))
+        samples.append(("submit (empty form)", await session.interact("Submit", trigger_value=True)))
+        samples.append(("close form", await session.interact("Close", trigger_value=True)))
+        samples.append(("end", await session.interact("⛔ End", trigger_value=True)))
+        samples.append(("rate", await session.interact("⭐ Rate Chat", trigger_value=True)))
+        samples.append(("pick rating", await session.interact("Select a rating:", string_value=RATING)))
+        return samples
+
+
+def run_mode(mode, script, sessions, openai_url):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, OPENAI_API_KEY="bench", ASSISTANT_ID="asst_bench",
+               OPENAI_BASE_URL=openai_url, MONGODB_USERNAME="bench", MONGODB_PASSWORD="bench",
+               MONGODB_HOST="localhost", DB_NAME="bench", COLLECTION="chats")
+    port = free_port()
+    proc = start_server(script, port, env)
+    try:
+        asyncio.run(run_session(port, proc.pid))  # warm caches, imports and the thread pool
+        by_interaction = {}
+        for _ in range(sessions):
+            for name, sample in asyncio.run(run_session(port, proc.pid)):
+                by_interaction.setdefault(name, []).append(sample)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    rows = []
+    for name, samples in by_interaction.items():
+        row = {"mode": mode, "interaction": name}
+        for metric in ("wall_ms", "cpu_ms", "messages", "kbytes"):
+            row[metric] = round(statistics.median(s[metric] for s in samples), 1)
+        rows.append(row)
+    return rows
+
+
+def baseline_ref():
+    """The commit before the chat page first used st.fragment (HEAD if it never did)."""
+    out = subprocess.run(["git", "log", "--reverse", "--format=%H", "-S", "@st.fragment", "--", CHAT_PAGE],
+                         cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    commits = out.stdout.split()
+    return f"{commits[0]}~1" if commits else "HEAD"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5, help="scripted conversations per mode")
+    parser.add_argument("--baseline-ref", help="git ref of the 'before' Chat page")
+    parser.add_argument("--modes", nargs="+", default=["before", "current"])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    openai_server, openai_url = start_in_background(run_latency=0.0, token_delay=0.0)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory(dir=REPO_ROOT, prefix=".bench_") as tmp:
+            for mode in args.modes:
+                script = CHAT_PAGE
+                if mode == "before":
+                    ref = args.baseline_ref or baseline_ref()
+                    source = subprocess.run(["git", "show", f"{ref}:{CHAT_PAGE}"], cwd=REPO_ROOT,
+                                            capture_output=True, text=True, check=True).stdout
+                    script = os.path.join(tmp, "chat_before.py")
+                    with open(script, "w") as f:
+                        f.write(source)
+                print(f"measuring {mode} over {args.sessions} sessions...", flush=True)
+                rows.extend(run_mode(mode, script, args.sessions, openai_url))
+    finally:
+        openai_server.shutdown()
+
+    columns = list(rows[0])
+    print("".join(f"{c:>21}" for c in columns))
+    for row in rows:
+        print("".join(f"{row[c]:>21}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
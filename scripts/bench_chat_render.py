@@ -0,0 +1,100 @@
+"""
+Benchmark: chat transcript rendering as the conversation grows.
+
+Runs the transcript part of the Chat page under Streamlit's AppTest with 0-200
+messages already in session state and times a rerun (script run + delta
+generation), comparing:
+
+- legacy:       one st.markdown per message plus separate style/open/close elements
+                (the old render_chat), every bubble re-formatted on every rerun
+- incremental:  utils.chat_render.render_transcript — one element, bubble HTML
+                cached per message so only new messages are formatted
+
+Usage:
+    python -m scripts.bench_chat_render --sizes 0 25 50 100 200 [--repeat 15] [--json results.json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+
+def legacy_app():
+    import streamlit as st
+    from utils.chat_render import CHAT_CSS, format_message_html
+
+    st.markdown(CHAT_CSS, unsafe_allow_html=True)
+    st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
+    for msg in st.session_state.messages:
+        st.markdown(format_message_html(msg["role"], msg["content"]), unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def incremental_app():
+    import streamlit as st
+    from utils.chat_render import render_transcript
+
+    render_transcript(st.session_state.messages, st.session_state)
+
+
+APPS = {"legacy": legacy_app, "incremental": incremental_app}
+
+
+def make_messages(count):
+    messages = []
+    for i in range(count):
+        if i % 2 == 0:
+            messages.append({"role": "user", "content": f"Question {i}: can you help with my data pipeline?"})
+        else:
+            messages.append({"role": "assistant", "content": f"Answer {i}: " + "We build reliable pipelines. " * 8})
+    return messages
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench(app, count, repeat):
+    at = AppTest.from_function(app, default_timeout=30)
+    at.session_state["messages"] = make_messages(count)
+    at.run()  # first render fills any caches
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "messages": count,
+        "elements": len(at.markdown),
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 25, 50, 100, 200])
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = {name: [bench(app, size, args.repeat) for size in args.sizes] for name, app in APPS.items()}
+
+    print(f"{'messages':>8}  {'mode':<12}{'elements':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for i, size in enumerate(args.sizes):
+        for name in APPS:
+            row = results[name][i]
+            print(f"{size:>8}  {name:<12}{row['elements']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Cold-start benchmark: how long a freshly started server takes to show each page.
+
+For every page and mode it starts a new ``streamlit run`` process (MongoDB
+replaced by scripts/fake_mongo.py, OpenAI pointed at scripts/fake_openai.py),
+opens one browser-like websocket session and records:
+
+- ready_ms:       process spawn until /_stcore/health answers (Streamlit itself)
+- first_load_ms:  first script run of the page, request to script_finished
+- first_reply_ms: Chat only, the first message, sent ``--think-time`` seconds after
+                  the first load (pays for anything the page deferred and has not
+                  warmed up by then; 0 gives the worst case)
+- cpu_ms:         server process CPU time until then (Linux, /proc)
+
+Modes:
+- before:   the pages from a git ref checked out in a temporary worktree
+            (default: the commit before utils/startup.py was added)
+- current:  the working tree, with STARTUP_PROFILE=1; the slowest imports of
+            each page's first run (utils/startup.py) are printed after the table
+
+Each page is measured ``--repeat`` times per mode (new process every time) and
+the median is reported. Linux only. Usage:
+    python -m scripts.bench_cold_start [--repeat 3] [--only chat home] [--think-time 2] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+
+from scripts.bench_about_idle import REPO_ROOT, free_port, process_cpu_seconds
+from scripts.bench_chat_interactions import ASSISTANT_QUESTION, SERVER_BOOTSTRAP, ChatSession
+from scripts.fake_openai import start_in_background
+
+PAGES = {
+    "home": "Home.py",
+    "about": "pages/1_About.py",
+    "contact": "pages/2_Contact.py",
+    "projects": "pages/3_Projects.py",
+    "chat": "pages/_Chat.py",
+}
+TOP_IMPORTS = 5
+
+
+def start_server(tree, script, port, env):
+    """Start ``streamlit run`` for ``script`` in ``tree``; returns (process, ms until healthy)."""
+    cmd = [
+        sys.executable, "-c", SERVER_BOOTSTRAP, script,
+        "--server.headless", "true", "--server.port", str(port),
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc, (time.perf_counter() - start) * 1000
+        except OSError:
+            time.sleep(0.02)
+    proc.kill()
+    raise RuntimeError(f"streamlit server for {script} did not start")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+async def first_session(port, pid, page, think_time):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        session = ChatSession(ws, pid)
+        sample = {"first_load_ms": (await session.load())["wall_ms"]}
+        if page == "chat":
+            await asyncio.sleep(think_time)
+            reply = await session.interact("Talk to me...", chat_input_value=ASSISTANT_QUESTION)
+            sample["first_reply_ms"] = reply["wall_ms"]
+        return sample
+
+
+def measure(tree, page, env, think_time):
+    port = free_port()
+    proc, ready_ms = start_server(tree, PAGES[page], port, env)
+    try:
+        sample = asyncio.run(first_session(port, proc.pid, page, think_time))
+        sample["ready_ms"] = ready_ms
+        sample["cpu_ms"] = process_cpu_seconds(proc.pid) * 1000  # includes the think time's background work
+        return sample
+    finally:
+        stop_server(proc)
+
+
+def run_mode(mode, tree, pages, repeat, think_time, openai_url, profile_path):
+    env = dict(os.environ, PYTHONPATH=tree, OPENAI_API_KEY="bench", ASSISTANT_ID="asst_bench",
+               OPENAI_BASE_URL=openai_url, MONGODB_USERNAME="bench", MONGODB_PASSWORD="bench",
+               MONGODB_HOST="localhost", DB_NAME="bench", COLLECTION="chats")
+    if mode == "current":
+        env.update(STARTUP_PROFILE="1", STARTUP_PROFILE_PATH=profile_path)
+    rows, profiles = [], {}
+    for page in pages:
+        samples = []
+        for _ in range(repeat):
+            samples.append(measure(tree, page, env, think_time))
+            if mode == "current" and os.path.isfile(profile_path):
+                with open(profile_path) as f:
+                    profiles.update(json.load(f))
+                os.remove(profile_path)
+        row = {"page": page, "mode": mode}
+        for metric in ("ready_ms", "first_load_ms", "first_reply_ms", "cpu_ms"):
+            values = [s[metric] for s in samples if metric in s]
+            row[metric] = round(statistics.median(values), 1) if values else "-"
+        rows.append(row)
+    return rows, profiles
+
+
+def baseline_ref():
+    """The commit before utils/startup.py was added (HEAD if it is not committed yet)."""
+    out = subprocess.run(["git", "log", "--reverse", "--format=%H", "--diff-filter=A", "--", "utils/startup.py"],
+                         cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    commits = out.stdout.split()
+    return f"{commits[0]}~1" if commits else "HEAD"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per page and mode")
+    parser.add_argument("--only", nargs="+", choices=list(PAGES), help="pages to measure")
+    parser.add_argument("--think-time", type=float, default=2.0, help="seconds before the first Chat message")
+    parser.add_argument("--baseline-ref", help="git ref of the 'before' pages")
+    parser.add_argument("--modes", nargs="+", default=["before", "current"])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    pages = args.only or list(PAGES)
+
+    openai_server, openai_url = start_in_background(run_latency=0.0, token_delay=0.0)
+    rows, profiles = [], {}
+    tmp = tempfile.mkdtemp(prefix="bench_cold_start_")
+    worktree = os.path.join(tmp, "before")
+    try:
+        for mode in args.modes:
+            tree = REPO_ROOT
+            if mode == "before":
+                ref = args.baseline_ref or baseline_ref()
+                subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], cwd=REPO_ROOT,
+                               capture_output=True, check=True)
+                tree = worktree
+            print(f"measuring {mode} ({args.repeat} cold starts per page)...", flush=True)
+            mode_rows, mode_profiles = run_mode(mode, tree, pages, args.repeat, args.think_time, openai_url,
+                                                os.path.join(tmp, "startup.json"))
+            rows.extend(mode_rows)
+            profiles.update(mode_profiles)
+    finally:
+        openai_server.shutdown()
+        if os.path.isdir(worktree):
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=REPO_ROOT, capture_output=True)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    columns = list(rows[0])
+    print("".join(f"{c:>16}" for c in columns))
+    for row in sorted(rows, key=lambda r: (pages.index(r["page"]), r["mode"])):
+        print("".join(f"{row[c]:>16}" for c in columns))
+
+    if profiles:
+        print("\nslowest imports of each page's first run (current, last cold start, ms):")
+        for page in pages:
+            report = profiles.get(page)
+            if report:
+                slowest = ", ".join(f"{name} {ms}" for name, ms in list(report["imports_ms"].items())[:TOP_IMPORTS])
+                print(f"  {page:<9} imports {report['import_ms']} of {report['first_run_ms']}: {slowest or '-'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows, "profiles": profiles}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark: image bytes a visitor downloads per page, first visit vs. repeat visit.
+
+Starts a real ``streamlit run Home.py`` server (MongoDB replaced by
+scripts/fake_mongo.py, OpenAI pointed at scripts/fake_openai.py), loads each
+page in a browser-like websocket session, collects every image it references
+(st.image, the favicon, <img> / CSS url() in markdown) and fetches the ones
+served over HTTP. A second session then loads the page again with a browser
+cache that keeps any response it may reuse (Cache-Control max-age/immutable,
+or heuristically fresh through Last-Modified) and re-downloads the rest.
+
+- ws_kb:            websocket bytes for the page run (includes inlined data URIs)
+- http_images:      images fetched over HTTP on the visit
+- image_kb:         bytes of those images
+- total_kb:         ws_kb + image_kb
+
+Modes:
+- before:   a git ref checked out in a temporary worktree
+            (default: the commit before .streamlit/config.toml was added)
+- current:  the working tree
+
+Responses from /app/static/ carry Last-Modified, so browsers reuse them
+heuristically; a CDN or reverse proxy can mark them immutable (their names are
+content-hashed). Media-endpoint responses carry no validators and are fetched
+again. Linux only. Usage:
+    python -m scripts.bench_image_transfer [--only home about] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from scripts.bench_about_idle import REPO_ROOT, free_port
+from scripts.bench_cold_start import start_server, stop_server
+from scripts.fake_openai import start_in_background
+
+PAGES = {
+    "home": "",
+    "about": "About",
+    "contact": "Contact",
+    "projects": "Projects",
+    "chat": "Chat",
+}
+# src='...' / url('...') targets in markdown bodies
+IMAGE_REF = re.compile(r"""(?:src=|url\()['"]([^'"]+)['"]""")
+
+
+async def page_images(port, page_name):
+    """Load the page once; returns (websocket bytes, [image URL or data URI, ...])."""
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_name = page_name
+        await ws.send(msg.SerializeToString())
+        size, images = 0, []
+        while True:
+            data = await asyncio.wait_for(ws.recv(), 60)
+            size += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "page_config_changed" and forward.page_config_changed.favicon:
+                images.append(forward.page_config_changed.favicon)
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "imgs":
+                    images.extend(img.url for img in element.imgs.imgs)
+                elif element_type == "markdown":
+                    images.extend(IMAGE_REF.findall(element.markdown.body))
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return size, images
+
+
+def reusable(headers):
+    """Whether a browser may reuse a cached response without downloading it again."""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return False
+    return "max-age" in cache_control or "immutable" in cache_control or "Last-Modified" in headers
+
+
+def visit(port, page_name, cache):
+    ws_bytes, images = asyncio.run(page_images(port, page_name))
+    fetched = image_bytes = 0
+    for url in images:
+        if not url.startswith("/") or url in cache:
+            continue  # inlined (counted in ws_bytes), external, emoji, or reused from the cache
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{url}") as response:
+            image_bytes += len(response.read())
+            fetched += 1
+            if reusable(response.headers):
+                cache[url] = True
+    return {"ws_kb": round(ws_bytes / 1000, 1), "http_images": fetched, "image_kb": round(image_bytes / 1000, 1),
+            "total_kb": round((ws_bytes + image_bytes) / 1000, 1)}
+
+
+def run_mode(mode, tree, pages, openai_url):
+    env = dict(os.environ, PYTHONPATH=tree, OPENAI_API_KEY="bench", ASSISTANT_ID="asst_bench",
+               OPENAI_BASE_URL=openai_url, MONGODB_USERNAME="bench", MONGODB_PASSWORD="bench",
+               MONGODB_HOST="localhost", DB_NAME="bench", COLLECTION="chats")
+    port = free_port()
+    proc, _ = start_server(tree, "Home.py", port, env)
+    rows = []
+    try:
+        for page in pages:
+            cache = {}
+            for visit_name in ("first", "repeat"):
+                rows.append({"page": page, "mode": mode, "visit": visit_name, **visit(port, PAGES[page], cache)})
+    finally:
+        stop_server(proc)
+    return rows
+
+
+def baseline_ref():
+    """The commit before .streamlit/config.toml was added (HEAD if it is not committed yet)."""
+    out = subprocess.run(["git", "log", "--reverse", "--format=%H", "--diff-filter=A", "--", ".streamlit/config.toml"],
+                         cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    commits = out.stdout.split()
+    return f"{commits[0]}~1" if commits else "HEAD"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(PAGES), help="pages to measure")
+    parser.add_argument("--baseline-ref", help="git ref of the 'before' pages")
+    parser.add_argument("--modes", nargs="+", default=["before", "current"])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    pages = args.only or list(PAGES)
+
+    openai_server, openai_url = start_in_background(run_latency=0.0, token_delay=0.0)
+    rows = []
+    tmp = tempfile.mkdtemp(prefix="bench_image_transfer_")
+    worktree = os.path.join(tmp, "before")
+    try:
+        for mode in args.modes:
+            tree = REPO_ROOT
+            if mode == "before":
+                ref = args.baseline_ref or baseline_ref()
+                subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], cwd=REPO_ROOT,
+                               capture_output=True, check=True)
+                tree = worktree
+            print(f"measuring {mode}...", flush=True)
+            rows.extend(run_mode(mode, tree, pages, openai_url))
+    finally:
+        openai_server.shutdown()
+        if os.path.isdir(worktree):
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=REPO_ROOT, capture_output=True)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    columns = list(rows[0])
+    print("".join(f"{c:>13}" for c in columns))
+    for row in sorted(rows, key=lambda r: (pages.index(r["page"]), r["mode"])):
+        print("".join(f"{row[c]:>13}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
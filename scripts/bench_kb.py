@@ -0,0 +1,136 @@
+"""
+Benchmark: knowledge-base index vs. re-parsing kb.json on every rerun.
+
+Generates synthetic kb.json files of increasing size (words drawn from the real
+KB) and measures, per size:
+
+- reparse:  json.load + linear ``next(...)`` category scan (the old render_kb path)
+- cached:   get_kb_index() on an unchanged file + dict category lookup
+- build:    one-off index build after the file changes
+- search:   ranked KBIndex.search over a fixed query set (p50 / p95)
+- scan:     naive search that tokenizes and scores every entry per query
+
+Usage:
+    python -m scripts.bench_kb --sizes 15 1000 5000 20000 [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from utils.kb import KB_PATH, get_kb_index, tokenize
+
+QUERIES = [
+    "can you fix my data pipeline",
+    "dashboard tools",
+    "cloud data warehouse cost",
+    "real time streaming alerts",
+    "how do I book a consultation",
+    "data governance lineage compliance",
+]
+
+
+def synthetic_kb(size, seed=7):
+    """Build a kb.json-shaped dict with ``size`` entries spread over 5 categories."""
+    with open(KB_PATH, "r") as f:
+        real = json.load(f)
+    words = sorted({w for s in real["knowledge_base"] for e in s["entries"]
+                    for w in (e["title"] + " " + e["description"]).split()})
+    rng = random.Random(seed)
+    categories = [f"Category {i}" for i in range(5)]
+    sections = {c: [] for c in categories}
+    for i in range(size):
+        sections[categories[i % 5]].append({
+            "title": " ".join(rng.choices(words, k=5)) + f" #{i}",
+            "description": " ".join(rng.choices(words, k=40)),
+        })
+    return {"company": "bench", "knowledge_base": [{"category": c, "entries": e} for c, e in sections.items()]}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def naive_search(kb, query):
+    terms = set(tokenize(query))
+    scored = []
+    for section in kb["knowledge_base"]:
+        for entry in section["entries"]:
+            overlap = len(terms & set(tokenize(entry["title"] + " " + entry["description"])))
+            if overlap:
+                scored.append((overlap, entry["title"]))
+    return sorted(scored, reverse=True)[:8]
+
+
+def bench_size(size, path, repeat):
+    kb = synthetic_kb(size)
+    with open(path, "w") as f:
+        json.dump(kb, f)
+    category = kb["knowledge_base"][-1]["category"]
+
+    def reparse():
+        with open(path, "r") as f:
+            data = json.load(f)
+        next((s for s in data["knowledge_base"] if s["category"] == category), None)
+
+    build_start = time.perf_counter()
+    index = get_kb_index(path)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    reparse_ms = timed(reparse, repeat)
+    cached_ms = timed(lambda: get_kb_index(path).entries(category), repeat)
+    search_ms = timed(lambda: [index.search(q) for q in QUERIES], repeat)
+    search_ms = [ms / len(QUERIES) for ms in search_ms]
+    scan_ms = timed(lambda: [naive_search(kb, q) for q in QUERIES], max(1, repeat // 10))
+    scan_ms = [ms / len(QUERIES) for ms in scan_ms]
+
+    return {
+        "entries": size,
+        "build_ms": round(build_ms, 2),
+        "reparse_p50_ms": round(statistics.median(reparse_ms), 3),
+        "cached_p50_ms": round(statistics.median(cached_ms), 4),
+        "search_p50_ms": round(statistics.median(search_ms), 3),
+        "search_p95_ms": round(percentile(search_ms, 95), 3),
+        "scan_p50_ms": round(statistics.median(scan_ms), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            # A fresh path per size so the index cache always sees a new file
+            rows.append(bench_size(size, os.path.join(tmp, f"kb_{size}.json"), args.repeat))
+
+    columns = list(rows[0])
+    print(" ".join(f"{c:>15}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>15}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: per-turn cost of fetching the assistant reply.
+
+Drives a 50-turn conversation against the local fake Assistants API and, after
+every run, measures the reply fetch two ways:
+
+- full:        messages.list over the whole thread, filtered and sorted in Python (old path)
+- incremental: messages.list filtered on run_id, newest first, small page (current path)
+
+Reports request latency and response payload size per turn. The incremental
+numbers should stay flat while the full-thread numbers grow with the conversation.
+
+Usage:
+    python -m scripts.bench_message_fetch --turns 50 [--json results.json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import warnings
+
+from openai import OpenAI
+
+from scripts.fake_openai import start_in_background
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+FETCH_LIMIT = 5
+
+
+def fetch_full(client, thread_id, run_id):
+    raw = client.beta.threads.messages.with_raw_response.list(thread_id=thread_id, limit=100)
+    messages = raw.parse()
+    assistant_messages = [m for m in messages.data if m.role == "assistant"]
+    assistant_messages.sort(key=lambda m: m.created_at, reverse=True)
+    return len(raw.http_response.content)
+
+
+def fetch_incremental(client, thread_id, run_id):
+    raw = client.beta.threads.messages.with_raw_response.list(
+        thread_id=thread_id, run_id=run_id, order="desc", limit=FETCH_LIMIT
+    )
+    raw.parse()
+    return len(raw.http_response.content)
+
+
+def timed(fn, *args, repeat=5):
+    """Return (median seconds, payload bytes) over ``repeat`` calls."""
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), size
+
+
+def run(turns):
+    server, base_url = start_in_background()
+    client = OpenAI(api_key="bench", base_url=base_url)
+    thread = client.beta.threads.create()
+    rows = []
+
+    for turn in range(1, turns + 1):
+        client.beta.threads.messages.create(thread_id=thread.id, role="user", content=f"question {turn}")
+        run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id="asst_bench")
+        client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)  # completes the run
+
+        full_s, full_bytes = timed(fetch_full, client, thread.id, run.id)
+        inc_s, inc_bytes = timed(fetch_incremental, client, thread.id, run.id)
+        rows.append({
+            "turn": turn,
+            "full_ms": round(full_s * 1000, 3),
+            "full_bytes": full_bytes,
+            "incremental_ms": round(inc_s * 1000, 3),
+            "incremental_bytes": inc_bytes,
+        })
+
+    server.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--json", help="write per-turn results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.turns)
+
+    print(f"{'turn':>5} {'full ms':>9} {'full bytes':>11} {'incr ms':>9} {'incr bytes':>11}")
+    for row in rows:
+        if row["turn"] in (1, 2, 5) or row["turn"] % 10 == 0:
+            print(f"{row['turn']:>5} {row['full_ms']:>9.2f} {row['full_bytes']:>11} "
+                  f"{row['incremental_ms']:>9.2f} {row['incremental_bytes']:>11}")
+
+    first, last = rows[0], rows[-1]
+    print(f"\nfull-thread bytes grew x{last['full_bytes'] / first['full_bytes']:.1f}, "
+          f"incremental bytes x{last['incremental_bytes'] / first['incremental_bytes']:.1f} "
+          f"over {len(rows)} turns")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Headless per-page rerun benchmark suite.
+
+Runs each page under Streamlit's AppTest harness with the external services
+replaced in-process: ``openai.OpenAI`` by scripts/stub_openai.StubOpenAI and
+``pymongo.MongoClient`` by the mongomock-backed scripts/fake_mongo.FakeMongoClient,
+so the Chat page's get_openai_client / get_mongo_collection build stubs.
+
+For every scenario it reports:
+
+- p50_ms / p95_ms:        time of the measured step (interaction + rerun)
+- alloc_kb / peak_kb:     p50 net and peak Python allocations per step (tracemalloc, separate pass)
+- openai_calls / mongo_calls: external calls made by the measured steps (by endpoint in the JSON)
+
+Scenarios:
+    home:     first_load, rerun, kb_category_switch, kb_search
+    about:    first_load, rerun
+    projects: first_load, rerun
+    chat:     first_load, turn (20-turn chat, one sample per turn), rerun_20_turns, end_and_rate
+
+"first_load" is a new session on a warm process (shared resources already built).
+
+Usage:
+    python -m scripts.bench_pages [--repeat 10] [--only chat home] [--json results.json]
+    python -m scripts.bench_pages --json new.json --compare old.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+import warnings
+from unittest import mock
+
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+from scripts.fake_mongo import FakeMongoClient
+from scripts.stub_openai import StubOpenAI
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    "home": "Home.py",
+    "about": "pages/1_About.py",
+    "projects": "pages/3_Projects.py",
+    "chat": "pages/_Chat.py",
+}
+CHAT_TURNS = 20
+CHAT_QUESTIONS = [
+    "hi there",
+    "Do you build dashboards?",
+    "what's your experience with data pipelines in banking",
+    "How much does a consultation cost?",
+    "can you help us move to the cloud",
+]
+KB_QUERIES = ["dashboard", "data pipeline cost", "book a consultation"]
+BENCH_ENV = {
+    "OPENAI_API_KEY": "bench", "ASSISTANT_ID": "asst_bench",
+    "MONGODB_USERNAME": "bench", "MONGODB_PASSWORD": "bench", "MONGODB_HOST": "localhost",
+    "DB_NAME": "bench", "COLLECTION": "chats",
+    "MONGO_FLUSH_INTERVAL": "0.05",  # so writes land before external calls are counted
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def new_app(page):
+    return AppTest.from_file(os.path.join(REPO_ROOT, PAGES[page]), default_timeout=30)
+
+
+# === Scenarios ===
+# Each scenario takes (measure, repeat) and calls measure(action) once per sample.
+
+def first_load(page):
+    def scenario(measure, repeat):
+        for _ in range(repeat):
+            at = new_app(page)
+            measure(at.run)
+    return scenario
+
+
+def rerun(page):
+    def scenario(measure, repeat):
+        at = new_app(page).run()
+        for _ in range(repeat):
+            measure(at.run)
+    return scenario
+
+
+def home_kb_category_switch(measure, repeat):
+    at = new_app("home").run()
+    categories = [b.label for b in at.button]
+    for i in range(repeat):
+        button = next(b for b in at.button if b.label == categories[i % len(categories)])
+        measure(button.click().run)
+
+
+def home_kb_search(measure, repeat):
+    at = new_app("home").run()
+    for i in range(repeat):
+        measure(at.text_input(key="kb_query").set_value(KB_QUERIES[i % len(KB_QUERIES)]).run)
+
+
+def chat_turns(at, measure, turns):
+    for i in range(turns):
+        measure(at.chat_input[0].set_value(f"{CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]} ({i})").run)
+
+
+def chat_turn(measure, repeat):
+    chat_turns(new_app("chat").run(), measure, CHAT_TURNS)
+
+
+def chat_rerun_20_turns(measure, repeat):
+    at = new_app("chat").run()
+    chat_turns(at, lambda action: action(), CHAT_TURNS)
+    for _ in range(repeat):
+        measure(at.run)
+
+
+def chat_end_and_rate(measure, repeat):
+    for _ in range(repeat):
+        at = new_app("chat").run()
+        chat_turns(at, lambda action: action(), 2)
+        measure(at.button(key="end_button").click().run)
+        measure(at.button(key="rate_button").click().run)
+        measure(at.radio(key="likert_rating").set_value(4).run)
+
+
+SCENARIOS = [
+    ("home", "first_load", first_load("home")),
+    ("home", "rerun", rerun("home")),
+    ("home", "kb_category_switch", home_kb_category_switch),
+    ("home", "kb_search", home_kb_search),
+    ("about", "first_load", first_load("about")),
+    ("about", "rerun", rerun("about")),
+    ("projects", "first_load", first_load("projects")),
+    ("projects", "rerun", rerun("projects")),
+    ("chat", "first_load", first_load("chat")),
+    ("chat", "turn", chat_turn),
+    ("chat", "rerun_20_turns", chat_rerun_20_turns),
+    ("chat", "end_and_rate", chat_end_and_rate),
+]
+
+
+# === Measurement ===
+def mongo_call_counts(mongo):
+    counts = {}
+    for name in mongo[BENCH_ENV["DB_NAME"]].list_collection_names():
+        for call, count in mongo[BENCH_ENV["DB_NAME"]][name].call_counts.items():
+            counts[call] = counts.get(call, 0) + count
+    return counts
+
+
+def diff_counts(after, before):
+    return {k: v - before.get(k, 0) for k, v in after.items() if v - before.get(k, 0)}
+
+
+def run_scenario(scenario, repeat, stub, mongo):
+    """Latency pass (with external call counting), then an allocation pass under tracemalloc."""
+    timings = []
+    openai_calls, mongo_calls = {}, {}
+    flush_wait = 4 * float(BENCH_ENV["MONGO_FLUSH_INTERVAL"])
+
+    def timed(action):
+        time.sleep(flush_wait)  # writes queued by unmeasured setup land before the snapshot
+        openai_before, mongo_before = dict(stub.call_counts), mongo_call_counts(mongo)
+        start = time.perf_counter()
+        action()
+        timings.append((time.perf_counter() - start) * 1000)
+        time.sleep(flush_wait)  # let the write-behind queue flush what this step queued
+        # Only calls made by measured steps count, not scenario setup
+        for total, delta in ((openai_calls, diff_counts(stub.call_counts, openai_before)),
+                             (mongo_calls, diff_counts(mongo_call_counts(mongo), mongo_before))):
+            for name, count in delta.items():
+                total[name] = total.get(name, 0) + count
+
+    scenario(timed, repeat)
+
+    net, peak = [], []
+
+    def traced(action):
+        tracemalloc.reset_peak()
+        start_size, _ = tracemalloc.get_traced_memory()
+        action()
+        size, peak_size = tracemalloc.get_traced_memory()
+        net.append((size - start_size) / 1024)
+        peak.append((peak_size - start_size) / 1024)
+
+    tracemalloc.start()
+    try:
+        scenario(traced, repeat)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "samples": len(timings),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "alloc_kb": round(statistics.median(net), 1),
+        "peak_kb": round(statistics.median(peak), 1),
+        "openai_calls": sum(openai_calls.values()),
+        "mongo_calls": sum(mongo_calls.values()),
+        "openai_by_endpoint": openai_calls,
+        "mongo_by_endpoint": mongo_calls,
+    }
+
+
+def git_commit():
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+    return out.stdout.strip() or None
+
+
+def print_comparison(rows, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["page"], r["scenario"]): r for r in json.load(f)["scenarios"]}
+    print(f"\nvs. {baseline_path}")
+    print(f"{'page':<10}{'scenario':<20}{'p50 before':>12}{'p50 now':>10}{'change':>9}")
+    for row in rows:
+        old = baseline.get((row["page"], row["scenario"]))
+        if not old:
+            continue
+        change = (row["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+        print(f"{row['page']:<10}{row['scenario']:<20}{old['p50_ms']:>12}{row['p50_ms']:>10}{change:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="samples per scenario (chat turn: always 20)")
+    parser.add_argument("--only", nargs="+", choices=sorted(PAGES), help="pages to benchmark")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare p50s against")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    # AppTest logs a "missing ScriptRunContext" warning whenever session state is touched between runs
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    os.chdir(REPO_ROOT)  # pages use repo-relative asset paths
+    os.environ.update(BENCH_ENV)
+
+    stub, mongo = StubOpenAI(), FakeMongoClient()
+    rows = []
+    with mock.patch("openai.OpenAI", lambda *a, **k: stub), mock.patch("pymongo.MongoClient", lambda *a, **k: mongo):
+        # Build the process-wide resources once so every scenario measures a warm process
+        new_app("chat").run()
+        new_app("home").run()
+        for page, name, scenario in SCENARIOS:
+            if args.only and page not in args.only:
+                continue
+            result = run_scenario(scenario, args.repeat, stub, mongo)
+            rows.append(dict(page=page, scenario=name, **result))
+            print(f"{page:<10}{name:<20}p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                  f"alloc {result['alloc_kb']:>8} KB  peak {result['peak_kb']:>8} KB  "
+                  f"openai {result['openai_calls']:>3}  mongo {result['mongo_calls']:>3}", flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "streamlit": streamlit.__version__,
+                "repeat": args.repeat,
+                "scenarios": rows,
+            }, f, indent=2)
+        print(f"Wrote {args.json}")
+
+    if args.compare:
+        print_comparison(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: per-session memory held by the chat transcript as the conversation grows.
+
+Replays conversations of 10-1000 turns into a session-state dict the way the
+Chat page does (append the user message and the reply, render the transcript,
+save) and measures what stays allocated with tracemalloc, comparing:
+
+- unbounded:  every message kept as a dict with an ISO timestamp string, and
+              the bubble HTML of every message in the render cache (the old page)
+- window:     ChatMessage records, trimmed to the last CHAT_WINDOW_MESSAGES
+              once saved (utils.transcript); the render cache follows the window
+
+Messages are sized like real ones (short questions, replies of a few hundred
+characters). Usage:
+    python -m scripts.bench_transcript_memory --turns 10 100 1000 [--window 40] [--json results.json]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils.chat_render import transcript_html
+from utils.transcript import ChatMessage, message_count, trim_transcript
+
+QUESTION = "Question {i}: can you help us build a data pipeline for our sales team?"
+REPLY = "Answer {i}: " + "We build reliable, well-tested pipelines and dashboards for growing teams. " * 7
+
+
+def replay_unbounded(state, turns):
+    for i in range(turns):
+        state["messages"].append({"role": "user", "content": QUESTION.format(i=i),
+                                  "created_at": datetime.now().isoformat()})
+        state["messages"].append({"role": "assistant", "content": REPLY.format(i=i),
+                                  "created_at": datetime.now().isoformat(), "source": "assistant",
+                                  "kb_score": 0.42, "latency_ms": 812.5, "prompt_tokens": 950,
+                                  "completion_tokens": 120})
+        transcript_html(state["messages"], state)
+
+
+def replay_window(state, turns, window):
+    for i in range(turns):
+        state["messages"].append(ChatMessage("user", QUESTION.format(i=i)))
+        state["messages"].append(ChatMessage("assistant", REPLY.format(i=i), source="assistant", kb_score=0.42,
+                                             latency_ms=812.5, prompt_tokens=950, completion_tokens=120))
+        transcript_html(state["messages"], state, state["messages_offset"])
+        # Everything is saved by the end of the run, so the floor is the whole conversation
+        trim_transcript(state, window, message_count(state))
+
+
+def measure(mode, turns, window):
+    """Bytes still allocated for one session's transcript state after ``turns`` turns, and the replay time."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    state = {"messages": [], "messages_offset": 0, "earlier_messages": []}
+    if mode == "unbounded":
+        replay_unbounded(state, turns)
+    else:
+        replay_window(state, turns, window)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "turns": turns,
+        "messages_in_memory": len(state["messages"]),
+        "kb_per_session": round(held / 1024, 1),
+        "replay_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000], help="conversation lengths")
+    parser.add_argument("--window", type=int, default=40, help="CHAT_WINDOW_MESSAGES")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rows = [measure(mode, turns, args.window) for turns in args.turns for mode in ("unbounded", "window")]
+
+    print(f"{'turns':>6}  {'mode':<11}{'in memory':>10}{'KB/session':>12}{'replay ms':>11}")
+    for row in rows:
+        print(f"{row['turns']:>6}  {row['mode']:<11}{row['messages_in_memory']:>10}{row['kb_per_session']:>12}"
+              f"{row['replay_ms']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
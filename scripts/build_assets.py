@@ -0,0 +1,129 @@
+"""
+Build-time image optimization.
+
+Generates resized derivatives of the images shown by the pages, at the sizes
+they are displayed, under content-hashed names in ``static/build/``, and writes
+``static/build/manifest.json`` mapping each original and display width to its
+derivative. Pages resolve images through that manifest (utils/assets.py) and
+fall back to the original when no derivative exists.
+
+``static/`` is published by Streamlit's static file serving, so pages link to
+the derivatives by URL (``/app/static/build/<name>``). A changed image gets a
+new name, hence a new URL, so browsers never see a stale cached copy.
+
+Derivatives are rendered at 2x the CSS display width so they stay sharp on
+high-DPI screens. Re-run after adding or changing images:
+
+    python -m scripts.build_assets
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from utils.assets import BUILD_DIR, MANIFEST_PATH, manifest_key
+
+DENSITY = 2
+WEBP_QUALITY = 80
+
+EVENT_PHOTO_DIR = "assets/photos/event_photo"
+PROJECTS_JSON = "assets/docs/projects.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def derivative_specs():
+    """
+    List (source path, display width, format) for every image a page shows.
+
+    Widths mirror the pages: favicon (32), Home logo (250), Chat header logo (100),
+    Contact photo (250), About event slideshow (350) and Projects thumbnails (200).
+    """
+    specs = [
+        ("assets/icons/favicon.png", 32, "png"),
+        ("assets/icons/logo.png", 250, "webp"),
+        ("assets/icons/logo.png", 100, "webp"),
+        ("assets/photos/about_photo/photo_working.jpeg", 250, "webp"),
+    ]
+    for path in sorted(glob.glob(os.path.join(EVENT_PHOTO_DIR, "*"))):
+        if Path(path).suffix.lower() in IMAGE_EXTENSIONS:
+            specs.append((path, 350, "webp"))
+    with open(PROJECTS_JSON, "r") as f:
+        for project in json.load(f):
+            if project.get("img") and Path(project["img"]).is_file():
+                specs.append((project["img"], 200, "webp"))
+    return specs
+
+
+def render_derivative(source, width, fmt):
+    """Return encoded bytes of ``source`` resized to ``width`` CSS pixels (never upscaled)."""
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        target = min(width * DENSITY, img.width)
+        if target < img.width:
+            height = round(img.height * target / img.width)
+            img = img.resize((target, height), Image.LANCZOS)
+        if fmt == "webp":
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        buffer = io.BytesIO()
+        if fmt == "webp":
+            img.save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+        else:
+            img.save(buffer, "PNG", optimize=True)
+        return buffer.getvalue()
+
+
+def build(out_dir=BUILD_DIR, manifest_path=MANIFEST_PATH, verbose=True):
+    """
+    Generate all derivatives and the manifest, removing derivatives no longer referenced.
+
+    Returns:
+        dict: the manifest written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    total_in = total_out = 0
+
+    for source, width, fmt in derivative_specs():
+        data = render_derivative(source, width, fmt)
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        name = f"{Path(source).stem.replace(' ', '_')}.{width}w.{digest}.{fmt}"
+        target = os.path.join(out_dir, name)
+        if not os.path.exists(target):
+            with open(target, "wb") as f:
+                f.write(data)
+        manifest[manifest_key(source, width)] = target.replace(os.sep, "/")
+
+        total_in += os.path.getsize(source)
+        total_out += len(data)
+        if verbose:
+            print(f"{os.path.getsize(source) // 1024:>6} KB -> {len(data) // 1024:>4} KB  {target}")
+
+    referenced = {os.path.basename(p) for p in manifest.values()}
+    for name in os.listdir(out_dir):
+        if name not in referenced and name != os.path.basename(manifest_path):
+            os.remove(os.path.join(out_dir, name))
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if verbose:
+        print(f"\n{len(manifest)} derivatives: {total_in / 1e6:.1f} MB of originals -> {total_out / 1e6:.2f} MB")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out-dir", default=BUILD_DIR)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    args = parser.parse_args()
+    build(args.out_dir, args.manifest)
+
+
+if __name__ == "__main__":
+    main()
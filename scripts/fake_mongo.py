@@ -0,0 +1,80 @@
+"""
+Local MongoDB stand-in for benchmarks and load tests.
+
+Wraps ``mongomock`` (``pip install -r requirements-dev.txt``) so it accepts the
+same calls the app makes against a real server. mongomock's ``bulk_write``
+does not understand the operation objects of recent pymongo releases, so bulk
+updates are applied one by one through ``update_one``.
+"""
+
+import threading
+
+import mongomock
+from pymongo import UpdateOne
+from pymongo.results import BulkWriteResult
+
+
+class FakeCollection(mongomock.collection.Collection):
+    """mongomock collection with a pymongo-compatible ``bulk_write`` and call counters."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.call_counts = {}
+        self._count_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._count_lock:
+            self.call_counts[name] = self.call_counts.get(name, 0) + 1
+
+    def insert_one(self, *args, **kwargs):
+        self._count("insert_one")
+        return super().insert_one(*args, **kwargs)
+
+    def update_one(self, *args, **kwargs):
+        self._count("update_one")
+        return super().update_one(*args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        self._count("find_one")
+        return super().find_one(*args, **kwargs)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        self._count("bulk_write")
+        matched = modified = upserted = 0
+        upserted_ids = {}
+        for index, op in enumerate(requests):
+            if not isinstance(op, UpdateOne):
+                raise NotImplementedError(f"FakeCollection.bulk_write does not support {type(op).__name__}")
+            result = super().update_one(op._filter, op._doc, upsert=op._upsert)
+            matched += result.matched_count
+            modified += result.modified_count
+            if result.upserted_id is not None:
+                upserted += 1
+                upserted_ids[index] = result.upserted_id
+        return BulkWriteResult({
+            "nInserted": 0, "nUpserted": upserted, "nMatched": matched, "nModified": modified,
+            "nRemoved": 0, "upserted": [{"index": i, "_id": _id} for i, _id in upserted_ids.items()],
+            "writeErrors": [], "writeConcernErrors": [],
+        }, acknowledged=True)
+
+
+class FakeDatabase(mongomock.database.Database):
+    def get_collection(self, name, *args, **kwargs):
+        collection = super().get_collection(name, *args, **kwargs)
+        if not isinstance(collection, FakeCollection):
+            collection.__class__ = FakeCollection
+            collection.call_counts = {}
+            collection._count_lock = threading.Lock()
+        return collection
+
+
+class FakeMongoClient(mongomock.MongoClient):
+    """Drop-in for ``pymongo.MongoClient``; ignores the URI and keeps data in memory."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+    def get_database(self, name=None, *args, **kwargs):
+        database = super().get_database(name, *args, **kwargs)
+        database.__class__ = FakeDatabase
+        return database
@@ -0,0 +1,487 @@
+"""
+Local stand-in for the OpenAI Assistants and Chat Completions APIs.
+
+Implements just enough of the threads / messages / runs endpoints for the chat
+page to work offline, including the server-sent event stream used when a run is
+created with ``stream=True``, plus ``/v1/chat/completions`` (plain and streamed)
+for CHAT_BACKEND=completions. ``--request-latency`` adds a fixed delay to every
+request to stand in for the network round trip to OpenAI. ``--rate-limit`` caps
+requests per second: responses carry ``x-ratelimit-*`` headers and requests over
+the limit get a 429 with ``retry-after-ms``, like the real API.
+
+Usage:
+    python -m scripts.fake_openai --port 8765 --token-delay 0.05 [--request-latency 0.1]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run Home.py
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_REPLY = (
+    "Thanks for reaching out! You asked: \"{question}\". "
+    "You can read more on the [blog](https://medium.com/@brokeTechBro)【4:0†kb.json】."
+)
+
+# Words of the user message quoted back by chat completions
+QUOTE_WORDS = 40
+
+_ids = itertools.count(1)
+
+
+def _new_id(prefix):
+    return f"{prefix}_{next(_ids):08d}"
+
+
+def _text_content(value):
+    return [{"type": "text", "text": {"value": value, "annotations": []}}]
+
+
+def _content_text(content):
+    """Message content as sent by the SDK (a string or a list of text parts) as plain text."""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content)
+    return content
+
+
+def _tokenize(text):
+    """Split text into word-sized chunks, keeping whitespace attached."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeAssistantsState:
+    """In-memory threads, messages and runs shared by all request handlers."""
+
+    def __init__(self, reply_template=DEFAULT_REPLY, run_latency=0.0, token_delay=0.0, request_latency=0.0,
+                 rate_limit=0):
+        self.reply_template = reply_template
+        self.run_latency = run_latency
+        self.token_delay = token_delay
+        self.request_latency = request_latency
+        self.rate_limit = rate_limit  # requests per one-second window; 0 = unlimited
+        self.window_start = time.monotonic()
+        self.window_requests = 0
+        self.rate_limited_count = 0
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.prompt_tokens = 0  # totals over every run and completion, to compare context strategies
+        self.completion_tokens = 0
+
+    # === Threads ===
+    def create_thread(self):
+        thread = {"id": _new_id("thread"), "object": "thread", "created_at": int(time.time()),
+                  "metadata": {}, "tool_resources": {}}
+        with self.lock:
+            self.threads[thread["id"]] = {"thread": thread, "messages": [], "runs": {}}
+        return thread
+
+    def get_thread(self, thread_id):
+        return self.threads.get(thread_id)
+
+    # === Messages ===
+    def add_message(self, thread_id, role, content, run_id=None, assistant_id=None):
+        message = {
+            "id": _new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": _text_content(content),
+            "run_id": run_id,
+            "assistant_id": assistant_id,
+            "attachments": [],
+            "metadata": {},
+            "status": "completed",
+        }
+        with self.lock:
+            self.threads[thread_id]["messages"].append(message)
+        return message
+
+    def list_messages(self, thread_id, order="desc", limit=20, after=None, before=None, run_id=None):
+        messages = list(self.threads[thread_id]["messages"])
+        if run_id:
+            messages = [m for m in messages if m["run_id"] == run_id]
+        if order == "desc":
+            messages.reverse()
+        ids = [m["id"] for m in messages]
+        if after in ids:
+            messages = messages[ids.index(after) + 1:]
+        elif before in ids:
+            messages = messages[:ids.index(before)]
+        page = messages[:limit]
+        return {
+            "object": "list",
+            "data": page,
+            "first_id": page[0]["id"] if page else None,
+            "last_id": page[-1]["id"] if page else None,
+            "has_more": len(messages) > limit,
+        }
+
+    # === Runs ===
+    def create_run(self, thread_id, assistant_id, metadata=None, truncation_strategy=None, additional_instructions=None,
+                   additional_messages=None):
+        for message in additional_messages or []:
+            self.add_message(thread_id, message.get("role", "user"), _content_text(message.get("content", "")))
+        run = {
+            "id": _new_id("run"),
+            "object": "thread.run",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "assistant_id": assistant_id,
+            "status": "queued",
+            "instructions": "",
+            "model": "gpt-4o",
+            "tools": [],
+            "metadata": metadata or {},
+            "truncation_strategy": truncation_strategy or {"type": "auto", "last_messages": None},
+            "additional_instructions": additional_instructions,
+            "parallel_tool_calls": True,
+            "usage": None,
+        }
+        with self.lock:
+            self.threads[thread_id]["runs"][run["id"]] = {"run": run, "started": time.monotonic()}
+        return run
+
+    def reply_for(self, thread_id):
+        user_messages = [m for m in self.threads[thread_id]["messages"] if m["role"] == "user"]
+        question = user_messages[-1]["content"][0]["text"]["value"] if user_messages else ""
+        return self.reply_template.format(question=question)
+
+    def complete_run(self, thread_id, run_id, reply):
+        entry = self.threads[thread_id]["runs"][run_id]
+        run = entry["run"]
+        if run["status"] != "completed":
+            # Prompt = the messages the run read (honouring last_messages truncation) + extra instructions
+            read = self.threads[thread_id]["messages"]
+            last_messages = run["truncation_strategy"].get("last_messages")
+            if run["truncation_strategy"].get("type") == "last_messages" and last_messages:
+                read = read[-last_messages:]
+            prompt_tokens = sum(len(_tokenize(m["content"][0]["text"]["value"])) for m in read)
+            prompt_tokens += len(_tokenize(run["additional_instructions"] or ""))
+            completion_tokens = len(_tokenize(reply))
+            self.count_tokens(prompt_tokens, completion_tokens)
+            self.add_message(thread_id, "assistant", reply, run_id=run_id, assistant_id=run["assistant_id"])
+            run.update(status="completed", completed_at=int(time.time()), usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            })
+        return run
+
+    def cancel_run(self, thread_id, run_id):
+        run = self.threads[thread_id]["runs"][run_id]["run"]
+        if run["status"] in ("queued", "in_progress", "requires_action"):
+            run["status"] = "cancelled"
+        return run
+
+    def retrieve_run(self, thread_id, run_id):
+        entry = self.threads[thread_id]["runs"][run_id]
+        run = entry["run"]
+        if run["status"] in ("queued", "in_progress"):
+            if time.monotonic() - entry["started"] >= self.run_latency:
+                self.complete_run(thread_id, run_id, self.reply_for(thread_id))
+            else:
+                run["status"] = "in_progress"
+        return run
+
+    def admit_request(self):
+        """
+        Count a request against the per-second window.
+
+        Returns:
+            tuple: (allowed, rate-limit headers to send with the response).
+        """
+        if not self.rate_limit:
+            return True, {}
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start, self.window_requests = now, 0
+            self.window_requests += 1
+            allowed = self.window_requests <= self.rate_limit
+            if not allowed:
+                self.rate_limited_count += 1
+            reset_ms = max(1, int((1.0 - (now - self.window_start)) * 1000))
+            remaining = max(0, self.rate_limit - self.window_requests)
+        return allowed, {
+            "x-ratelimit-limit-requests": str(self.rate_limit),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset_ms}ms",
+            **({} if allowed else {"retry-after-ms": str(reset_ms)}),
+        }
+
+    def count_tokens(self, prompt_tokens, completion_tokens):
+        with self.lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    # === Chat Completions ===
+    def chat_completion(self, messages, model, max_tokens=None):
+        """
+        Reply to the last user message in ``messages``; usage counts words like complete_run.
+
+        Only the first QUOTE_WORDS words of the message are echoed, so long inputs (e.g. a
+        summary request carrying a transcript) get a reply of realistic length, and the reply
+        is cut at ``max_tokens`` words with finish_reason "length".
+        """
+        question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        if isinstance(question, list):
+            question = "".join(part.get("text", "") for part in question)
+        reply = self.reply_template.format(question="".join(_tokenize(question)[:QUOTE_WORDS]).strip())
+        finish_reason = "stop"
+        if max_tokens and len(_tokenize(reply)) > max_tokens:
+            reply, finish_reason = "".join(_tokenize(reply)[:max_tokens]), "length"
+        prompt_tokens = sum(len(_tokenize(m["content"])) for m in messages if isinstance(m.get("content"), str))
+        completion_tokens = len(_tokenize(reply))
+        self.count_tokens(prompt_tokens, completion_tokens)
+        return {
+            "id": _new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": finish_reason, "logprobs": None,
+                         "message": {"role": "assistant", "content": reply, "refusal": None}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+
+class FakeAssistantsHandler(BaseHTTPRequestHandler):
+    """HTTP handler translating OpenAI REST paths onto FakeAssistantsState."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state = None  # bound by make_server()
+    extra_headers = {}  # rate-limit headers for the current request
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        for name, value in self.extra_headers.items():
+            self.send_header(name, value)
+
+    def log_message(self, format, *args):
+        pass
+
+    # === Helpers ===
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self):
+        self._send_json({"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}}, 404)
+
+    def _send_event(self, event, data):
+        payload = data if isinstance(data, str) else json.dumps(data)
+        chunk = f"event: {event}\ndata: {payload}\n\n".encode()
+        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def _send_data(self, data):
+        payload = data if isinstance(data, str) else json.dumps(data)
+        chunk = f"data: {payload}\n\n".encode()
+        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_completion(self, completion, include_usage):
+        """Emit chat.completion.chunk events, one content delta per word."""
+        state = self.state
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(state.run_latency)
+
+        def chunk(delta, finish_reason=None):
+            return {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"],
+                    "model": completion["model"],
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}]}
+
+        self._send_data(chunk({"role": "assistant", "content": ""}))
+        for token in _tokenize(completion["choices"][0]["message"]["content"]):
+            time.sleep(state.token_delay)
+            self._send_data(chunk({"content": token}))
+        self._send_data(chunk({}, completion["choices"][0]["finish_reason"]))
+        if include_usage:
+            self._send_data({"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"],
+                             "model": completion["model"], "choices": [], "usage": completion["usage"]})
+        self._send_data("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _stream_run(self, thread_id, run):
+        """Emit the Assistants event sequence for a run, one text delta per word."""
+        state = self.state
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        self._send_event("thread.run.created", run)
+        run["status"] = "in_progress"
+        self._send_event("thread.run.in_progress", run)
+        time.sleep(state.run_latency)
+
+        reply = state.reply_for(thread_id)
+        message = {
+            "id": _new_id("msg"), "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": thread_id, "role": "assistant", "content": [], "run_id": run["id"],
+            "assistant_id": run["assistant_id"], "attachments": [], "metadata": {}, "status": "in_progress",
+        }
+        self._send_event("thread.message.created", message)
+        for token in _tokenize(reply):
+            time.sleep(state.token_delay)
+            self._send_event("thread.message.delta", {
+                "id": message["id"],
+                "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": token, "annotations": []}}]},
+            })
+        message.update(status="completed", content=_text_content(reply))
+        self._send_event("thread.message.completed", message)
+
+        run = state.complete_run(thread_id, run["id"], reply)
+        self._send_event("thread.run.completed", run)
+        self._send_event("done", "[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    # === Routes ===
+    def _admit(self):
+        """Apply the request latency and rate limit; returns False after answering with a 429."""
+        self.state.request_count += 1
+        time.sleep(self.state.request_latency)
+        allowed, self.extra_headers = self.state.admit_request()
+        if not allowed:
+            if self.command == "POST":
+                self._read_json()  # drain the body so the keep-alive connection stays usable
+            self._send_json({"error": {"message": "Rate limit reached for requests", "type": "requests",
+                                       "code": "rate_limit_exceeded"}}, 429)
+        return allowed
+
+    def do_GET(self):
+        if not self._admit():
+            return
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if parts[:2] != ["v1", "threads"] or len(parts) < 3 or not self.state.get_thread(parts[2]):
+            return self._not_found()
+        thread_id = parts[2]
+
+        if len(parts) == 3:
+            return self._send_json(self.state.get_thread(thread_id)["thread"])
+        if parts[3:] == ["messages"]:
+            return self._send_json(self.state.list_messages(
+                thread_id,
+                order=query.get("order", "desc"),
+                limit=int(query.get("limit", 20)),
+                after=query.get("after"),
+                before=query.get("before"),
+                run_id=query.get("run_id"),
+            ))
+        if len(parts) == 5 and parts[3] == "runs":
+            return self._send_json(self.state.retrieve_run(thread_id, parts[4]))
+        return self._not_found()
+
+    def do_POST(self):
+        if not self._admit():
+            return
+        parts = urlparse(self.path).path.strip("/").split("/")
+        body = self._read_json()
+
+        if parts == ["v1", "chat", "completions"]:
+            completion = self.state.chat_completion(body.get("messages", []), body.get("model", "gpt-4o"),
+                                                    body.get("max_completion_tokens") or body.get("max_tokens"))
+            if body.get("stream"):
+                return self._stream_completion(completion, (body.get("stream_options") or {}).get("include_usage"))
+            time.sleep(self.state.run_latency + self.state.token_delay * completion["usage"]["completion_tokens"])
+            return self._send_json(completion)
+        if parts == ["v1", "threads"]:
+            return self._send_json(self.state.create_thread())
+        if parts[:2] != ["v1", "threads"] or len(parts) < 4 or not self.state.get_thread(parts[2]):
+            return self._not_found()
+        thread_id = parts[2]
+
+        if parts[3:] == ["messages"]:
+            content = _content_text(body.get("content", ""))
+            return self._send_json(self.state.add_message(thread_id, body.get("role", "user"), content))
+        if parts[3:] == ["runs"]:
+            run = self.state.create_run(thread_id, body.get("assistant_id"), body.get("metadata"),
+                                        body.get("truncation_strategy"), body.get("additional_instructions"),
+                                        body.get("additional_messages"))
+            if body.get("stream"):
+                return self._stream_run(thread_id, run)
+            return self._send_json(run)
+        if len(parts) == 6 and parts[3] == "runs" and parts[5] == "cancel":
+            return self._send_json(self.state.cancel_run(thread_id, parts[4]))
+        return self._not_found()
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up on a keep-alive connection is routine, not an error.
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, **state_kwargs):
+    """
+    Build a fake Assistants server without starting it.
+
+    Returns:
+        FakeServer: server whose ``state`` attribute holds the fake data;
+        the API base URL is ``http://{host}:{server.server_port}/v1``.
+    """
+    state = FakeAssistantsState(**state_kwargs)
+    handler = type("BoundFakeAssistantsHandler", (FakeAssistantsHandler,), {"state": state})
+    server = FakeServer((host, port), handler)
+    server.state = state
+    return server
+
+
+def start_in_background(**kwargs):
+    """Start a fake server on a daemon thread and return ``(server, base_url)``."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--run-latency", type=float, default=0.5, help="seconds before a run starts answering")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="seconds between streamed text deltas")
+    parser.add_argument("--request-latency", type=float, default=0.0, help="seconds added to every request (network round trip)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per second before answering 429 (0 = unlimited)")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="reply template; {question} is substituted")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, reply_template=args.reply,
+                         run_latency=args.run_latency, token_delay=args.token_delay,
+                         request_latency=args.request_latency, rate_limit=args.rate_limit)
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
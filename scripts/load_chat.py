@@ -0,0 +1,218 @@
+"""
+Multi-session load generator for the Chat page.
+
+Runs the app the way the Dockerfile does (one ``streamlit run`` process) with
+MongoDB replaced by scripts/fake_mongo.py and OpenAI pointed at the local fake
+Assistants API (scripts/fake_openai.py, configurable run latency and token
+delay). For each concurrency level it starts a fresh server and drives N
+simulated browser sessions over the websocket, each going through one of two
+flows (alternating):
+
+- chat + end:   load, send messages, End, Rate Chat, pick a rating
+- chat + book:  load, send messages, Book, submit the appointment form, Rate Chat, pick a rating
+
+Per level it reports:
+
+- throughput:    interactions/s and completed sessions/s
+- latency:       p50/p95/p99 of sends and of all other interactions (send -> script run finished)
+- errors:        interactions that timed out or could not be sent
+- memory:        server RSS with all N sessions connected, and per session above the idle server
+- cpu_percent:   server CPU over the level
+
+Linux only (reads /proc). Usage:
+    python -m scripts.load_chat --levels 1 5 10 25 50 --run-latency 1.0 --token-delay 0.01 [--json load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+
+import websockets
+
+from scripts.bench_about_idle import REPO_ROOT, free_port, process_cpu_seconds, process_threads
+from scripts.bench_chat_interactions import CHAT_PAGE, ChatSession, start_server
+from scripts.fake_openai import start_in_background
+
+QUESTIONS = [
+    "hi, what do you do?",
+    "Do you build dashboards?",
+    "can you help us clean up our data pipelines",
+    "How much does a consultation cost?",
+    "what cloud platforms do you work with",
+]
+APPOINTMENT = {
+    "Phone Number:": {"string_value": "+2348012345678"},
+    "Email Address:": {"string_value": "load@example.com"},
+    "Preferred Time:": {"string_value": "10:30"},
+}
+RATING = "4 - Satisfied"
+
+
+def process_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def session_flow(index, port, pid, args, results, connected, release):
+    """One simulated visitor; records (kind, latency ms) per interaction."""
+    rng = random.Random(index)
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    try:
+        async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                      subprotocols=["streamlit"], max_size=None) as ws:
+            session = ChatSession(ws, pid)
+
+            async def step(kind, action):
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think)
+                try:
+                    sample = await action()
+                    results["latencies"].setdefault(kind, []).append(sample["wall_ms"])
+                except (asyncio.TimeoutError, KeyError, websockets.ConnectionClosed):
+                    results["errors"] += 1
+                    raise
+
+            await step("load", session.load)
+            booking = index % 2 == 1
+            # Book is offered from 10 messages (5 exchanges) on
+            sends = max(args.messages, 5) if booking else args.messages
+            for turn in range(sends):
+                question = QUESTIONS[(index + turn) % len(QUESTIONS)]
+                await step("send", lambda: session.interact("Talk to me...", chat_input_value=question))
+            if booking:
+                await step("book", lambda: session.interact("📅 Book", trigger_value=True))
+                await step("submit form", lambda: session.interact("Submit", values=APPOINTMENT, trigger_value=True))
+            else:
+                await step("end", lambda: session.interact("⛔ End", trigger_value=True))
+            await step("rate", lambda: session.interact("⭐ Rate Chat", trigger_value=True))
+            await step("pick rating", lambda: session.interact("Select a rating:", string_value=RATING))
+            results["sessions"] += 1
+
+            # Stay connected until every session is done so memory is measured with all of them held
+            connected.release()
+            await release.wait()
+            return
+    except Exception:
+        pass
+    connected.release()
+
+
+async def drive_level(port, pid, sessions, args):
+    results = {"latencies": {}, "errors": 0, "sessions": 0}
+    connected = asyncio.Semaphore(0)
+    release = asyncio.Event()
+    tasks = [asyncio.create_task(session_flow(i, port, pid, args, results, connected, release))
+             for i in range(sessions)]
+
+    cpu_start, start = process_cpu_seconds(pid), time.monotonic()
+    for _ in range(sessions):
+        await connected.acquire()
+    elapsed = time.monotonic() - start
+    cpu = process_cpu_seconds(pid) - cpu_start
+    rss = process_rss_mb(pid)
+    threads = process_threads(pid)
+
+    release.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return results, elapsed, cpu, rss, threads
+
+
+def run_level(sessions, args, openai_url):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, OPENAI_API_KEY="load", ASSISTANT_ID="asst_load",
+               OPENAI_BASE_URL=openai_url, MONGODB_USERNAME="load", MONGODB_PASSWORD="load",
+               MONGODB_HOST="localhost", DB_NAME="load", COLLECTION="chats")
+    port = free_port()
+    proc = start_server(CHAT_PAGE, port, env)
+    try:
+        # One warm-up visitor so imports and shared resources are not billed to the level
+        warmup_args = argparse.Namespace(**dict(vars(args), think=0.0, ramp=0.0, messages=1))
+        asyncio.run(drive_level(port, proc.pid, 1, warmup_args))
+        time.sleep(1.0)
+        idle_rss = process_rss_mb(proc.pid)
+        results, elapsed, cpu, rss, threads = asyncio.run(drive_level(port, proc.pid, sessions, args))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    sends = results["latencies"].get("send", [])
+    others = [ms for kind, samples in results["latencies"].items() if kind != "send" for ms in samples]
+    interactions = len(sends) + len(others)
+    return {
+        "sessions": sessions,
+        "completed": results["sessions"],
+        "errors": results["errors"],
+        "seconds": round(elapsed, 1),
+        "interactions_per_s": round(interactions / elapsed, 2),
+        "sessions_per_s": round(results["sessions"] / elapsed, 3),
+        "send_p50_ms": round(percentile(sends, 50)),
+        "send_p95_ms": round(percentile(sends, 95)),
+        "send_p99_ms": round(percentile(sends, 99)),
+        "other_p50_ms": round(percentile(others, 50)),
+        "other_p95_ms": round(percentile(others, 95)),
+        "other_p99_ms": round(percentile(others, 99)),
+        "cpu_percent": round(100 * cpu / elapsed, 1),
+        "threads": threads,
+        "rss_mb": round(rss, 1),
+        "rss_per_session_kb": round((rss - idle_rss) * 1024 / sessions) if sessions else 0,
+        "by_interaction_p95_ms": {kind: round(percentile(samples, 95)) for kind, samples in results["latencies"].items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="concurrent sessions per level")
+    parser.add_argument("--messages", type=int, default=3, help="messages per session (booking sessions send at least 5)")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a visitor's interactions")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which sessions arrive")
+    parser.add_argument("--run-latency", type=float, default=1.0, help="fake assistant run time (s)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="fake delay between streamed tokens (s)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="fake OpenAI requests/s before 429s (0 = unlimited)")
+    parser.add_argument("--slo-p95-ms", type=float, default=3000, help="send p95 target used for the summary line")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    openai_server, openai_url = start_in_background(run_latency=args.run_latency, token_delay=args.token_delay,
+                                                    rate_limit=args.rate_limit)
+    rows = []
+    try:
+        for sessions in args.levels:
+            print(f"driving {sessions} concurrent sessions...", flush=True)
+            rows.append(run_level(sessions, args, openai_url))
+    finally:
+        openai_server.shutdown()
+
+    columns = [c for c in rows[0] if c != "by_interaction_p95_ms"]
+    print(" ".join(f"{c:>18}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>18}" for c in columns))
+
+    within = [row["sessions"] for row in rows if row["send_p95_ms"] <= args.slo_p95_ms and not row["errors"]]
+    if within:
+        print(f"highest level with send p95 <= {args.slo_p95_ms:g} ms and no errors: {max(within)} sessions")
+    else:
+        print(f"no level met send p95 <= {args.slo_p95_ms:g} ms without errors")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+In-process stand-in for the ``openai.OpenAI`` client.
+
+Implements only the calls the Chat page makes (assistant threads, messages,
+runs, run streaming, chat completions and embeddings), answers instantly with a canned reply and
+counts every call by endpoint. Unlike scripts/fake_openai.py there is no HTTP
+server, so benchmarks measure the app rather than the network stack.
+
+    stub = StubOpenAI()
+    with mock.patch("openai.OpenAI", lambda *a, **k: stub):
+        ...
+    stub.call_counts  # {"threads.create": 3, "runs.stream": 20, ...}
+"""
+
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+DEFAULT_REPLY = (
+    "Thanks for reaching out! You asked: \"{question}\". "
+    "See [our projects](https://thebroketechbro.streamlit.app/Projects) for examples.【4:0†source】"
+)
+
+
+def _text_message(message_id, role, text, run_id=None):
+    part = SimpleNamespace(type="text", text=SimpleNamespace(value=text, annotations=[]))
+    return SimpleNamespace(id=message_id, role=role, content=[part], run_id=run_id, created_at=int(time.time()))
+
+
+class _RunStream:
+    """Context manager mimicking ``AssistantStreamManager`` for one finished run."""
+
+    def __init__(self, run, message, chunk_size):
+        self._run = run
+        self._message = message
+        self._chunk_size = chunk_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_deltas(self):
+        text = self._message.content[0].text.value
+        for start in range(0, len(text), self._chunk_size):
+            yield text[start:start + self._chunk_size]
+
+    def get_final_run(self):
+        return self._run
+
+    def get_final_messages(self):
+        return [self._message]
+
+
+class StubOpenAI:
+    """
+    Minimal synchronous OpenAI client with call counters.
+
+    Parameters:
+        reply_template (str): Assistant reply; ``{question}`` is replaced by the last user message.
+        chunk_size (int): Characters per streamed text delta.
+        embedding_size (int): Length of the vectors returned by embeddings.create.
+    """
+
+    def __init__(self, reply_template=DEFAULT_REPLY, chunk_size=16, embedding_size=8):
+        self.reply_template = reply_template
+        self.chunk_size = chunk_size
+        self.embedding_size = embedding_size
+        self.call_counts = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._threads = {}  # thread_id -> [message, ...]
+        self._runs = {}  # run_id -> run
+
+        messages = SimpleNamespace(create=self._create_message, list=self._list_messages)
+        runs = SimpleNamespace(create=self._create_run, retrieve=self._retrieve_run,
+                               cancel=self._cancel_run, stream=self._stream_run)
+        threads = SimpleNamespace(create=self._create_thread, messages=messages, runs=runs)
+        self.beta = SimpleNamespace(threads=threads)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embedding)
+
+    def _count(self, name):
+        with self._lock:
+            self.call_counts[name] = self.call_counts.get(name, 0) + 1
+
+    def _next_id(self, prefix):
+        return f"{prefix}_{next(self._ids):08d}"
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.call_counts.values())
+
+    # --- threads / messages ---
+    def _create_thread(self, **kwargs):
+        self._count("threads.create")
+        thread_id = self._next_id("thread")
+        with self._lock:
+            self._threads[thread_id] = []
+        return SimpleNamespace(id=thread_id)
+
+    def _create_message(self, thread_id, role, content, count=True, **kwargs):
+        if count:
+            self._count("messages.create")
+        message = _text_message(self._next_id("msg"), role, content)
+        with self._lock:
+            self._threads.setdefault(thread_id, []).append(message)
+        return message
+
+    def _list_messages(self, thread_id, run_id=None, order="desc", limit=20, **kwargs):
+        self._count("messages.list")
+        with self._lock:
+            data = [m for m in self._threads.get(thread_id, []) if run_id is None or m.run_id == run_id]
+        if order == "desc":
+            data = data[::-1]
+        return SimpleNamespace(data=data[:limit])
+
+    # --- runs ---
+    def _complete_run(self, thread_id):
+        """Create a completed run plus its assistant message."""
+        with self._lock:
+            history = self._threads.setdefault(thread_id, [])
+            question = next((m.content[0].text.value for m in reversed(history) if m.role == "user"), "")
+        reply = self.reply_template.format(question=question)
+        usage = SimpleNamespace(prompt_tokens=sum(len(m.content[0].text.value.split()) for m in history),
+                                completion_tokens=len(reply.split()))
+        run = SimpleNamespace(id=self._next_id("run"), thread_id=thread_id, status="completed", usage=usage)
+        message = _text_message(self._next_id("msg"), "assistant", reply, run_id=run.id)
+        with self._lock:
+            history.append(message)
+            self._runs[run.id] = run
+        return run, message
+
+    def _add_messages(self, thread_id, messages):
+        """Append a run's ``additional_messages`` to the thread, as the API does before the run starts."""
+        for message in messages or []:
+            self._create_message(thread_id, message["role"], message["content"], count=False)
+
+    def _create_run(self, thread_id, assistant_id=None, additional_messages=None, **kwargs):
+        self._count("runs.create")
+        self._add_messages(thread_id, additional_messages)
+        run, _ = self._complete_run(thread_id)
+        return run
+
+    def _retrieve_run(self, thread_id, run_id, **kwargs):
+        self._count("runs.retrieve")
+        with self._lock:
+            return self._runs[run_id]
+
+    def _cancel_run(self, thread_id, run_id, **kwargs):
+        self._count("runs.cancel")
+        with self._lock:
+            run = self._runs[run_id]
+        run.status = "cancelled"
+        return run
+
+    def _stream_run(self, thread_id, assistant_id=None, additional_messages=None, **kwargs):
+        self._count("runs.stream")
+        self._add_messages(thread_id, additional_messages)
+        run, message = self._complete_run(thread_id)
+        return _RunStream(run, message, self.chunk_size)
+
+    # --- chat completions ---
+    def _create_chat_completion(self, model, messages, stream=False, **kwargs):
+        self._count("chat.completions.create")
+        question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        reply = self.reply_template.format(question=question)
+        usage = SimpleNamespace(prompt_tokens=sum(len(m["content"].split()) for m in messages),
+                                completion_tokens=len(reply.split()))
+        if not stream:
+            message = SimpleNamespace(role="assistant", content=reply)
+            return SimpleNamespace(id=self._next_id("chatcmpl"), usage=usage,
+                                   choices=[SimpleNamespace(message=message, finish_reason="stop")])
+        chunks = [
+            SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=reply[i:i + self.chunk_size]),
+                                                                 finish_reason=None)])
+            for i in range(0, len(reply), self.chunk_size)
+        ]
+        chunks.append(SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=None),
+                                                                           finish_reason="stop")]))
+        chunks.append(SimpleNamespace(usage=usage, choices=[]))
+        return iter(chunks)
+
+    # --- embeddings ---
+    def _create_embedding(self, model, input, **kwargs):
+        self._count("embeddings.create")
+        # Deterministic toy vector: character histogram folded into embedding_size buckets
+        vector = [0.0] * self.embedding_size
+        for char in str(input).lower():
+            vector[ord(char) % self.embedding_size] += 1.0
+        return SimpleNamespace(data=[SimpleNamespace(embedding=vector)])
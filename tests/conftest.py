@@ -0,0 +1,24 @@
+import pytest
+
+
+class FakeClock:
+    """Manual clock for the ``clock`` / ``sleep`` parameters: sleeping advances time instantly."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,245 @@
+import pytest
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from scripts.fake_mongo import FakeMongoClient
+from utils.circuit_breaker import CircuitBreaker
+from utils.mongo_writer import MongoWriteBehind, merge_updates
+from utils.write_spool import WriteSpool
+
+DUPLICATE_KEY = 11000
+SHUTDOWN_IN_PROGRESS = 91
+
+
+class ScriptedCollection:
+    """
+    FakeCollection whose ``bulk_write`` fails as scripted. Each entry of ``failures`` is used by one
+    call: an exception to raise, or ``(index, code)`` for an ordered BulkWriteError at that request.
+    """
+
+    def __init__(self):
+        self.collection = FakeMongoClient().get_database("test").get_collection("chats")
+        self.failures = []
+        self.calls = []  # _ids of every bulk_write call, in request order
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls.append([request._filter["_id"] for request in requests])
+        if not self.failures:
+            return self.collection.bulk_write(requests, ordered=ordered)
+        failure = self.failures.pop(0)
+        if isinstance(failure, Exception):
+            raise failure
+        index, code = failure
+        if index:
+            self.collection.bulk_write(requests[:index], ordered=ordered)
+        raise BulkWriteError({
+            "writeErrors": [{"index": index, "code": code, "errmsg": "scripted"}],
+            "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0, "nMatched": index, "nModified": index,
+            "nRemoved": 0, "upserted": [],
+        })
+
+    def find_one(self, doc_id):
+        return self.collection.find_one({"_id": doc_id})
+
+
+def push(*texts):
+    return {"$push": {"messages": {"$each": list(texts)}}}
+
+
+@pytest.fixture
+def collection():
+    return ScriptedCollection()
+
+
+@pytest.fixture
+def make_writer(collection):
+    writers = []
+
+    def make(**kwargs):
+        # The worker never flushes on its own during a test; tests call flush()
+        writer = MongoWriteBehind(collection, flush_interval=3600, **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.close()
+
+
+# === merge_updates ===
+def test_merge_set_newer_wins_and_set_on_insert_older_wins():
+    merged = merge_updates({"$set": {"a": 1}, "$setOnInsert": {"created": 1}},
+                           {"$set": {"a": 2, "b": 3}, "$setOnInsert": {"created": 2}})
+    assert merged == {"$set": {"a": 2, "b": 3}, "$setOnInsert": {"created": 1}}
+
+
+def test_merge_concatenates_pushes_in_order():
+    assert merge_updates(push("m1"), {"$push": {"messages": "m2"}}) == push("m1", "m2")
+
+
+def test_merge_push_onto_a_pending_set_extends_the_set():
+    merged = merge_updates({"$set": {"messages": ["m1"]}}, push("m2", "m3"))
+    assert merged == {"$set": {"messages": ["m1", "m2", "m3"]}}
+
+
+def test_merge_set_replaces_a_pending_push():
+    merged = merge_updates(push("m1"), {"$set": {"messages": ["m9"]}})
+    assert merged == {"$set": {"messages": ["m9"]}}
+
+
+def test_merge_does_not_modify_its_arguments():
+    older = push("m1")
+    merge_updates(older, push("m2"))
+    assert older == push("m1")
+
+
+# === Coalescing and batching ===
+def test_flush_coalesces_updates_per_document(make_writer, collection):
+    writer = make_writer()
+    writer.submit("a", {"$setOnInsert": {"started": 1}, **push("m1")}, upsert=True)
+    writer.submit("b", push("x1"), upsert=True)
+    writer.submit("a", push("m2"))
+    writer.submit("a", {"$set": {"rating": 5}})
+    writer.flush()
+
+    assert collection.calls == [["a", "b"]]
+    assert collection.find_one("a") == {"_id": "a", "started": 1, "messages": ["m1", "m2"], "rating": 5}
+    stats = writer.stats()
+    assert (stats["coalesced"], stats["written"], stats["pending_documents"]) == (2, 2, 0)
+
+
+def test_flush_writes_in_batches_of_batch_size(make_writer, collection):
+    writer = make_writer(batch_size=2)
+    for doc_id in "abcde":
+        writer.submit(doc_id, push(doc_id), upsert=True)
+    writer.flush()
+    assert collection.calls == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_submit_rejects_when_the_queue_stays_full(make_writer):
+    writer = make_writer(max_queue=1, put_timeout=0)
+    assert writer.submit("a", push("m1"))
+    assert not writer.submit("b", push("m1"))
+    assert writer.stats()["rejected"] == 1
+
+
+# === Failed writes ===
+def test_transient_write_error_requeues_the_rest_ahead_of_newer_updates(make_writer, collection):
+    writer = make_writer()
+    for doc_id in "abc":
+        writer.submit(doc_id, push(f"{doc_id}1"), upsert=True)
+    collection.failures.append((1, SHUTDOWN_IN_PROGRESS))
+    writer.flush()
+
+    assert collection.find_one("a")["messages"] == ["a1"]
+    assert collection.find_one("b") is None
+    assert writer.stats()["pending_documents"] == 2
+
+    writer.submit("b", push("b2"))
+    writer.flush()
+    assert collection.calls[-1] == ["b", "c"]
+    assert collection.find_one("b")["messages"] == ["b1", "b2"]
+    assert collection.find_one("c")["messages"] == ["c1"]
+    stats = writer.stats()
+    assert (stats["failed_batches"], stats["dropped"], stats["written"]) == (1, 0, 3)
+
+
+def test_rejected_update_is_dropped_and_the_rest_written(make_writer, collection):
+    breaker = CircuitBreaker("mongo", failure_threshold=1)
+    writer = make_writer(breaker=breaker)
+    for doc_id in "abc":
+        writer.submit(doc_id, push(doc_id), upsert=True)
+    collection.failures.append((1, DUPLICATE_KEY))
+    writer.flush()
+
+    assert collection.calls == [["a", "b", "c"], ["c"]]
+    assert collection.find_one("b") is None
+    assert collection.find_one("c")["messages"] == ["c"]
+    stats = writer.stats()
+    assert (stats["dropped"], stats["failed_batches"], stats["pending_documents"]) == (1, 0, 0)
+    assert breaker.state == "closed"  # the update was at fault, not the server
+
+
+def test_write_concern_error_is_not_retried(make_writer, collection):
+    writer = make_writer()
+    writer.submit("a", push("m1"), upsert=True)
+    collection.failures.append(BulkWriteError({"writeErrors": [], "writeConcernErrors": [{"code": 64}]}))
+    writer.flush()
+    writer.flush()
+    assert collection.calls == [["a"]]  # applied on the primary; a retry would push m1 twice
+    assert writer.stats()["pending_documents"] == 0
+
+
+def test_unreachable_server_keeps_updates_and_opens_the_breaker(make_writer, collection, clock):
+    breaker = CircuitBreaker("mongo", failure_threshold=1, reset_timeout=30, clock=clock)
+    writer = make_writer(breaker=breaker)
+    writer.submit("a", push("m1"), upsert=True)
+    collection.failures.append(ServerSelectionTimeoutError("down"))
+    writer.flush()
+    assert breaker.state == "open"
+
+    writer.submit("a", push("m2"))
+    writer.flush()  # open: no attempt
+    assert len(collection.calls) == 1
+
+    clock.advance(30)
+    writer.flush()  # half-open probe succeeds
+    assert breaker.state == "closed"
+    assert collection.find_one("a")["messages"] == ["m1", "m2"]
+
+
+# === Spool replay ===
+@pytest.fixture
+def spool(tmp_path):
+    spool = WriteSpool(str(tmp_path / "spool.db"))
+    yield spool
+    spool.close()
+
+
+def test_open_breaker_spools_updates_and_replays_them_in_order(make_writer, collection, clock, spool):
+    breaker = CircuitBreaker("mongo", failure_threshold=1, reset_timeout=30, clock=clock)
+    writer = make_writer(breaker=breaker, spool=spool)
+    writer.submit("a", push("m1"), upsert=True)
+    collection.failures.append(ServerSelectionTimeoutError("down"))
+    writer.flush()
+    assert len(spool) == 1
+
+    writer.submit("a", push("m2"))
+    writer.submit("b", push("x1"), upsert=True)
+    writer.flush()
+    assert len(spool) == 3
+    assert len(collection.calls) == 1
+
+    clock.advance(30)
+    writer.flush()
+    assert len(spool) == 0
+    assert collection.find_one("a")["messages"] == ["m1", "m2"]
+    assert collection.find_one("b")["messages"] == ["x1"]
+    assert writer.stats()["replayed"] == 3
+
+
+def test_new_updates_wait_behind_a_spool_that_failed_to_replay(make_writer, collection, spool):
+    spool.append([(doc_id, push(f"{doc_id}1"), True) for doc_id in "abc"])
+    writer = make_writer(spool=spool)
+    collection.failures.append((1, SHUTDOWN_IN_PROGRESS))
+    writer.submit("b", push("b2"))
+    writer.flush()
+
+    assert collection.calls == [["a", "b", "c"]]  # b2 was not written ahead of b1
+    assert [entry[1] for entry in spool.peek(10)] == ["b", "c", "b"]
+
+    writer.flush()
+    assert len(spool) == 0
+    assert collection.find_one("b")["messages"] == ["b1", "b2"]
+
+
+def test_replay_drops_a_rejected_spool_entry_and_continues(make_writer, collection, spool):
+    spool.append([(doc_id, push(doc_id), True) for doc_id in "abc"])
+    writer = make_writer(spool=spool)
+    collection.failures.append((1, DUPLICATE_KEY))
+    writer.flush()
+
+    assert len(spool) == 0
+    assert collection.find_one("b") is None
+    assert collection.find_one("c")["messages"] == ["c"]
+    stats = writer.stats()
+    assert (stats["dropped"], stats["replayed"]) == (1, 2)
@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import openai_scheduler
+from utils.openai_scheduler import OpenAIScheduler, SchedulerBusy, TokenBucket, parse_reset
+
+
+class Transient(Exception):
+    """Stands in for the SDK's retryable errors (status_code 429 makes it a rate limit)."""
+
+    def __init__(self, status_code=500, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture(autouse=True)
+def retryable(monkeypatch):
+    monkeypatch.setattr(openai_scheduler, "retryable_errors", lambda: (Transient,))
+    monkeypatch.setattr(openai_scheduler.random, "uniform", lambda low, high: high)  # no jitter
+
+
+@pytest.fixture
+def make_scheduler(clock):
+    def make(**kwargs):
+        return OpenAIScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+    return make
+
+
+def failing(times, error=Transient):
+    """A call that raises ``error()`` ``times`` times, then returns "ok"."""
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= times:
+            raise error()
+        return "ok"
+    call.calls = calls
+    return call
+
+
+# === TokenBucket ===
+def test_bucket_allows_a_burst_then_refills_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.advance(0.5)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+    clock.advance(60)
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_bucket_acquire_waits_for_the_next_token(clock):
+    bucket = TokenBucket(rate=4, burst=1, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.25)
+    assert clock.sleeps == [pytest.approx(0.25)]
+
+
+def test_bucket_acquire_gives_up_when_the_wait_exceeds_the_timeout(clock):
+    bucket = TokenBucket(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    assert bucket.acquire(timeout=0.5) is None
+    assert clock.sleeps == []
+
+
+# === Retries ===
+def test_call_retries_with_exponential_backoff(make_scheduler, clock):
+    scheduler = make_scheduler(max_retries=3, backoff=0.5)
+    call = failing(2)
+    assert scheduler.call(call) == "ok"
+    assert clock.sleeps == [0.5, 1.0]
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_call_honours_retry_after(make_scheduler, clock):
+    scheduler = make_scheduler()
+    call = failing(1, lambda: Transient(429, {"retry-after-ms": "1500"}))
+    assert scheduler.call(call) == "ok"
+    assert clock.sleeps == [1.5]
+    assert scheduler.stats()["rate_limited"] == 1
+
+
+def test_retries_are_shared_by_the_calls_of_one_turn(make_scheduler):
+    scheduler = make_scheduler(max_retries=2)
+    with scheduler.admit():
+        assert scheduler.call(failing(2)) == "ok"
+        with pytest.raises(Transient):
+            scheduler.call(failing(1))
+    assert scheduler.stats()["budget_exhausted"] == 1
+
+
+def test_each_call_outside_a_turn_gets_its_own_budget(make_scheduler):
+    scheduler = make_scheduler(max_retries=2)
+    assert scheduler.call(failing(2)) == "ok"
+    assert scheduler.call(failing(2)) == "ok"
+
+
+def test_no_retry_is_started_past_the_turn_deadline(make_scheduler, clock):
+    scheduler = make_scheduler(max_retries=5, retry_budget=10)
+    call = failing(1, lambda: Transient(429, {"retry-after": "11"}))
+    with scheduler.admit(), pytest.raises(SchedulerBusy):
+        scheduler.call(call)
+    assert clock.sleeps == []
+    assert len(call.calls) == 1
+
+
+def test_persistent_rate_limit_raises_scheduler_busy(make_scheduler):
+    scheduler = make_scheduler(max_retries=1)
+    with pytest.raises(SchedulerBusy):
+        scheduler.call(failing(5, lambda: Transient(429)))
+    assert scheduler.stats()["rate_limited"] == 2
+
+
+def test_retry_if_can_veto_a_retry(make_scheduler):
+    scheduler = make_scheduler()
+    call = failing(1)
+    with pytest.raises(Transient):
+        scheduler.call(call, retry_if=lambda: False)
+    assert len(call.calls) == 1
+
+
+# === Admission and rate-limit headers ===
+def test_admit_rejects_when_no_slot_frees_up(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=1, queue_timeout=0)
+    with scheduler.admit():
+        with pytest.raises(SchedulerBusy):
+            with scheduler.admit():
+                pass
+    with scheduler.admit():
+        pass
+    stats = scheduler.stats()
+    assert (stats["admitted"], stats["rejected"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_spent_request_budget_pauses_new_requests_until_the_reset(make_scheduler, clock):
+    scheduler = make_scheduler(requests_per_second=0)
+    scheduler.on_response(SimpleNamespace(status_code=200, headers={
+        "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2s",
+        "x-ratelimit-remaining-tokens": "900",
+    }))
+    assert scheduler.stats()["remaining_tokens"] == 900
+
+    scheduler.on_request(None)
+    assert clock.sleeps == [2.0]
+    scheduler.on_request(None)
+    assert clock.sleeps == [2.0]
+    assert scheduler.stats()["throttled_requests"] == 1
+
+
+@pytest.mark.parametrize("value, seconds", [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("", None), ("soon", None)])
+def test_parse_reset(value, seconds):
+    assert parse_reset(value) == (pytest.approx(seconds) if seconds is not None else None)
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from utils.write_spool import WriteSpool
+
+
+def test_peek_returns_the_oldest_entries_in_append_order(tmp_path):
+    spool = WriteSpool(str(tmp_path / "spool.db"))
+    spool.append([("a", {"$set": {"n": 1}}, True), ("b", {"$set": {"n": 2}}, False)])
+    spool.append([("a", {"$set": {"n": 3}}, False)])
+
+    entries = spool.peek(2)
+    assert [(doc_id, update, upsert) for _, doc_id, update, upsert in entries] == [
+        ("a", {"$set": {"n": 1}}, True), ("b", {"$set": {"n": 2}}, False)]
+    assert len(spool) == 3
+    spool.close()
+
+
+def test_remove_through_drops_written_entries_only(tmp_path):
+    spool = WriteSpool(str(tmp_path / "spool.db"))
+    spool.append([(doc_id, {}, True) for doc_id in "abc"])
+    entries = spool.peek(10)
+    spool.remove_through(entries[1][0])
+
+    assert len(spool) == 1
+    assert [entry[1] for entry in spool.peek(10)] == ["c"]
+    spool.close()
+
+
+def test_entries_survive_a_restart_with_bson_types(tmp_path):
+    path = str(tmp_path / "spool.db")
+    doc_id = ObjectId()
+    update = {"$set": {"updated_at": datetime(2024, 5, 1, 12, 30)}, "$push": {"messages": {"$each": ["hi"]}}}
+    spool = WriteSpool(path)
+    spool.append([(doc_id, update, True)])
+    spool.close()
+
+    reopened = WriteSpool(path)
+    assert len(reopened) == 1
+    _, spooled_id, spooled_update, upsert = reopened.peek(1)[0]
+    assert (spooled_id, spooled_update, upsert) == (doc_id, update, True)
+    reopened.close()
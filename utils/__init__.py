@@ -0,0 +1 @@
+"""Shared building blocks for the BrokeTechBro Streamlit pages."""
@@ -0,0 +1,187 @@
+"""
+Process-wide cache of assistant answers to opening questions.
+
+Visitors tend to open with the same handful of questions. Answers to a
+session's first question are cached under a normalized form of the question,
+with TTL expiry, LRU eviction and a memory cap. Every entry is tied to a
+``version`` string (assistant id + KB file mtimes); when it changes the whole
+cache is dropped. Optionally, near-duplicate questions can be matched by
+embedding similarity.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_question(text):
+    """
+    Canonical cache key: the question lowercased, with punctuation dropped and whitespace collapsed.
+
+    Every word is kept (unlike the KB tokenizer, which drops stopwords), so "When can we meet?" and
+    "Where can we meet?" get different keys.
+    """
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class _Entry:
+    __slots__ = ("answer", "expires_at", "latency", "embedding", "nbytes")
+
+    def __init__(self, answer, expires_at, latency, embedding, nbytes):
+        self.answer = answer
+        self.expires_at = expires_at
+        self.latency = latency
+        self.embedding = embedding
+        self.nbytes = nbytes
+
+
+class AnswerCache:
+    """
+    TTL + LRU answer cache bounded by entry count and approximate memory use.
+
+    ``embed`` is an optional callable turning a question into a vector; when
+    given, a miss on the exact normalized key falls back to the most similar
+    cached question if its cosine similarity reaches ``similarity``.
+    """
+
+    def __init__(self, ttl=3600, max_entries=500, max_bytes=2 * 1024 * 1024, embed=None, similarity=0.93,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.embed = embed
+        self.similarity = similarity
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._version = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._saved_seconds = 0.0
+
+    def _embed(self, question):
+        if self.embed is None:
+            return None
+        try:
+            return self.embed(question)
+        except Exception:
+            logging.warning("[AnswerCache] Embedding failed; using exact match only", exc_info=True)
+            return None
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                logging.info(f"[AnswerCache] Version changed, dropping {len(self._entries)} cached answers")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+
+    def get(self, question, version):
+        """
+        Look up a cached raw answer for ``question``.
+
+        Returns:
+            str: the cached answer, or None on a miss.
+        """
+        key = normalize_question(question)
+        if not key:
+            return None
+        embedding = None
+        with self._lock:
+            self._check_version(version)
+            entry = self._lookup(key)
+            needs_embedding = entry is None and self.embed is not None and self._entries
+        if needs_embedding:
+            embedding = self._embed(question)
+        with self._lock:
+            if entry is None and embedding is not None:
+                entry = self._nearest(embedding)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._saved_seconds += entry.latency
+            logging.info(f"[AnswerCache] Hit for '{key}' (hit rate {self._hit_rate():.0%}, "
+                         f"saved {self._saved_seconds:.1f}s so far)")
+            return entry.answer
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, embedding):
+        now = self._clock()
+        best_key, best_score = None, self.similarity
+        for key, entry in self._entries.items():
+            if entry.embedding is not None and entry.expires_at > now:
+                score = _cosine(embedding, entry.embedding)
+                if score >= best_score:
+                    best_key, best_score = key, score
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key]
+
+    def put(self, question, version, answer, latency=0.0):
+        """
+        Cache ``answer`` (raw assistant text) for ``question``.
+
+        Parameters:
+            latency (float): seconds it took to produce the answer; credited as saved time on each hit.
+        """
+        key = normalize_question(question)
+        if not key or not answer:
+            return
+        embedding = self._embed(question)
+        nbytes = len(key) + len(answer.encode()) + (8 * len(embedding) if embedding else 0)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(answer, self._clock() + self.ttl, latency, embedding, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _hit_rate(self):
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit rate, seconds of generation saved, entries and approximate bytes held.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hit_rate(), 3),
+                "saved_seconds": round(self._saved_seconds, 2),
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,207 @@
+"""
+Image asset lookup for the page scripts.
+
+Optimized derivatives are produced by ``python -m scripts.build_assets`` and
+listed in ``static/build/manifest.json``, keyed by original path and display
+width. ``resolve_image`` returns the derivative for a given display width, or
+the original file when the manifest (or the entry) is missing.
+
+``static/`` is published by Streamlit's static file serving
+(``server.enableStaticServing`` in .streamlit/config.toml) at ``/app/static/``.
+Derivatives have content-hashed names, so their URLs never change meaning and
+the browser can keep them across reruns and visits. ``image_src`` (for
+st.image) and ``image_url`` (for inline HTML/CSS) return that URL, and fall
+back to the file path / a data URI when static serving is not available.
+
+``load_data_uri`` keeps encoded data URIs in a process-wide cache so reruns
+do not touch the disk; its hit/miss counters (``cache_stats``) are exported
+as the ``asset_cache`` metrics.
+"""
+
+import base64
+import functools
+import json
+import logging
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+STATIC_DIR = "static"  # served at STATIC_URL when static serving is on (next to the main script)
+STATIC_URL = "/app/static/"
+BUILD_DIR = os.path.join(STATIC_DIR, "build")
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+
+# st.image serves file paths with the guessed mimetype; older Pythons do not know .webp
+mimetypes.add_type("image/webp", ".webp")
+
+_manifest = {}
+_manifest_mtime = None
+
+
+def manifest_key(path, width):
+    """Manifest key for an original image shown at ``width`` CSS pixels."""
+    return f"{os.path.normpath(path).replace(os.sep, '/')}@{width}"
+
+
+def load_manifest():
+    """Return the derivative manifest, re-reading it only when the file changes."""
+    global _manifest, _manifest_mtime
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return {}
+    if mtime != _manifest_mtime:
+        try:
+            with open(MANIFEST_PATH, "r") as f:
+                _manifest = json.load(f)
+            _manifest_mtime = mtime
+        except (OSError, ValueError):
+            logging.exception(f"[load_manifest] Could not read {MANIFEST_PATH}")
+            return {}
+    return _manifest
+
+
+def resolve_image(path, width):
+    """
+    Return the path of the optimized derivative of ``path`` for a ``width`` px display slot.
+
+    Falls back to ``path`` itself if no derivative has been built.
+    """
+    derivative = load_manifest().get(manifest_key(path, width))
+    if derivative and os.path.isfile(derivative):
+        return derivative
+    return path
+
+
+# === Static URLs ===
+@functools.lru_cache(maxsize=1)
+def static_root():
+    """
+    Absolute path of the directory Streamlit serves at STATIC_URL.
+
+    Returns None outside ``streamlit run``, when static serving is off, or under a
+    server.baseUrlPath (st.image only passes through URLs starting with STATIC_URL).
+    """
+    import streamlit as st
+    from streamlit import runtime
+
+    if not runtime.exists() or not st.get_option("server.enableStaticServing") \
+            or st.get_option("server.baseUrlPath"):
+        return None
+    main_script = getattr(runtime.get_instance(), "_main_script_path", None)
+    if not main_script:
+        return None
+    return os.path.realpath(os.path.join(os.path.dirname(main_script), STATIC_DIR))
+
+
+def static_url(path, width):
+    """
+    Return the ``/app/static/...`` URL of the derivative of ``path`` for a ``width`` px slot.
+
+    Returns None if static serving is unavailable or the derivative is not under the served directory.
+    """
+    root = static_root()
+    if root is None:
+        return None
+    derivative = os.path.realpath(resolve_image(path, width))
+    if not derivative.startswith(root + os.sep) or not os.path.isfile(derivative):
+        return None
+    return STATIC_URL + os.path.relpath(derivative, root).replace(os.sep, "/")
+
+
+def image_src(path, width):
+    """
+    Image for st.image in a ``width`` px slot: its static URL, else the derivative's path.
+
+    The browser fetches (and caches) a URL straight from the static endpoint; a path
+    is read and hashed by the server on every run and held in its media storage.
+    """
+    return static_url(path, width) or resolve_image(path, width)
+
+
+def image_url(path, width):
+    """
+    Image URL for inline HTML/CSS in a ``width`` px slot: its static URL, else a data URI of the derivative.
+    """
+    return static_url(path, width) or load_data_uri(resolve_image(path, width))
+
+
+# === Cached loading ===
+# Data URIs shared by every session in the process, keyed by
+# path and invalidated when the file's mtime changes. Least recently used
+# entries are evicted once the cache holds more than ASSET_CACHE_MAX_BYTES.
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+FAVICON_PATH = "assets/icons/favicon.png"
+FAVICON_FALLBACK = "🤖"
+
+_cache = OrderedDict()  # (kind, path) -> (mtime, nbytes, value)
+_cache_lock = threading.Lock()
+_cache_bytes = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _cached(kind, path, loader, sizeof):
+    global _cache_bytes
+    mtime = os.path.getmtime(path)
+    key = (kind, path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] == mtime:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[2]
+        _stats["misses"] += 1
+
+    value = loader(path)
+    nbytes = sizeof(value)
+    with _cache_lock:
+        old = _cache.pop(key, None)
+        if old:
+            _cache_bytes -= old[1]
+        _cache[key] = (mtime, nbytes, value)
+        _cache_bytes += nbytes
+        while _cache_bytes > ASSET_CACHE_MAX_BYTES and len(_cache) > 1:
+            _, (_, evicted_bytes, _) = _cache.popitem(last=False)
+            _cache_bytes -= evicted_bytes
+            _stats["evictions"] += 1
+    return value
+
+
+def _encode_data_uri(path):
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    with open(path, "rb") as f:
+        return f"data:{mimetype};base64,{base64.b64encode(f.read()).decode()}"
+
+
+def load_data_uri(path):
+    """
+    Return ``path`` as a base64 ``data:`` URI for inline HTML, or "" if it cannot be read.
+    """
+    try:
+        return _cached("data_uri", path, _encode_data_uri, len)
+    except OSError as e:
+        logging.error(f"Error loading image {path}: {e}")
+        return ""
+
+
+def page_icon():
+    """
+    Favicon for st.set_page_config: the optimized favicon's static URL or path, or an emoji if it is missing.
+
+    Streamlit serves a path's bytes as they are, so the favicon is not decoded on every cold start.
+    """
+    path = resolve_image(FAVICON_PATH, 32)
+    if not os.path.isfile(path):
+        return FAVICON_FALLBACK
+    return static_url(FAVICON_PATH, 32) or path
+
+
+def cache_stats():
+    """
+    Returns:
+        dict: cache hits, misses, evictions, entry count and approximate bytes held.
+    """
+    with _cache_lock:
+        return dict(_stats, entries=len(_cache), bytes=_cache_bytes)
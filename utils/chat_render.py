@@ -0,0 +1,119 @@
+"""
+Chat transcript rendering.
+
+The transcript is emitted as a single markdown element (styles + every bubble)
+instead of one element per message. Bubble HTML for finished messages is cached
+in session state keyed by position and content hash, so a rerun only formats
+messages that were appended (or changed) since the previous one. User text is
+HTML-escaped, so markup in one message (an unclosed tag, ``<!--``) cannot hide
+or restyle the bubbles after it in the shared element. Positions are
+absolute (the transcript's offset is passed in), so a window that drops its
+oldest messages keeps the cached HTML of the rest.
+"""
+
+import hashlib
+import html
+
+import streamlit as st
+
+# Session-state key holding [(content hash, bubble html), ...] by message index
+RENDER_CACHE_KEY = "rendered_messages"
+# Session-state key holding the transcript offset the cache was built for
+RENDER_OFFSET_KEY = "rendered_offset"
+
+CHAT_CSS = """
+<style>
+    .chat-container {
+        display: flex;
+        flex-direction: column;
+        gap: 10px;
+        padding-top: 70px; /* Push chat below logo */
+    }
+    .bot-bubble {
+        align-self: flex-start;
+        background-color: #DE7E5D;
+        color: #000;
+        padding: 15px;
+        border-radius: 15px 15px 15px 0px;
+        max-width: 70%;
+        font-size: 16px;
+        margin-right: auto;
+        margin-left: 0;
+    }
+    .user-bubble {
+        align-self: flex-end;
+        background-color: #6E2FD6;
+        color: white;
+        padding: 10px 15px;
+        border-radius: 15px 15px 0px 15px;
+        max-width: 70%;
+        font-size: 16px;
+        margin-left: auto;
+        margin-right: 0;
+    }
+    .bot-name {
+        font-weight: bold;
+        font-size: 12px;
+        margin-bottom: 4px;
+        margin-left: 5px;
+        color: #DE7E5D;
+    }
+</style>
+"""
+
+
+def format_message_html(role, content):
+    """
+    Return the chat bubble HTML for a single message.
+
+    User content is escaped here; assistant content is bubble HTML from the page's clean_reply,
+    which escapes the model's text before adding link anchors.
+    """
+    if role == "user":
+        return f"<div class='user-bubble'>{html.escape(content)}</div>"
+    return f"<div class='bot-name'>Broke Tech Bro</div><div class='bot-bubble'>{content}</div>"
+
+
+def _message_hash(role, content):
+    return hashlib.blake2b(f"{role}\0{content}".encode(), digest_size=8).digest()
+
+
+def transcript_html(messages, state, offset=0, earlier=()):
+    """
+    Build the transcript HTML, formatting only messages not already cached in ``state``.
+
+    Parameters:
+        messages (list): Chat messages with "role" and "content".
+        state: st.session_state (or any mapping) used to hold the per-message cache.
+        offset (int): Index of messages[0] in the whole conversation.
+        earlier (list): Older messages to show above them (formatted on every call, not cached).
+
+    Returns:
+        str: CSS plus every bubble wrapped in the chat container.
+    """
+    cache = state.get(RENDER_CACHE_KEY)
+    if cache is None:
+        cache = state[RENDER_CACHE_KEY] = []
+    shift = offset - state.get(RENDER_OFFSET_KEY, 0)
+    if shift > 0:
+        del cache[:shift]  # oldest messages left the window
+    elif shift < 0:
+        cache[:0] = [(None, "")] * -shift
+    state[RENDER_OFFSET_KEY] = offset
+    del cache[len(messages):]  # transcript shrank (e.g. reset)
+
+    for idx, msg in enumerate(messages):
+        digest = _message_hash(msg["role"], msg["content"])
+        if idx < len(cache):
+            if cache[idx][0] != digest:
+                cache[idx] = (digest, format_message_html(msg["role"], msg["content"]))
+        else:
+            cache.append((digest, format_message_html(msg["role"], msg["content"])))
+
+    older = "".join(format_message_html(msg["role"], msg["content"]) for msg in earlier)
+    return CHAT_CSS + "<div class='chat-container'>" + older + "".join(html for _, html in cache) + "</div>"
+
+
+def render_transcript(messages, state, offset=0, earlier=()):
+    """Emit the styles and whole transcript as one markdown element."""
+    st.markdown(transcript_html(messages, state, offset, earlier), unsafe_allow_html=True)
@@ -0,0 +1,99 @@
+"""
+Circuit breaker for calls to an external dependency.
+
+After ``failure_threshold`` consecutive failures the breaker opens and callers
+skip the dependency (fail fast) instead of waiting on it. Once ``reset_timeout``
+seconds have passed a single probe call is let through (half-open): success
+closes the breaker, failure opens it again for another ``reset_timeout``.
+"""
+
+import logging
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric encoding for metrics gauges
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed / open / half-open breaker.
+
+    Callers ask ``allow()`` before each attempt and report the outcome with
+    ``record_success()`` or ``record_failure()``.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._stats = {"opened": 0, "short_circuited": 0, "failures": 0, "successes": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """
+        Returns:
+            bool: True if a call may be attempted now (closed, or the half-open probe), False to fail fast.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probing = False
+                logging.info(f"[CircuitBreaker] {self.name} half-open, probing")
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._stats["short_circuited"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                logging.info(f"[CircuitBreaker] {self.name} closed")
+            self._state = CLOSED
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats["opened"] += 1
+                    logging.warning(f"[CircuitBreaker] {self.name} open after {self._failures} consecutive failures; "
+                                    f"retrying in {self.reset_timeout:g}s")
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+
+    def stats(self):
+        """
+        Returns:
+            dict: current state (and its numeric code), consecutive failures, seconds open, and cumulative counters.
+        """
+        with self._lock:
+            return {
+                "state": self._state,
+                "state_code": STATE_CODES[self._state],
+                "consecutive_failures": self._failures,
+                "open_seconds": round(self._clock() - self._opened_at, 1) if self._state != CLOSED else 0.0,
+                **self._stats,
+            }
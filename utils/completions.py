@@ -0,0 +1,199 @@
+"""
+Single-call conversation backend on the Chat Completions API.
+
+The Assistants backend costs several sequential round trips per turn (message
+create, run create/stream, polls, message list) and keeps the conversation on
+OpenAI's side. This backend sends the history the page already holds in
+``st.session_state.messages`` with each request, grounded locally with the
+best-matching kb.json entries and the project list, so a reply is one request.
+"""
+
+import html
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from utils import metrics
+from utils.kb import get_kb_index
+
+PROJECTS_PATH = "assets/docs/projects.json"
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You are brokeTechBro, the assistant on the brokeTechBro website, a data engineering and analytics "
+    "consultancy. Answer visitors' questions briefly and in a friendly tone, using only the reference "
+    "material below; if it does not cover a question, say so and suggest booking a consultation. "
+    "Format links as markdown. When the visitor is done, close with \"have a great day\"."
+)
+
+# Stored assistant bubbles hold cleaned HTML (see clean_reply); turn it back into markdown for the model
+_ANCHOR_RE = re.compile(r'<a href="([^"]+)"[^>]*>(.*?)</a>', re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def to_plain_text(content):
+    """Strip chat-bubble HTML (tags and clean_reply's escaping) from a stored message, keeping links as markdown."""
+    content = _ANCHOR_RE.sub(r"[\2](\1)", content)
+    content = re.sub(r"<br\s*/?>", "\n", content)
+    return html.unescape(_TAG_RE.sub("", content)).strip()
+
+
+def message_text(message):
+    """The text of a stored message for the model: assistant bubbles as plain text, user input unchanged."""
+    if message["role"] == "assistant":
+        return to_plain_text(message["content"])
+    return message["content"]
+
+
+_projects = None
+_projects_mtime = None
+_projects_lock = threading.Lock()
+
+
+def load_projects(path=PROJECTS_PATH):
+    """Projects from ``path``, re-read only when the file's mtime changes ([] if missing)."""
+    global _projects, _projects_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return []
+    with _projects_lock:
+        if _projects is None or _projects_mtime != (path, mtime):
+            with open(path, "r") as f:
+                _projects = json.load(f)
+            _projects_mtime = (path, mtime)
+        return _projects
+
+
+class CompletionsBackend:
+    """
+    Build a grounded Chat Completions request from the local transcript and send it in one call.
+
+    ``history`` passed to ``generate`` / ``stream`` is the page's message list
+    (dicts with "role" and "content") ending with the new user message, or the
+    tail of it in bounded-context mode, where ``summary`` stands in for the rest.
+    Requests are sent through ``call(fn, **kwargs)`` when given (e.g.
+    OpenAIScheduler.call, for retries).
+    """
+
+    def __init__(self, client, model="gpt-4o-mini", system_prompt=DEFAULT_SYSTEM_PROMPT, kb_entries=3,
+                 max_tokens=600, temperature=0.3, call=None):
+        self.client = client
+        self._call = call or (lambda fn, **kwargs: fn(**kwargs))
+        self.model = model
+        self.system_prompt = system_prompt
+        self.kb_entries = kb_entries
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+        self._finish_reasons = {}
+
+    def grounding(self, question):
+        """Reference material for ``question``: top KB entries by relevance and all projects."""
+        lines = []
+        try:
+            kb = get_kb_index()
+            lines.append(f"Company: {kb.company}")
+            for score, category, entry in kb.search(question, limit=self.kb_entries):
+                lines.append(f"- [{category}] {entry.get('title', '')}: {entry.get('description', '')}")
+        except Exception:
+            logging.exception("[CompletionsBackend] KB lookup failed")
+        projects = load_projects()
+        if projects:
+            lines.append("Projects:")
+            lines.extend(f"- {p.get('title', '')} ({p.get('url', '')}): {p.get('text', '')}" for p in projects)
+        return "\n".join(lines)
+
+    def build_messages(self, history, summary=""):
+        """System prompt with grounding (and the summary of earlier turns), followed by the transcript as plain text."""
+        question = next((m["content"] for m in reversed(history) if m["role"] == "user"), "")
+        system = f"{self.system_prompt}\n\nReference material:\n{self.grounding(question)}"
+        if summary:
+            system += f"\n\nSummary of the earlier conversation:\n{summary}"
+        messages = [{"role": "system", "content": system}]
+        messages.extend(
+            {"role": m["role"], "content": message_text(m)}
+            for m in history
+            if m.get("role") in ("user", "assistant") and m.get("content")
+        )
+        return messages
+
+    def _request(self, history, summary, **kwargs):
+        return self._call(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=self.build_messages(history, summary),
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            **kwargs
+        )
+
+    def generate(self, history, summary=""):
+        """
+        Request the reply for ``history`` in one call.
+
+        Parameters:
+            history (list): Transcript ending with the new user message.
+            summary (str): Rolling summary of turns left out of ``history``.
+
+        Returns:
+            tuple: (reply text, finish reason, usage object or None).
+        """
+        with metrics.span("openai.chat_completion"):
+            response = self._request(history, summary)
+        choice = response.choices[0]
+        self._record(choice.finish_reason, response.usage)
+        return choice.message.content or "", choice.finish_reason, response.usage
+
+    def stream(self, history, on_delta, summary=""):
+        """
+        Stream the reply for ``history``, calling ``on_delta(text so far)`` for each text delta.
+
+        Returns:
+            tuple: (reply text, finish reason, usage object or None).
+        """
+        reply, finish_reason, usage = "", None, None
+        start = time.perf_counter()
+        with metrics.span("openai.chat_completion_stream"):
+            stream = self._request(history, summary, stream=True, stream_options={"include_usage": True})
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta and choice.delta.content:
+                    if not reply:
+                        metrics.observe("openai.chat_completion_first_token", time.perf_counter() - start)
+                    reply += choice.delta.content
+                    on_delta(reply)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        self._record(finish_reason, usage)
+        return reply, finish_reason, usage
+
+    def _record(self, finish_reason, usage):
+        with self._lock:
+            self._calls += 1
+            if usage is not None:
+                self._prompt_tokens += usage.prompt_tokens or 0
+                self._completion_tokens += usage.completion_tokens or 0
+            self._finish_reasons[finish_reason] = self._finish_reasons.get(finish_reason, 0) + 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: requests made, prompt/completion tokens used and a count per finish reason.
+        """
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "prompt_tokens": self._prompt_tokens,
+                "completion_tokens": self._completion_tokens,
+                "finish_reasons": {str(k): v for k, v in self._finish_reasons.items()},
+            }
@@ -0,0 +1,117 @@
+"""
+Bounded conversation context: the last K turns verbatim plus a rolling summary.
+
+Without a bound every turn sends the whole conversation to the model, so the
+prompt (and with it latency and cost) grows with the session. In bounded mode
+only the last K turns are sent as messages; everything before them is folded
+into a short summary that is updated incrementally, a few turns at a time, on
+a background worker so the turn that triggers it does not wait for it.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+from utils.completions import message_text
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a support chat between a visitor and brokeTechBro's assistant. "
+    "Update the summary with the new messages. Keep what the visitor wants, facts they shared "
+    "(company, needs, contact details, appointment requests) and answers already given. "
+    "Reply with the updated summary only, in at most 120 words."
+)
+
+
+def window_start(messages, turns):
+    """
+    Index of the first message in the last ``turns`` turns (a turn starts at a user message).
+
+    Returns:
+        int: 0 when the conversation has ``turns`` turns or fewer.
+    """
+    seen = 0
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].get("role") == "user":
+            seen += 1
+            if seen == turns:
+                return index
+    return 0
+
+
+def _transcript(messages):
+    return "\n".join(f"{m['role']}: {message_text(m)}" for m in messages if m.get("content"))
+
+
+class ConversationSummarizer:
+    """
+    Folds messages that left the context window into a rolling summary with one Chat Completions call.
+
+    ``submit`` runs the update on a small shared worker pool and returns a Future resolving to
+    ``(summary, usage)``; ``summarize`` does the same synchronously.
+    """
+
+    def __init__(self, client, model="gpt-4o-mini", max_tokens=300, workers=2, call=None):
+        self.client = client
+        self._call = call or (lambda fn, **kwargs: fn(**kwargs))  # e.g. OpenAIScheduler.call for retries
+        self.model = model
+        self.max_tokens = max_tokens
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="context-summary")
+        self._lock = threading.Lock()
+        self._updates = 0
+        self._failures = 0
+        self._messages_folded = 0
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+
+    def summarize(self, summary, messages):
+        """
+        Fold ``messages`` into ``summary``.
+
+        Parameters:
+            summary (str): Current summary ("" for none).
+            messages (list): Messages (dicts with "role" and "content") to fold into it, oldest first.
+
+        Returns:
+            tuple: (updated summary, usage object or None).
+        """
+        user_content = f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{_transcript(messages)}"
+        try:
+            with metrics.span("openai.summary"):
+                response = self._call(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=[{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": user_content}],
+                    max_tokens=self.max_tokens,
+                    temperature=0,
+                )
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        usage = response.usage
+        with self._lock:
+            self._updates += 1
+            self._messages_folded += len(messages)
+            if usage is not None:
+                self._prompt_tokens += usage.prompt_tokens or 0
+                self._completion_tokens += usage.completion_tokens or 0
+        return (response.choices[0].message.content or summary).strip(), usage
+
+    def submit(self, summary, messages):
+        """Run ``summarize`` in the background; returns a concurrent.futures.Future."""
+        return self._executor.submit(self.summarize, summary, list(messages))
+
+    def stats(self):
+        """
+        Returns:
+            dict: summary updates made and failed, messages folded in, and the tokens they used.
+        """
+        with self._lock:
+            return {
+                "updates": self._updates,
+                "failures": self._failures,
+                "messages_folded": self._messages_folded,
+                "prompt_tokens": self._prompt_tokens,
+                "completion_tokens": self._completion_tokens,
+            }
+
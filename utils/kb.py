@@ -0,0 +1,154 @@
+"""
+Knowledge-base index over ``assets/docs/kb.json``.
+
+The KB is parsed once per process and re-read only when the file changes. The
+index maps each category straight to its entries and keeps an inverted index
+of TF-IDF weighted terms from entry titles and descriptions, so a search only
+touches entries that share a term with the query.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+KB_PATH = "assets/docs/kb.json"
+
+# Title terms count this many times relative to description terms
+TITLE_WEIGHT = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about an and are as at be but by can do does for from how i if in into is it its me my of on or our
+please so tell that the their them there these they this to was we what when where which who why will
+with you your
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords dropped and a light plural strip ("pipelines" -> "pipeline")."""
+    terms = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class KBIndex:
+    """
+    Category lookup and ranked full-text search over knowledge-base entries.
+
+    ``search`` scores entries by cosine similarity between TF-IDF vectors of the
+    query and of the entry (title terms boosted), so scores fall in [0, 1].
+    """
+
+    def __init__(self, kb):
+        self.company = kb.get("company", "")
+        self.categories = [section["category"] for section in kb.get("knowledge_base", [])]
+        self.entries_by_category = {
+            section["category"]: section.get("entries", []) for section in kb.get("knowledge_base", [])
+        }
+        self.documents = [
+            (category, entry) for category in self.categories for entry in self.entries_by_category[category]
+        ]
+        self._build_postings()
+
+    def _vector(self, counts):
+        """
+        L2-normalized TF-IDF weights for a term -> count mapping.
+
+        Terms the KB has never seen get the highest possible idf: they match nothing
+        but still dilute the score, so "data modeling in rust" is a weaker match for
+        "Data Modeling" than "data modeling" is.
+        """
+        weights = {term: (1 + math.log(tf)) * self.idf.get(term, self.unknown_idf) for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: weight / norm for term, weight in weights.items()}
+
+    def _build_postings(self):
+        term_counts = []
+        document_frequency = Counter()
+        for _, entry in self.documents:
+            counts = Counter(tokenize(entry.get("title", "")) * TITLE_WEIGHT)
+            counts.update(tokenize(entry.get("description", "")))
+            term_counts.append(counts)
+            document_frequency.update(counts.keys())
+
+        total = len(self.documents)
+        self.idf = {term: math.log((total + 1) / (df + 1)) + 1 for term, df in document_frequency.items()}
+        self.unknown_idf = math.log(total + 1) + 1
+
+        self.postings = defaultdict(list)
+        for doc_id, counts in enumerate(term_counts):
+            for term, weight in self._vector(counts).items():
+                self.postings[term].append((doc_id, weight))
+
+    def entries(self, category):
+        """Entries of ``category`` (empty list for unknown categories)."""
+        return self.entries_by_category.get(category, [])
+
+    def search(self, query, limit=10):
+        """
+        Rank entries across all categories against ``query``.
+
+        Returns:
+            list: up to ``limit`` (score, category, entry) tuples, best first.
+        """
+        ranked = self._rank(self._vector(Counter(tokenize(query))), limit)
+        return [(score, *self.documents[doc_id]) for doc_id, score in ranked]
+
+    def _rank(self, query_vector, limit):
+        scores = defaultdict(float)
+        for term, query_weight in query_vector.items():
+            for doc_id, doc_weight in self.postings.get(term, ()):
+                scores[doc_id] += query_weight * doc_weight
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def best_match(self, query, candidates=5):
+        """
+        Find the single entry that best answers ``query``, with a confidence in [0, 1].
+
+        Confidence is the higher of the full-entry cosine score and the cosine
+        similarity between the query and the entry title alone, so a question that
+        restates an FAQ title ("do you build dashboards") scores close to 1 even
+        though the entry description is long.
+
+        Returns:
+            tuple: (confidence, category, entry), or None when nothing shares a term with the query.
+        """
+        query_vector = self._vector(Counter(tokenize(query)))
+        best = None
+        for doc_id, score in self._rank(query_vector, candidates):
+            category, entry = self.documents[doc_id]
+            title_vector = self._vector(Counter(tokenize(entry.get("title", ""))))
+            title_score = sum(weight * title_vector.get(term, 0.0) for term, weight in query_vector.items())
+            confidence = max(score, title_score)
+            if best is None or confidence > best[0]:
+                best = (confidence, category, entry)
+        return best
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_kb_index(path=KB_PATH):
+    """
+    Return the process-wide KBIndex for ``path``, rebuilding it only when the file's mtime changes.
+    """
+    global _index, _index_mtime
+    mtime = os.path.getmtime(path)
+    with _index_lock:
+        if _index is None or _index_mtime != (path, mtime):
+            with open(path, "r") as f:
+                _index = KBIndex(json.load(f))
+            _index_mtime = (path, mtime)
+            logging.info(f"[get_kb_index] Indexed {len(_index.documents)} KB entries from {path}")
+        return _index
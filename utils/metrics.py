@@ -0,0 +1,268 @@
+"""
+In-process latency histograms, counters and their export.
+
+Hot paths wrap their work in ``span(name)``; each span's duration lands in a
+fixed-bucket histogram and failures are counted per span. ``counter(name,
+**labels)`` counts events, and ``register_collector`` exposes the ``stats()``
+of the process-wide helpers (thread pool, write-behind queue, ...) as gauges.
+
+Everything is exported in Prometheus text format (``render_prometheus``) or as
+a JSON snapshot (``snapshot``). ``start_exporters`` optionally serves both over
+HTTP on METRICS_PORT and/or writes the JSON snapshot to METRICS_SNAPSHOT_PATH
+every METRICS_SNAPSHOT_INTERVAL seconds.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = "broketechbro"
+
+# Upper bounds in seconds; chosen to cover a ~1 ms render up to a 60 s assistant run
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus style) with count, sum and max."""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, bucket_count in enumerate(self.counts):
+            upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+            if bucket_count and seen + bucket_count >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe store of span histograms, counters and gauge collectors."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._spans = {}  # span name -> Histogram
+        self._span_errors = {}  # span name -> count
+        self._counters = {}  # (name, ((label, value), ...)) -> count
+        self._collectors = {}  # name -> callable returning a dict
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block into the ``name`` histogram; exceptions are counted and re-raised."""
+        start = self._clock()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._span_errors[name] = self._span_errors.get(name, 0) + 1
+            raise
+        finally:
+            self.observe(name, self._clock() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._spans.get(name)
+            if histogram is None:
+                histogram = self._spans[name] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, name, collect):
+        """Expose the numeric values of ``collect()`` (e.g. a helper's ``stats``) as ``name_<key>`` gauges."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _collect_gauges(self):
+        """[(gauge name, labels, value)] from every collector; nested dicts become a ``key`` label."""
+        with self._lock:
+            collectors = list(self._collectors.items())
+        gauges = []
+        for name, collect in collectors:
+            try:
+                values = collect()
+            except Exception:
+                logging.warning(f"[MetricsRegistry] Collector {name} failed", exc_info=True)
+                continue
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    gauges.extend((f"{name}_{key}", (("key", str(k)),), v) for k, v in value.items()
+                                  if isinstance(v, (int, float)))
+                elif isinstance(value, (int, float)):
+                    gauges.append((f"{name}_{key}", (), value))
+        return gauges
+
+    # === Export ===
+    def snapshot(self):
+        """JSON-serializable view: per-span count/sum/mean/max and estimated p50/p95/p99 (ms), counters and gauges."""
+        with self._lock:
+            spans = {
+                name: {
+                    "count": h.count,
+                    "errors": self._span_errors.get(name, 0),
+                    "sum_ms": round(h.sum * 1000, 3),
+                    "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                    "p50_ms": round(h.quantile(0.5) * 1000, 3),
+                    "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                    "p99_ms": round(h.quantile(0.99) * 1000, 3),
+                    "max_ms": round(h.max * 1000, 3),
+                }
+                for name, h in sorted(self._spans.items())
+            }
+            counters = {_series_name(name, labels): value for (name, labels), value in sorted(self._counters.items())}
+        gauges = {_series_name(name, labels): value for name, labels, value in self._collect_gauges()}
+        return {"timestamp": time.time(), "spans": spans, "counters": counters, "gauges": gauges}
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            spans = [(name, list(h.counts), h.count, h.sum) for name, h in sorted(self._spans.items())]
+            errors = sorted(self._span_errors.items())
+            counters = sorted(self._counters.items())
+
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines += [f"# HELP {metric} Duration of instrumented operations.", f"# TYPE {metric} histogram"]
+        for name, counts, count, total in spans:
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total}')
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+
+        metric = f"{METRIC_PREFIX}_span_errors_total"
+        lines += [f"# HELP {metric} Instrumented operations that raised.", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{span="{name}"}} {value}' for name, value in errors]
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{_series_name(metric, labels)} {value}")
+
+        for name, labels, value in self._collect_gauges():
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} gauge")
+                typed.add(metric)
+            lines.append(f"{_series_name(metric, labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _series_name(name, labels):
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{str(value)}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+# === Process-wide registry ===
+REGISTRY = MetricsRegistry()
+span = REGISTRY.span
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+register_collector = REGISTRY.register_collector
+snapshot = REGISTRY.snapshot
+render_prometheus = REGISTRY.render_prometheus
+
+
+# === Exporters ===
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body, content_type = render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body, content_type = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the app log
+
+
+def _write_snapshots(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot(), f)
+            os.replace(tmp_path, path)  # readers never see a half-written file
+        except OSError:
+            logging.warning(f"[metrics] Could not write snapshot to {path}", exc_info=True)
+
+
+_exporters_lock = threading.Lock()
+_exporters_started = False
+
+
+def start_exporters():
+    """
+    Start the exporters configured through environment variables (once per process):
+
+    - METRICS_PORT: serve /metrics (Prometheus) and /metrics.json on this port
+    - METRICS_SNAPSHOT_PATH: write a JSON snapshot to this file every METRICS_SNAPSHOT_INTERVAL seconds (default 60)
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logging.info(f"[metrics] Serving /metrics and /metrics.json on port {port}")
+        except OSError:
+            logging.exception(f"[metrics] Could not listen on METRICS_PORT={port}")
+
+    path = os.getenv("METRICS_SNAPSHOT_PATH")
+    if path:
+        interval = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "60"))
+        threading.Thread(target=_write_snapshots, args=(path, interval), name="metrics-snapshot", daemon=True).start()
+        logging.info(f"[metrics] Writing snapshots to {path} every {interval:g}s")
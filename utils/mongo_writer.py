@@ -0,0 +1,335 @@
+"""
+Asynchronous write-behind queue for MongoDB session updates.
+
+Page scripts hand updates to a bounded queue and return immediately; a single
+background worker per process coalesces updates to the same ``_id`` and flushes
+them with ``bulk_write`` in batches, so a slow database no longer adds to UI
+latency.
+
+Optionally the writes go through a circuit breaker: once MongoDB is known to be
+unhealthy the worker stops trying (no more waits on server selection) and moves
+updates to a durable local spool, which is replayed in order once a probe write
+succeeds.
+
+Only transient failures are retried or spooled. An update the server rejects
+for what it is (duplicate key, schema validation, document too large) would
+fail the same way forever, so it is logged and dropped instead of blocking
+every update queued behind it.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from utils import metrics
+
+# Write error codes worth retrying (the server was busy, stepping down or shutting down); any other code
+# in a BulkWriteError means the update itself was rejected
+TRANSIENT_WRITE_ERROR_CODES = frozenset({
+    6,      # HostUnreachable
+    7,      # HostNotFound
+    50,     # MaxTimeMSExpired
+    89,     # NetworkTimeout
+    91,     # ShutdownInProgress
+    112,    # WriteConflict
+    189,    # PrimarySteppedDown
+    262,    # ExceededTimeLimit
+    9001,   # SocketException
+    10107,  # NotWritablePrimary
+    11600,  # InterruptedAtShutdown
+    11602,  # InterruptedDueToReplStateChange
+    13435,  # NotPrimaryNoSecondaryOk
+    13436,  # NotPrimaryOrSecondary
+})
+
+
+def merge_updates(older, newer):
+    """
+    Combine two update documents for the same _id into one equivalent update.
+
+    Supports the operators used for chat sessions: ``$set`` (newer wins),
+    ``$setOnInsert`` (older wins) and ``$push`` with ``$each`` (concatenated). A
+    ``$set`` of a whole array replaces any pending ``$push`` onto it.
+    """
+    merged = {op: dict(fields) for op, fields in older.items()}
+    set_fields = merged.setdefault("$set", {})
+    push_fields = merged.setdefault("$push", {})
+
+    for key, value in newer.get("$set", {}).items():
+        set_fields[key] = value
+        push_fields.pop(key, None)
+
+    for key, value in newer.get("$setOnInsert", {}).items():
+        merged.setdefault("$setOnInsert", {}).setdefault(key, value)
+
+    for key, value in newer.get("$push", {}).items():
+        items = value["$each"] if isinstance(value, dict) else [value]
+        if key in set_fields:
+            set_fields[key] = list(set_fields[key]) + list(items)
+        else:
+            pending = push_fields.get(key, {"$each": []})
+            push_fields[key] = {"$each": list(pending["$each"]) + list(items)}
+
+    return {op: fields for op, fields in merged.items() if fields}
+
+
+class MongoWriteBehind:
+    """
+    Bounded, coalescing, batched background writer for one collection.
+
+    ``submit`` blocks for at most ``put_timeout`` seconds when the queue is full
+    (backpressure) and reports whether the update was accepted. Every
+    ``flush_interval`` seconds the worker drains the queue, merges updates per
+    ``_id`` and writes them in ``bulk_write`` batches of ``batch_size``. Batches
+    that fail transiently are merged back and retried on the next flush; an
+    update rejected with a permanent write error is logged and dropped. ``close`` (also
+    registered with atexit) drains everything before the process exits.
+
+    With a ``breaker`` (utils.circuit_breaker.CircuitBreaker), failed batches
+    count as failures and no writes are attempted while it is open. With a
+    ``spool`` (utils.write_spool.WriteSpool), updates that cannot be written
+    right now are spooled to disk instead of kept in memory; while the spool is
+    not empty every new update goes behind it, so order is preserved.
+    """
+
+    def __init__(self, collection, max_queue=1000, flush_interval=0.5, batch_size=100, put_timeout=0.5,
+                 breaker=None, spool=None):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.breaker = breaker
+        self.spool = spool
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = OrderedDict()  # _id -> (update, upsert); only touched under _flush_lock
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "blocked": 0,
+            "coalesced": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "max_queue_depth": 0,
+            "last_flush_seconds": 0.0,
+        }
+        self._worker = threading.Thread(target=self._run, name="mongo-write-behind", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    # === Producer side ===
+    def submit(self, doc_id, update, upsert=False):
+        """
+        Queue an update for ``doc_id``.
+
+        Returns:
+            bool: True if accepted, False if the queue stayed full for put_timeout seconds.
+        """
+        item = (doc_id, update, upsert)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count("blocked")
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                self._count("rejected")
+                logging.warning(f"[MongoWriteBehind] Queue full, rejected update for _id: {doc_id}")
+                return False
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+        return True
+
+    # === Worker side ===
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def _drain_queue(self):
+        while True:
+            try:
+                doc_id, update, upsert = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if doc_id in self._pending:
+                pending_update, pending_upsert = self._pending[doc_id]
+                self._pending[doc_id] = (merge_updates(pending_update, update), pending_upsert or upsert)
+                self._count("coalesced")
+            else:
+                self._pending[doc_id] = (update, upsert)
+
+    def flush(self):
+        """Write everything queued so far. Safe to call from any thread."""
+        with self._flush_lock:
+            self._drain_queue()
+            start = time.perf_counter()
+            if self.breaker is not None and not self.breaker.allow():
+                # Known unhealthy: fail fast and keep the updates on disk (or in memory) for later
+                self._spool_pending()
+            elif self._replay_spool():
+                while self._pending:
+                    batch = []
+                    while self._pending and len(batch) < self.batch_size:
+                        batch.append(self._pending.popitem(last=False))
+                    if not self._write_batch(batch):
+                        self._spool_pending()
+                        break
+            else:
+                self._spool_pending()
+            with self._stats_lock:
+                self._stats["last_flush_seconds"] = round(time.perf_counter() - start, 4)
+
+    def _bulk_write(self, requests):
+        """
+        Write ``requests`` in order, reporting the outcome to the breaker.
+
+        Returns:
+            tuple[int, bool]: how many leading requests were applied, and whether the request after them
+            was rejected permanently (the caller drops it and carries on with the rest).
+        """
+        rejected = False
+        try:
+            with metrics.span("mongo.bulk_write"):
+                self.collection.bulk_write(requests, ordered=True)
+            written = len(requests)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors") or []
+            if not write_errors:
+                # Only a write concern error: the updates were applied, re-sending them would repeat each $push
+                written = len(requests)
+                logging.warning(f"[MongoWriteBehind] bulk_write concern error: {e.details.get('writeConcernErrors')}")
+            else:
+                # Ordered: everything before the first error was applied
+                error = write_errors[0]
+                written = error["index"]
+                rejected = error.get("code") not in TRANSIENT_WRITE_ERROR_CODES
+                logging.error(f"[MongoWriteBehind] bulk_write failed after {written} of {len(requests)} updates "
+                              f"(code {error.get('code')}: {error.get('errmsg')})")
+        except Exception:
+            # Network/server errors as well as anything unexpected; the worker must keep running
+            written = 0
+            logging.exception("[MongoWriteBehind] bulk_write failed")
+
+        # A rejected update is the update's fault, not the server's
+        failed = written < len(requests) and not rejected
+        if self.breaker is not None:
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        with self._stats_lock:
+            self._stats["written"] += written
+            self._stats["batches"] += 1
+            if failed:
+                self._stats["failed_batches"] += 1
+        return written, rejected
+
+    def _drop(self, doc_id, update):
+        """Log an update that MongoDB rejected permanently; retrying it would only block the ones behind it."""
+        logging.error(f"[MongoWriteBehind] Dropping rejected update for _id {doc_id}: {update}")
+        self._count("dropped")
+
+    def _write_batch(self, batch):
+        while batch:
+            requests = [UpdateOne({"_id": doc_id}, update, upsert=upsert) for doc_id, (update, upsert) in batch]
+            written, rejected = self._bulk_write(requests)
+            if not rejected:
+                if written < len(batch):
+                    self._requeue(batch[written:])
+                    return False
+                return True
+            doc_id, (update, _) = batch[written]
+            self._drop(doc_id, update)
+            batch = batch[written + 1:]
+        return True
+
+    def _replay_spool(self):
+        """
+        Write spooled updates, oldest first, until the spool is empty.
+
+        Returns:
+            bool: True if the spool is empty (or absent), False if a write failed.
+        """
+        if self.spool is None:
+            return True
+        while len(self.spool):
+            entries = self.spool.peek(self.batch_size)
+            requests = [UpdateOne({"_id": doc_id}, update, upsert=upsert) for _, doc_id, update, upsert in entries]
+            written, rejected = self._bulk_write(requests)
+            if rejected:
+                _, doc_id, update, _ = entries[written]
+                self._drop(doc_id, update)
+            done = written + rejected
+            if done:
+                self.spool.remove_through(entries[done - 1][0])
+                with self._stats_lock:
+                    self._stats["replayed"] += written
+            if written < len(entries) and not rejected:
+                return False
+            if self.breaker is not None and not self.breaker.allow():
+                return False
+        return True
+
+    def _spool_pending(self):
+        """Move pending updates to the durable spool (no-op without one: they stay pending in memory)."""
+        if self.spool is None or not self._pending:
+            return
+        entries = [(doc_id, update, upsert) for doc_id, (update, upsert) in self._pending.items()]
+        try:
+            self.spool.append(entries)
+        except Exception:
+            logging.exception("[MongoWriteBehind] Could not spool updates; keeping them in memory")
+            return
+        self._pending.clear()
+        with self._stats_lock:
+            self._stats["spooled"] += len(entries)
+
+    def _requeue(self, failed):
+        """Put failed updates back ahead of anything queued for the same _id since."""
+        newer = self._pending
+        self._pending = OrderedDict(failed)
+        for doc_id, (update, upsert) in newer.items():
+            if doc_id in self._pending:
+                failed_update, failed_upsert = self._pending[doc_id]
+                self._pending[doc_id] = (merge_updates(failed_update, update), failed_upsert or upsert)
+            else:
+                self._pending[doc_id] = (update, upsert)
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    # === Lifecycle / monitoring ===
+    def close(self, timeout=10.0):
+        """Stop the worker after a final flush of everything queued."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._worker.join(timeout)
+
+    def stats(self):
+        """
+        Returns:
+            dict: queue depth, pending coalesced documents, spooled updates awaiting replay and cumulative
+            write/backpressure counters.
+        """
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot["queue_depth"] = self._queue.qsize()
+        snapshot["pending_documents"] = len(self._pending)
+        snapshot["spool_depth"] = len(self.spool) if self.spool is not None else 0
+        return snapshot
@@ -0,0 +1,316 @@
+"""
+Process-wide admission control and rate limiting for OpenAI calls.
+
+Every session shares one OpenAI client, so without limits a traffic spike
+turns into an unbounded number of concurrent runs and a wave of 429s. The
+scheduler adds:
+
+- a concurrency cap on reply turns (``admit``), with a bounded wait in line
+- a token bucket on outgoing HTTP requests (``on_request`` hook)
+- tracking of the ``x-ratelimit-*`` response headers (``on_response`` hook):
+  when the remaining request budget runs out, new requests wait for the reset
+- retries with exponential backoff and jitter (``call``), honouring
+  ``retry-after``, limited by a per-turn retry budget
+
+The two hooks are installed as httpx event hooks on the client's HTTP client
+(see ``http_client``), so every SDK call goes through the token bucket.
+
+The openai package is only imported once a client is built or a call fails,
+so creating the scheduler does not slow down the page's first render.
+"""
+
+import contextvars
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import metrics
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class SchedulerBusy(Exception):
+    """Raised when a call could not be admitted in time or ran out of retries while rate limited."""
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors():
+    """Errors worth retrying: rate limits, timeouts, dropped connections and 5xx."""
+    import openai
+
+    return (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def parse_reset(value):
+    """
+    Parse a rate-limit reset duration such as "1s", "6m0s" or "20ms" into seconds.
+
+    Returns:
+        float: seconds, or None when the header is missing or malformed.
+    """
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(exc):
+    """Seconds the server asked us to wait (retry-after-ms / retry-after headers), or None."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class TokenBucket:
+    """
+    Classic token bucket: ``rate`` tokens per second, holding at most ``burst``.
+
+    ``acquire`` blocks until a token is available (or ``timeout`` passes);
+    ``try_acquire`` never blocks.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Returns:
+            float: seconds spent waiting, or None if no token became available within ``timeout``.
+        """
+        start = self._clock()
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self._clock() - start
+                wait = (1 - self._tokens) / self.rate
+            if timeout is not None and self._clock() - start + wait > timeout:
+                return None
+            self._sleep(wait)
+
+
+class _RetryBudget:
+    __slots__ = ("retries", "deadline")
+
+    def __init__(self, retries, deadline):
+        self.retries = retries
+        self.deadline = deadline
+
+
+_turn_budget = contextvars.ContextVar("openai_retry_budget", default=None)
+
+
+class OpenAIScheduler:
+    """
+    Concurrency cap, request-rate token bucket, rate-limit header tracking and budgeted retries.
+
+    Parameters:
+        max_concurrency (int): Reply turns allowed to talk to OpenAI at once (0 = unlimited).
+        requests_per_second (float): Sustained HTTP request rate (0 = unlimited).
+        burst (int): Requests that may be sent back to back before the rate applies.
+        queue_timeout (float): Longest a turn or request waits for admission before SchedulerBusy.
+        max_retries (int): Retries allowed per turn, shared by all of its calls.
+        retry_budget (float): Seconds per turn after which no further retries are started.
+        backoff (float): Base delay (s) of the exponential backoff; capped at max_backoff.
+    """
+
+    def __init__(self, max_concurrency=8, requests_per_second=10.0, burst=20, queue_timeout=20.0,
+                 max_retries=3, retry_budget=30.0, backoff=0.5, max_backoff=8.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self._bucket = TokenBucket(requests_per_second, burst, clock, sleep) if requests_per_second > 0 else None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._stats = {
+            "admitted": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "waiting": 0,
+            "max_waiting": 0,
+            "requests": 0,
+            "throttled_requests": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "budget_exhausted": 0,
+            "remaining_requests": -1,
+            "remaining_tokens": -1,
+        }
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    # === Admission (per reply turn) ===
+    @contextmanager
+    def admit(self):
+        """
+        Hold one of ``max_concurrency`` slots for a reply turn, and give the turn its retry budget.
+
+        Raises:
+            SchedulerBusy: no slot freed up within ``queue_timeout`` seconds.
+        """
+        start = self._clock()
+        if self._slots is not None:
+            with self._lock:
+                self._stats["waiting"] += 1
+                self._stats["max_waiting"] = max(self._stats["max_waiting"], self._stats["waiting"])
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                self._bump("waiting", -1)
+            if not acquired:
+                self._bump("rejected")
+                raise SchedulerBusy(f"no OpenAI slot free within {self.queue_timeout:g}s")
+        metrics.observe("openai.queue_wait", self._clock() - start)
+        with self._lock:
+            self._stats["admitted"] += 1
+            self._stats["in_flight"] += 1
+        token = _turn_budget.set(_RetryBudget(self.max_retries, self._clock() + self.retry_budget))
+        try:
+            yield
+        finally:
+            _turn_budget.reset(token)
+            self._bump("in_flight", -1)
+            if self._slots is not None:
+                self._slots.release()
+
+    # === Retries ===
+    def call(self, fn, *args, retry_if=None, **kwargs):
+        """
+        Call ``fn(*args, **kwargs)``, retrying retryable_errors() with backoff while the turn's budget lasts.
+
+        ``retry_if`` (optional, no arguments) can veto a retry, e.g. once part of a streamed reply
+        has been shown. Outside ``admit`` each call gets a budget of its own.
+
+        Raises:
+            SchedulerBusy: still rate limited when the budget ran out.
+        """
+        budget = _turn_budget.get() or _RetryBudget(self.max_retries, self._clock() + self.retry_budget)
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except retryable_errors() as exc:
+                if isinstance(exc.__cause__, SchedulerBusy):
+                    # Raised by on_request; some SDK versions wrap hook errors as connection errors
+                    raise exc.__cause__ from None
+                rate_limited = getattr(exc, "status_code", None) == 429  # openai.RateLimitError
+                if rate_limited:
+                    self._bump("rate_limited")
+                delay = retry_after(exc)
+                if delay is None:
+                    delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if budget.retries <= 0 or self._clock() + delay > budget.deadline or (retry_if and not retry_if()):
+                    self._bump("budget_exhausted")
+                    if rate_limited:
+                        raise SchedulerBusy("OpenAI rate limit persisted through the retry budget") from exc
+                    raise
+                budget.retries -= 1
+                attempt += 1
+                self._bump("retries")
+                logging.warning(f"[OpenAIScheduler] {type(exc).__name__}; retry {attempt} in {delay:.2f}s")
+                self._sleep(delay)
+
+    # === HTTP hooks (every request the SDK sends) ===
+    def on_request(self, request):
+        """httpx request hook: wait out a rate-limit reset and take a token from the bucket."""
+        self._bump("requests")
+        pause = self._paused_until - self._clock()
+        if pause > 0:
+            self._bump("throttled_requests")
+            self._sleep(min(pause, self.queue_timeout))
+        if self._bucket is not None:
+            waited = self._bucket.acquire(timeout=self.queue_timeout)
+            if waited is None:
+                self._bump("rejected")
+                raise SchedulerBusy("request rate limit: no token within the queue timeout")
+            if waited > 0:
+                self._bump("throttled_requests")
+                metrics.observe("openai.rate_wait", waited)
+
+    def on_response(self, response):
+        """httpx response hook: track x-ratelimit-* headers and pause new requests when the budget is spent."""
+        headers = response.headers
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        with self._lock:
+            if remaining_requests is not None and remaining_requests.isdigit():
+                self._stats["remaining_requests"] = int(remaining_requests)
+            if remaining_tokens is not None and remaining_tokens.isdigit():
+                self._stats["remaining_tokens"] = int(remaining_tokens)
+        exhausted = remaining_requests == "0" or remaining_tokens == "0" or response.status_code == 429
+        if exhausted:
+            reset = max(parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                        parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+            if reset:
+                with self._lock:
+                    self._paused_until = max(self._paused_until, self._clock() + reset)
+
+    def http_client(self, max_connections=100, max_keepalive=20):
+        """
+        An HTTP client for ``OpenAI(http_client=...)`` with a sized connection pool and the scheduler hooks.
+        """
+        import openai
+        try:
+            import httpx2 as httpx  # openai 3.x clients are built on httpx2
+        except ImportError:
+            import httpx
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        return openai.DefaultHttpxClient(limits=limits,
+                                         event_hooks={"request": [self.on_request], "response": [self.on_response]})
+
+    def stats(self):
+        """
+        Returns:
+            dict: turns admitted/rejected, in flight and waiting (queue depth), requests sent and throttled,
+            429s, retries, exhausted budgets, the last seen remaining request/token budgets and seconds paused.
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["paused_seconds"] = round(max(0.0, self._paused_until - self._clock()), 2)
+        return snapshot
@@ -0,0 +1,82 @@
+"""
+Dirty-tracked persistence of chat sessions to MongoDB.
+
+Instead of re-sending the whole session on every rerun, remember what was last
+flushed (in session state, so it survives reruns) and build an update that
+``$push``es only new messages and ``$set``s only scalar fields that changed.
+Message counts are absolute (see utils.transcript): messages that already left
+the in-memory window are counted through ``messages_offset``.
+"""
+
+from datetime import datetime
+
+from utils.transcript import OFFSET_KEY, to_document
+
+# Scalar session fields mirrored onto the chat document
+SESSION_FIELDS = (
+    "thread_id",
+    "chat_start_time",
+    "appointment_phone",
+    "appointment_email",
+    "preferred_time",
+    "rating",
+    "context_summary",
+    "summary_upto",
+)
+
+# Session-state keys holding the last flushed snapshot
+PERSISTED_ID_KEY = "persisted_mongo_id"
+PERSISTED_COUNT_KEY = "persisted_message_count"
+PERSISTED_FIELDS_KEY = "persisted_fields"
+
+
+def pending_update(state):
+    """
+    Build the MongoDB update needed to bring the session document up to date.
+
+    Parameters:
+        state: st.session_state (or any mapping) holding mongo_id, messages and SESSION_FIELDS.
+
+    Returns:
+        tuple: (update document or None if nothing changed, snapshot to pass to mark_persisted).
+    """
+    mongo_id = state.get("mongo_id")
+    messages = state.get("messages", [])
+    offset = state.get(OFFSET_KEY, 0)
+    total = offset + len(messages)
+    flushed_count = persisted_count(state)
+    flushed_fields = state.get(PERSISTED_FIELDS_KEY, {}) if state.get(PERSISTED_ID_KEY) == mongo_id else {}
+
+    fields = {key: state.get(key) for key in SESSION_FIELDS}
+    changed = {key: value for key, value in fields.items()
+               if key not in flushed_fields or flushed_fields[key] != value}
+
+    update = {}
+    if total < flushed_count:
+        # Transcript was reset rather than appended to; rewrite it
+        changed["messages"] = [to_document(m) for m in messages]
+    elif total > flushed_count:
+        update["$push"] = {"messages": {"$each": [to_document(m) for m in messages[flushed_count - offset:]]}}
+
+    snapshot = (mongo_id, total, fields)
+    if not update and not changed:
+        return None, snapshot
+
+    changed["updated_at"] = datetime.now()
+    update["$set"] = changed
+    return update, snapshot
+
+
+def persisted_count(state):
+    """Messages of the current document already handed to MongoDB (0 for a new document)."""
+    if state.get(PERSISTED_ID_KEY) != state.get("mongo_id"):
+        return 0
+    return state.get(PERSISTED_COUNT_KEY, 0)
+
+
+def mark_persisted(state, snapshot):
+    """Record a successfully applied update so the next pending_update only carries newer changes."""
+    mongo_id, message_count, fields = snapshot
+    state[PERSISTED_ID_KEY] = mongo_id
+    state[PERSISTED_COUNT_KEY] = message_count
+    state[PERSISTED_FIELDS_KEY] = fields
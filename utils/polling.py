@@ -0,0 +1,148 @@
+"""
+Run-polling engine for the OpenAI Assistants API.
+
+Waits for a run to reach a terminal state using bounded exponential backoff with
+jitter and a configurable deadline, and keeps process-wide counters (polls per
+turn, time spent waiting) so deployments can be sized from real traffic.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from utils import metrics
+
+# Run states after which polling stops (see the Assistants run lifecycle)
+TERMINAL_STATES = {"completed", "failed", "cancelled", "expired", "incomplete", "requires_action"}
+
+# Pseudo-status reported when the deadline passes before the run finishes
+TIMEOUT_STATUS = "timeout"
+
+
+class PollResult:
+    """Outcome of waiting on one run."""
+
+    __slots__ = ("run", "status", "polls", "waited")
+
+    def __init__(self, run, status, polls, waited):
+        self.run = run
+        self.status = status
+        self.polls = polls
+        self.waited = waited
+
+    @property
+    def completed(self):
+        return self.status == "completed"
+
+
+class RunPoller:
+    """
+    Poll ``runs.retrieve`` until a run finishes, backing off between polls.
+
+    The first poll happens after ``initial_interval`` seconds; each following
+    interval is multiplied by ``multiplier`` up to ``max_interval`` and jittered
+    by +/- ``jitter`` (a fraction) so concurrent sessions do not poll in lockstep.
+    Runs that outlive ``deadline`` seconds, or stop in ``requires_action`` (this
+    assistant has no tools to satisfy it), are cancelled so they stop consuming
+    tokens.
+    """
+
+    def __init__(self, client, initial_interval=0.25, max_interval=2.0, multiplier=1.6,
+                 jitter=0.2, deadline=60.0, sleep=time.sleep, clock=time.monotonic, call=None):
+        self.client = client
+        self._call = call or (lambda fn, **kwargs: fn(**kwargs))  # e.g. OpenAIScheduler.call for retries
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._turns = 0
+        self._polls = 0
+        self._wait_time = 0.0
+        self._max_polls = 0
+        self._max_wait = 0.0
+        self._statuses = {}
+
+    def next_interval(self, interval):
+        """Return the jittered sleep for ``interval`` and the base interval for the following poll."""
+        jittered = interval * (1 + random.uniform(-self.jitter, self.jitter))
+        return jittered, min(interval * self.multiplier, self.max_interval)
+
+    def wait(self, thread_id, run_id):
+        """
+        Block until the run reaches a terminal state or the deadline passes.
+
+        Parameters:
+            thread_id (str): Assistant thread the run belongs to.
+            run_id (str): Run to wait on.
+
+        Returns:
+            PollResult: the last retrieved run, its status (or "timeout"), polls made and seconds waited.
+        """
+        start = self._clock()
+        interval = self.initial_interval
+        polls = 0
+        run = None
+
+        while True:
+            with metrics.span("openai.run_poll"):
+                run = self._call(self.client.beta.threads.runs.retrieve, thread_id=thread_id, run_id=run_id)
+            polls += 1
+            status = run.status
+            if status in TERMINAL_STATES:
+                break
+
+            remaining = self.deadline - (self._clock() - start)
+            if remaining <= 0:
+                status = TIMEOUT_STATUS
+                break
+
+            delay, interval = self.next_interval(interval)
+            self._sleep(min(delay, remaining))
+
+        if status in (TIMEOUT_STATUS, "requires_action"):
+            self._cancel(thread_id, run_id)
+
+        result = PollResult(run, status, polls, self._clock() - start)
+        self._record(result)
+        logging.info(f"[RunPoller] run {run_id} -> {status} after {polls} polls in {result.waited:.2f}s")
+        return result
+
+    def _cancel(self, thread_id, run_id):
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception:
+            logging.warning(f"[RunPoller] Could not cancel run {run_id}", exc_info=True)
+
+    def _record(self, result):
+        with self._lock:
+            self._turns += 1
+            self._polls += result.polls
+            self._wait_time += result.waited
+            self._max_polls = max(self._max_polls, result.polls)
+            self._max_wait = max(self._max_wait, result.waited)
+            self._statuses[result.status] = self._statuses.get(result.status, 0) + 1
+
+    def stats(self):
+        """
+        Snapshot of the counters accumulated across all turns in this process.
+
+        Returns:
+            dict: turns, total polls and wait time, per-turn averages and maxima, and a count per final status.
+        """
+        with self._lock:
+            turns = self._turns
+            return {
+                "turns": turns,
+                "polls": self._polls,
+                "wait_seconds": round(self._wait_time, 3),
+                "avg_polls_per_turn": round(self._polls / turns, 2) if turns else 0.0,
+                "avg_wait_seconds": round(self._wait_time / turns, 3) if turns else 0.0,
+                "max_polls_per_turn": self._max_polls,
+                "max_wait_seconds": round(self._max_wait, 3),
+                "statuses": dict(self._statuses),
+            }
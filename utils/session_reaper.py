@@ -0,0 +1,237 @@
+"""
+Background reaper for idle chat sessions.
+
+Streamlit keeps a session's state for as long as its browser tab stays
+connected, so a chat left open in a forgotten tab holds its transcript, thread
+id and caches indefinitely. The reaper wakes up every ``interval`` seconds,
+looks at every session this server process knows about and hands the ones
+whose last activity is older than ``idle_timeout`` to a ``reap`` callback,
+then asks the session to rerun. The callback only flags the session (the Chat
+page sets IDLE_ENDED_KEY); the session's own script run then saves the chat,
+marks it ended and drops its transcript, so no other state is changed from the
+reaper thread while a run might be using it.
+
+That rerun is of whichever page the visitor is on, so the Chat page registers
+its handler with ``set_idle_handler`` and every page calls ``end_flagged_chat``.
+A session still flagged at the next scan is asked to rerun again; it counts as
+reaped once its chat has actually ended.
+
+Sessions are enumerated through the Streamlit runtime's session manager, which
+has no public API for this; if the internals change the reaper logs once and
+reports no sessions instead of failing.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+# Session-state key holding the time.time() of the session's latest Chat page run
+LAST_ACTIVITY_KEY = "last_activity"
+# Session-state key set by the reap callback; the session's next run ends the chat
+IDLE_ENDED_KEY = "idle_ended"
+
+# Ends the current session's flagged chat (registered by the Chat page, run by every page)
+_idle_handler = None
+
+
+class SessionStateView:
+    """
+    Mapping-style access to another session's SessionState from a background thread.
+
+    Writes go through ``reset_state_value``, which (unlike ``st.session_state[...] = ...``) does not
+    expect to run inside that session's script thread. ``request_rerun`` starts a run of the session's
+    current page (a no-op when no ``rerun`` callable is given).
+    """
+
+    def __init__(self, session_state, rerun=None):
+        self._state = session_state
+        self._rerun = rerun
+
+    def request_rerun(self):
+        if self._rerun is not None:
+            self._rerun()
+
+    def __getitem__(self, key):
+        return self._state[key]
+
+    def __setitem__(self, key, value):
+        self._state.reset_state_value(key, value)
+
+    def __contains__(self, key):
+        try:
+            self._state[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self._state[key]
+        except KeyError:
+            return default
+
+
+def runtime_sessions():
+    """
+    Every session of this server process that is not running a script right now.
+
+    Returns:
+        list: (session id, SessionStateView) pairs; empty outside ``streamlit run``.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.app_session import AppSessionState
+
+    if not Runtime.exists():
+        return []
+    sessions = []
+    for info in Runtime.instance()._session_mgr.list_sessions():
+        session = info.session
+        if getattr(session, "_state", None) == AppSessionState.APP_IS_RUNNING:
+            continue  # mid-rerun, so not idle
+        sessions.append((session.id, SessionStateView(session.session_state, functools.partial(_rerun, session))))
+    return sessions
+
+
+def _rerun(session):
+    # Same request Streamlit makes to rerun the current page when its source changes
+    session.request_rerun(session._client_state)
+
+
+# === Ending flagged chats ===
+def set_idle_handler(handler):
+    """Register ``handler()``, which ends the current session's chat after the reaper flagged it."""
+    global _idle_handler
+    _idle_handler = handler
+
+
+def end_flagged_chat():
+    """
+    End the current session's chat if the reaper flagged it. Called near the top of every page.
+
+    Returns:
+        bool: True if the chat was ended by this call.
+    """
+    import streamlit as st
+
+    if _idle_handler is None or not st.session_state.get(IDLE_ENDED_KEY):
+        return False
+    return bool(_idle_handler())
+
+
+class SessionReaper:
+    """
+    Periodically hand chat sessions idle for longer than ``idle_timeout`` seconds to ``reap(state)``.
+
+    Only sessions with a LAST_ACTIVITY_KEY (i.e. that opened the Chat page) and ``is_live(state)``
+    true are considered; ``reap`` is expected to set IDLE_ENDED_KEY, which the session's own run
+    clears once it has dealt with it. After ``reap`` the session is asked to rerun
+    (``state.request_rerun()``, when the state has it), and again at every scan while the flag is set.
+    A flagged session counts as reaped once the flag is cleared and ``is_live`` is false; if the
+    visitor came back first, it is live again.
+    """
+
+    def __init__(self, reap, is_live, idle_timeout=900.0, interval=60.0, list_sessions=runtime_sessions,
+                 clock=time.time):
+        self.reap = reap
+        self.is_live = is_live
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self._list_sessions = list_sessions
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._warned = False
+        self._flagged = set()  # ids of sessions flagged by reap whose run has not cleared the flag yet
+        self._stats = {
+            "sessions": 0,
+            "live_chats": 0,
+            "waiting": 0,
+            "reaped": 0,
+            "failures": 0,
+            "scans": 0,
+            "last_scan_seconds": 0.0,
+        }
+        self._worker = threading.Thread(target=self._run, name="session-reaper", daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.scan()
+
+    def scan(self):
+        """
+        Flag every idle chat session now, and count the flagged ones whose chat has ended since.
+
+        Returns:
+            int: sessions flagged by this scan.
+        """
+        start = time.perf_counter()
+        try:
+            sessions = self._list_sessions()
+        except Exception:
+            if not self._warned:
+                logging.exception("[SessionReaper] Could not list sessions; idle sessions will not be reaped")
+                self._warned = True
+            sessions = []
+
+        now = self._clock()
+        live = flagged = waiting = reaped = failures = 0
+        seen = set()
+        for session_id, state in sessions:
+            seen.add(session_id)
+            try:
+                if state.get(IDLE_ENDED_KEY):
+                    # Not handled yet (the rerun was lost or the write queue was full): ask again
+                    waiting += 1
+                    self._request_rerun(state)
+                    continue
+                if session_id in self._flagged:
+                    self._flagged.discard(session_id)
+                    if not self.is_live(state):
+                        reaped += 1
+                        logging.info(f"[SessionReaper] Session {session_id} ended its idle chat")
+                        continue
+
+                last_activity = state.get(LAST_ACTIVITY_KEY)
+                if last_activity is None or not self.is_live(state):
+                    continue
+                live += 1
+                if now - last_activity < self.idle_timeout:
+                    continue
+                self.reap(state)
+                self._request_rerun(state)
+                self._flagged.add(session_id)
+                flagged += 1
+                logging.info(f"[SessionReaper] Flagged session {session_id} after {now - last_activity:.0f}s idle")
+            except Exception:
+                failures += 1
+                logging.exception(f"[SessionReaper] Could not reap session {session_id}")
+        self._flagged &= seen  # forget closed sessions
+
+        with self._lock:
+            self._stats["sessions"] = len(sessions)
+            self._stats["live_chats"] = live - flagged
+            self._stats["waiting"] = waiting + flagged
+            self._stats["reaped"] += reaped
+            self._stats["failures"] += failures
+            self._stats["scans"] += 1
+            self._stats["last_scan_seconds"] = round(time.perf_counter() - start, 4)
+        return flagged
+
+    @staticmethod
+    def _request_rerun(state):
+        if hasattr(state, "request_rerun"):
+            state.request_rerun()
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self):
+        """
+        Returns:
+            dict: sessions in the process, live chats and flagged chats not ended yet (waiting) at the last
+            scan, and cumulative reaped/failed counts.
+        """
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,195 @@
+"""
+Cold-start helpers for the page scripts.
+
+Profiling mode (STARTUP_PROFILE=1): each page script calls ``page_start`` as
+its first statement and ``page_end`` as its last. For the first run of every
+page in the process this records the time spent in each top-level import the
+run triggered (nested imports are billed to the import that pulled them in)
+and the time of the whole first run. Results are logged, observed as the
+``startup.<page>.imports`` / ``startup.<page>.first_run`` spans, and written
+to STARTUP_PROFILE_PATH (JSON, one entry per page) when that is set.
+
+``lazy`` defers building a heavy client, and importing its library, until the
+client is first used; ``warm_up`` builds it in the background once the page
+has rendered, then freezes the heap.
+
+Streamlit runs a full gc.collect() after every script run (runner.postScriptGC).
+With the OpenAI SDK's models loaded that walks ~100 ms of long-lived objects on
+each rerun, so ``freeze_heap`` moves the heap as it stands once the shared
+resources and the client exist out of the collector's view (once per process).
+"""
+
+import builtins
+import gc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "").strip().lower() in ("1", "true", "yes")
+STARTUP_PROFILE_PATH = os.getenv("STARTUP_PROFILE_PATH")
+
+# Imports listed per page in the log line (all of them go to the JSON report)
+TOP_IMPORTS = 8
+
+_original_import = builtins.__import__
+_local = threading.local()  # profile of the first run in progress on this (script) thread
+_profiles = {}  # page -> report, once its first run finished
+_started = set()
+_frozen = False
+_lock = threading.Lock()
+
+
+# === Profiling mode ===
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    profile = getattr(_local, "profile", None)
+    if profile is None or _local.depth:
+        if profile is None:
+            return _original_import(name, globals, locals, fromlist, level)
+        _local.depth += 1
+        try:
+            return _original_import(name, globals, locals, fromlist, level)
+        finally:
+            _local.depth -= 1
+
+    _local.depth = 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = 0
+        if level:  # relative import: bill it to the absolute module name
+            package = (globals or {}).get("__package__") or ""
+            package = package.rsplit(".", level - 1)[0]
+            name = f"{package}.{name}" if name else package
+        imports = profile["imports"]
+        imports[name] = imports.get(name, 0.0) + time.perf_counter() - start
+
+
+def page_start(page):
+    """Start profiling the first run of ``page`` (no-op unless STARTUP_PROFILE is set)."""
+    _local.profile = None  # a previous first run that ended early (st.stop / st.rerun) is not reported
+    if not STARTUP_PROFILE:
+        return
+    with _lock:
+        if page in _started:
+            return
+        _started.add(page)
+        builtins.__import__ = _profiled_import
+    _local.depth = 0
+    _local.profile = {
+        "page": page,
+        "start": time.perf_counter(),
+        "modules_before": len(sys.modules),
+        "imports": {},
+    }
+
+
+def page_end(page):
+    """Finish the profile started by ``page_start`` and report it."""
+    profile = getattr(_local, "profile", None)
+    _local.profile = None
+    if profile is None or profile["page"] != page:
+        return
+
+    from utils import metrics
+
+    first_run = time.perf_counter() - profile["start"]
+    imports = sorted(profile["imports"].items(), key=lambda item: item[1], reverse=True)
+    import_seconds = sum(seconds for _, seconds in imports)
+    report = {
+        "first_run_ms": round(first_run * 1000, 1),
+        "import_ms": round(import_seconds * 1000, 1),
+        "modules_loaded": len(sys.modules) - profile["modules_before"],
+        "imports_ms": {name: round(seconds * 1000, 1) for name, seconds in imports if seconds >= 0.0005},
+    }
+    metrics.observe(f"startup.{page}.imports", import_seconds)
+    metrics.observe(f"startup.{page}.first_run", first_run)
+    slowest = "".join(f"; {name} {seconds * 1000:.0f}" for name, seconds in imports[:TOP_IMPORTS] if seconds >= 0.0005)
+    logging.info(f"[startup] {page}: first run {report['first_run_ms']} ms, imports {report['import_ms']} ms "
+                 f"({report['modules_loaded']} modules{slowest})")
+
+    with _lock:
+        _profiles[page] = report
+        if STARTUP_PROFILE_PATH:
+            try:
+                with open(STARTUP_PROFILE_PATH, "w") as f:
+                    json.dump(_profiles, f, indent=2)
+            except OSError:
+                logging.exception(f"[startup] Could not write {STARTUP_PROFILE_PATH}")
+
+
+def profiles():
+    """
+    Returns:
+        dict: page -> first-run report (first_run_ms, import_ms, modules_loaded, imports_ms by module).
+    """
+    with _lock:
+        return dict(_profiles)
+
+
+# === Deferred construction ===
+class Lazy:
+    """
+    Stand-in for the object ``factory()`` returns, built on first attribute access (thread-safe).
+
+    Everything except ``built`` is forwarded to the real object, so callers use it as they would the object.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+        return self._value
+
+    @property
+    def built(self):
+        return self._value is not None
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+def lazy(factory):
+    """Wrap ``factory`` (no arguments) in a Lazy stand-in."""
+    return Lazy(factory)
+
+
+def warm_up(obj):
+    """
+    Build a Lazy object on a background thread, so the first request does not pay for it, then freeze the heap.
+    """
+    if isinstance(obj, Lazy) and not obj.built:
+        def build():
+            try:
+                obj._get()
+            except Exception:
+                logging.exception("[startup] Background warm-up failed; building on first use instead")
+            freeze_heap()
+        threading.Thread(target=build, name="startup-warm-up", daemon=True).start()
+    else:
+        freeze_heap()
+
+
+# === Heap freezing ===
+def freeze_heap():
+    """
+    Move every object alive now into the GC's permanent generation (first call per process only),
+    so later collections only scan objects created by reruns.
+    """
+    global _frozen
+    with _lock:
+        if _frozen:
+            return
+        _frozen = True
+    gc.collect()
+    gc.freeze()
+    logging.info(f"[startup] Froze {gc.get_freeze_count()} startup objects")
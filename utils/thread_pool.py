@@ -0,0 +1,90 @@
+"""
+Process-wide pool of pre-created OpenAI Assistants threads.
+
+Creating a thread costs an API round trip. Keeping a few ready means the first
+message of a chat can start its run immediately, and threads are only handed
+out to sessions that actually send a message.
+"""
+
+import logging
+import queue
+import threading
+
+
+class AssistantThreadPool:
+    """
+    Hands out pre-created thread ids and refills itself on a background worker.
+
+    ``create_thread`` is a zero-argument callable returning a new thread id. When
+    the pool is empty (or ``size`` is 0) ``acquire`` falls back to creating a
+    thread synchronously, so callers never wait on the refill worker.
+    """
+
+    def __init__(self, create_thread, size=3, retry_delay=5.0):
+        self.create_thread = create_thread
+        self.size = size
+        self.retry_delay = retry_delay
+        self._ready = queue.Queue()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._created = 0
+        self._worker = None
+        if size > 0:
+            self._worker = threading.Thread(target=self._refill_loop, name="assistant-thread-pool", daemon=True)
+            self._worker.start()
+            self._wakeup.set()
+
+    def acquire(self):
+        """
+        Take a thread id for a new conversation.
+
+        Returns:
+            str: an unused assistant thread id.
+        """
+        try:
+            thread_id = self._ready.get_nowait()
+            with self._lock:
+                self._hits += 1
+        except queue.Empty:
+            with self._lock:
+                self._misses += 1
+            thread_id = self._create()
+        self._wakeup.set()
+        return thread_id
+
+    def _create(self):
+        thread_id = self.create_thread()
+        with self._lock:
+            self._created += 1
+        return thread_id
+
+    def _refill_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._ready.qsize() < self.size:
+                try:
+                    self._ready.put(self._create())
+                except Exception:
+                    logging.warning("[AssistantThreadPool] Failed to pre-create thread", exc_info=True)
+                    # Back off, then try again without waiting for the next acquire
+                    self._wakeup.wait(self.retry_delay)
+                    break
+            else:
+                continue
+            self._wakeup.set()
+
+    def stats(self):
+        """
+        Returns:
+            dict: ready threads, pool hits/misses and total threads created by this process.
+        """
+        with self._lock:
+            return {
+                "ready": self._ready.qsize(),
+                "hits": self._hits,
+                "misses": self._misses,
+                "created": self._created,
+            }
@@ -0,0 +1,110 @@
+"""
+Bounded in-memory chat transcript.
+
+``st.session_state.messages`` holds only the most recent part of the
+conversation as compact ``ChatMessage`` records; ``messages_offset`` is the
+index of its first message in the full transcript, which lives in the
+session's MongoDB document. Messages leave memory (``trim_transcript``) only
+once they have been persisted, and older ones can be read back a page at a
+time (``fetch_messages``) to show on request.
+"""
+
+from datetime import datetime
+
+# Session-state keys
+OFFSET_KEY = "messages_offset"  # index of messages[0] in the full transcript
+EARLIER_KEY = "earlier_messages"  # older messages loaded from MongoDB for display only
+
+# Fields stored on assistant messages besides role / content / created_at
+REPLY_FIELDS = ("source", "kb_score", "latency_ms", "prompt_tokens", "completion_tokens")
+
+
+class ChatMessage:
+    """
+    One chat message. Also readable like the dicts it replaces (``msg["role"]``, ``msg.get("content")``).
+
+    ``created_at`` is a datetime; ``to_doc`` gives the MongoDB form (ISO timestamp) and ``from_doc`` reverses it.
+    """
+
+    __slots__ = ("role", "content", "created_at") + REPLY_FIELDS
+
+    def __init__(self, role, content, created_at=None, source=None, kb_score=None, latency_ms=None,
+                 prompt_tokens=None, completion_tokens=None):
+        self.role = role
+        self.content = content
+        self.created_at = created_at or datetime.now()
+        self.source = source
+        self.kb_score = kb_score
+        self.latency_ms = latency_ms
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if isinstance(key, str) else None
+        return default if value is None else value
+
+    def to_doc(self):
+        doc = {"role": self.role, "content": self.content, "created_at": self.created_at.isoformat()}
+        if self.role == "assistant":
+            doc.update((field, getattr(self, field)) for field in REPLY_FIELDS)
+        return doc
+
+    @classmethod
+    def from_doc(cls, doc):
+        created_at = doc.get("created_at")
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return cls(doc.get("role", ""), doc.get("content", ""), created_at,
+                   **{field: doc.get(field) for field in REPLY_FIELDS})
+
+    def __repr__(self):
+        return f"ChatMessage({self.role!r}, {self.content[:30]!r})"
+
+
+def to_document(msg):
+    """MongoDB form of a message (ChatMessage or plain dict)."""
+    return msg.to_doc() if isinstance(msg, ChatMessage) else dict(msg)
+
+
+def message_count(state):
+    """Number of messages in the whole conversation, in memory or not."""
+    return state.get(OFFSET_KEY, 0) + len(state.get("messages", []))
+
+
+def trim_transcript(state, keep, floor):
+    """
+    Drop the oldest in-memory messages beyond the last ``keep``, but none at or after absolute index ``floor``
+    (messages not yet persisted or still needed as model context). Earlier pages shown on request are dropped too.
+
+    Returns:
+        int: messages dropped from the window.
+    """
+    messages = state["messages"]
+    offset = state.get(OFFSET_KEY, 0)
+    drop = min(len(messages) - keep, floor - offset)
+    if drop <= 0:
+        return 0
+    del messages[:drop]
+    state[OFFSET_KEY] = offset + drop
+    state[EARLIER_KEY] = []
+    return drop
+
+
+def fetch_messages(collection, doc_id, start, count):
+    """
+    Read ``count`` messages starting at absolute index ``start`` from the session document.
+
+    Returns:
+        list: ChatMessage records, oldest first (fewer if the document is shorter).
+    """
+    doc = collection.find_one({"_id": doc_id}, {"messages": {"$slice": [start, count]}, "_id": 0})
+    return [ChatMessage.from_doc(m) for m in (doc or {}).get("messages", [])]
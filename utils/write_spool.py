@@ -0,0 +1,74 @@
+"""
+Durable, ordered spool of MongoDB updates that could not be written.
+
+While the database is unreachable the write-behind worker appends updates to a
+local SQLite file instead of holding them in memory, so they survive a restart.
+When connectivity returns they are read back oldest first and replayed before
+any newer update, preserving write order per document. Documents are stored as
+MongoDB Extended JSON, so ObjectIds and datetimes round-trip unchanged.
+"""
+
+import os
+import sqlite3
+import threading
+
+from bson import json_util
+
+
+class WriteSpool:
+    """
+    Append-only queue of ``(doc_id, update, upsert)`` entries in a SQLite file.
+
+    ``peek`` returns the oldest entries with their sequence numbers; entries are
+    removed with ``remove_through`` once they have been written to MongoDB.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS spool (seq INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT NOT NULL)")
+        self._depth = self._db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def append(self, entries):
+        """Durably add ``[(doc_id, update, upsert), ...]`` after everything already spooled."""
+        rows = [(json_util.dumps({"_id": doc_id, "update": update, "upsert": upsert}),) for doc_id, update, upsert in entries]
+        if not rows:
+            return
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT INTO spool (entry) VALUES (?)", rows)
+            self._depth += len(rows)
+
+    def peek(self, limit):
+        """
+        Returns:
+            list: up to ``limit`` oldest entries as (seq, doc_id, update, upsert).
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT seq, entry FROM spool ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        entries = []
+        for seq, entry in rows:
+            doc = json_util.loads(entry)
+            entries.append((seq, doc["_id"], doc["update"], doc["upsert"]))
+        return entries
+
+    def remove_through(self, seq):
+        """Drop every entry up to and including ``seq`` (they have been written)."""
+        with self._lock:
+            with self._db:
+                removed = self._db.execute("DELETE FROM spool WHERE seq <= ?", (seq,)).rowcount
+            self._depth -= removed
+
+    def __len__(self):
+        with self._lock:
+            return self._depth
+
+    def close(self):
+        with self._lock:
+            self._db.close()